@@ -1,7 +1,10 @@
 from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from rest_framework.routers import SimpleRouter
 
+from helpdesk_system.notifications.views import NotificationMetricsView
+from helpdesk_system.notifications.views import prometheus_metrics
 from helpdesk_system.tickets.views import CommentViewSet
 from helpdesk_system.tickets.views import TicketViewSet
 from helpdesk_system.users.api.views import UserViewSet
@@ -14,4 +17,16 @@ router.register("comments", CommentViewSet, basename="comment")
 
 
 app_name = "api"
-urlpatterns = router.urls
+urlpatterns = [
+    *router.urls,
+    path(
+        "notifications/metrics/",
+        NotificationMetricsView.as_view(),
+        name="notification-metrics",
+    ),
+    path(
+        "notifications/metrics/prometheus/",
+        prometheus_metrics,
+        name="notification-prometheus-metrics",
+    ),
+]
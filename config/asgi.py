@@ -20,9 +20,13 @@ django_asgi_app = get_asgi_application()
 from channels.routing import ProtocolTypeRouter  # noqa: E402
 from channels.routing import URLRouter  # noqa: E402
 
+from helpdesk_system.notifications.metrics import start_metrics_server  # noqa: E402
 from helpdesk_system.notifications.middleware import JWTAuthMiddleware  # noqa: E402
 from helpdesk_system.notifications.routing import websocket_urlpatterns  # noqa: E402
 
+# The WebSocket metrics only exist in this process, scraped on a port of its own
+start_metrics_server()
+
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
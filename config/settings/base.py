@@ -70,6 +70,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -375,15 +376,122 @@ SPECTACULAR_SETTINGS = {
 # Your stuff...
 # ------------------------------------------------------------------------------
 
+# Users
+# ------------------------------------------------------------------------------
+# Seconds a user authenticated by a WebSocket token stays cached. Saving or
+# deleting the user invalidates it right away.
+USERS_AUTH_CACHE_TTL = env.int("USERS_AUTH_CACHE_TTL", default=60)
+
+# Tickets
+# ------------------------------------------------------------------------------
+# Default pagination style of the ticket list: "page" or "cursor".
+# Clients can override it per request with ?pagination=page|cursor.
+TICKETS_PAGINATION_MODE = env("TICKETS_PAGINATION_MODE", default="page")
+# Whether paginated ticket lists compute the total "count" by default.
+# Clients can override it per request with ?count=true|false.
+TICKETS_PAGINATION_COUNT = env.bool("TICKETS_PAGINATION_COUNT", default=True)
+# Number of most recent comments embedded in the ticket detail response.
+TICKETS_DETAIL_COMMENTS_LIMIT = env.int("TICKETS_DETAIL_COMMENTS_LIMIT", default=50)
+# Backend behind ?search= on the ticket list: "fulltext" uses the indexed
+# tsvector column with ranking, "icontains" the plain DRF SearchFilter.
+TICKETS_SEARCH_BACKEND = env("TICKETS_SEARCH_BACKEND", default="fulltext")
+# Retry full-text searches without matches as a trigram similarity search
+# on titles, to tolerate typos. Needs the pg_trgm extension.
+TICKETS_SEARCH_TRIGRAM_FALLBACK = env.bool(
+    "TICKETS_SEARCH_TRIGRAM_FALLBACK",
+    default=False,
+)
+# Build the ticket list from .values() rows with the serializer compiled to a
+# single function, instead of a TicketListSerializer walk over model instances.
+TICKETS_LIST_FAST_PATH = env.bool("TICKETS_LIST_FAST_PATH", default=True)
+# Rows fetched per round trip from the server-side cursor of the export
+# endpoint, and serialized and written out at a time.
+TICKETS_EXPORT_CHUNK_SIZE = env.int("TICKETS_EXPORT_CHUNK_SIZE", default=2000)
+# Maximum number of tickets changed by one call of the bulk update endpoint.
+TICKETS_BULK_UPDATE_MAX_TICKETS = env.int(
+    "TICKETS_BULK_UPDATE_MAX_TICKETS",
+    default=500,
+)
+# Maximum number of changes returned by one call of the changes endpoint.
+TICKETS_CHANGES_PAGE_SIZE = env.int("TICKETS_CHANGES_PAGE_SIZE", default=100)
+# Seconds the changes endpoint holds back recent changes, so a transaction
+# committing after it set updated_at is not skipped by a newer watermark.
+TICKETS_CHANGES_SETTLE_TIME = env.float("TICKETS_CHANGES_SETTLE_TIME", default=1.0)
+# Seconds deleted tickets are remembered for the changes endpoint. Clients
+# with an older watermark get a 410 and have to reload from scratch.
+TICKETS_TOMBSTONE_RETENTION = env.int(
+    "TICKETS_TOMBSTONE_RETENTION",
+    default=60 * 60 * 24 * 7,
+)
+
+# Emails
+# ------------------------------------------------------------------------------
+# Number of emails sent per send_ticket_email_batch task when a notification
+# fans out to many recipients (e.g. every agent on ticket creation).
+EMAILS_BATCH_SIZE = env.int("EMAILS_BATCH_SIZE", default=50)
+# Seconds a worker keeps an unused SMTP connection open before closing it,
+# keep it below the server's own idle timeout.
+EMAILS_CONNECTION_IDLE_TIMEOUT = env.int("EMAILS_CONNECTION_IDLE_TIMEOUT", default=30)
+
+# Notifications
+# ------------------------------------------------------------------------------
+# Seconds between two flushes of the buffered WebSocket notification publisher.
+NOTIFICATIONS_FLUSH_INTERVAL = env.float("NOTIFICATIONS_FLUSH_INTERVAL", default=0.05)
+# Pending notifications that trigger a flush before the interval elapses.
+NOTIFICATIONS_FLUSH_BATCH_SIZE = env.int("NOTIFICATIONS_FLUSH_BATCH_SIZE", default=100)
+# Pending notifications kept per process, the oldest are dropped beyond that.
+NOTIFICATIONS_QUEUE_SIZE = env.int("NOTIFICATIONS_QUEUE_SIZE", default=10000)
+# Notifications pending per WebSocket before the slow client policy applies.
+NOTIFICATIONS_CLIENT_QUEUE_SIZE = env.int(
+    "NOTIFICATIONS_CLIENT_QUEUE_SIZE",
+    default=100,
+)
+# Most notifications sent in one frame to clients connected with ?batch=true.
+NOTIFICATIONS_CLIENT_BATCH_SIZE = env.int("NOTIFICATIONS_CLIENT_BATCH_SIZE", default=50)
+# What to do when a client falls behind by NOTIFICATIONS_CLIENT_QUEUE_SIZE
+# notifications: "drop_oldest" or "disconnect" it (close code 4008).
+NOTIFICATIONS_SLOW_CLIENT_POLICY = env(
+    "NOTIFICATIONS_SLOW_CLIENT_POLICY",
+    default="drop_oldest",
+)
+# Log notifications to per-group Redis streams, so clients reconnecting with
+# ?since=<seq> get what they missed instead of reloading the ticket list.
+NOTIFICATIONS_REPLAY_ENABLED = env.bool("NOTIFICATIONS_REPLAY_ENABLED", default=True)
+NOTIFICATIONS_REPLAY_REDIS_URL = env(
+    "NOTIFICATIONS_REPLAY_REDIS_URL",
+    default=REDIS_URL,
+)
+# Notifications kept per group, and seconds a group's log outlives its last one.
+NOTIFICATIONS_REPLAY_MAXLEN = env.int("NOTIFICATIONS_REPLAY_MAXLEN", default=500)
+NOTIFICATIONS_REPLAY_TTL = env.int("NOTIFICATIONS_REPLAY_TTL", default=60 * 60 * 24)
+# Bearer token Prometheus scrapes /api/notifications/metrics/prometheus/ with.
+# Without it, only staff users can read the metrics.
+NOTIFICATIONS_METRICS_TOKEN = env("NOTIFICATIONS_METRICS_TOKEN", default="")
+# Port each ASGI process serves its Prometheus metrics on, for deployments
+# where the HTTP API (and the endpoint above) is served by WSGI workers.
+NOTIFICATIONS_METRICS_PORT = env.int("NOTIFICATIONS_METRICS_PORT", default=0)
+
 # Django Channels
 # ------------------------------------------------------------------------------
 ASGI_APPLICATION = "config.asgi.application"
 
+CHANNEL_LAYERS_BACKENDS = {
+    # Messages are stored per channel: group_send writes one copy for each
+    # member of the group, e.g. every connected agent.
+    "core": "channels_redis.core.RedisChannelLayer",
+    # group_send is a single PUBLISH, fanned out by the ASGI processes that
+    # subscribed. Nothing is stored, clients offline at that moment miss it.
+    "pubsub": "channels_redis.pubsub.RedisPubSubChannelLayer",
+}
+CHANNEL_LAYERS_BACKEND = env("CHANNEL_LAYERS_BACKEND", default="core")
+# Redis hosts the channel layer shards groups and channels across.
+CHANNEL_LAYERS_HOSTS = env.list("CHANNEL_LAYERS_HOSTS", default=[REDIS_URL])
+
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "BACKEND": CHANNEL_LAYERS_BACKENDS[CHANNEL_LAYERS_BACKEND],
         "CONFIG": {
-            "hosts": [REDIS_URL],
+            "hosts": CHANNEL_LAYERS_HOSTS,
         },
     },
 }
@@ -36,3 +36,8 @@ TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore[index]
 MEDIA_URL = "http://media.testserver/"
 # Your stuff...
 # ------------------------------------------------------------------------------
+
+# Notifications
+# ------------------------------------------------------------------------------
+# Tests needing the replay log enable it against a reachable Redis
+NOTIFICATIONS_REPLAY_ENABLED = False
@@ -0,0 +1,79 @@
+import contextlib
+import os
+import smtplib
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+from celery.signals import worker_shutdown
+from django.conf import settings
+from django.core.mail import get_connection
+
+# Errors meaning the connection itself is gone (e.g. the server dropped an
+# idle session), as opposed to the server rejecting one message.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class PooledMailConnection:
+    """
+    Mail backend connection kept open across tasks of a worker process.
+
+    Opening an SMTP session (TCP, EHLO, STARTTLS, AUTH) costs more than
+    sending a message, so the connection is reused until it has been idle for
+    ``EMAILS_CONNECTION_IDLE_TIMEOUT`` seconds. If it turns out to be dead
+    when sending, it is reopened and the message is sent once more. Forked
+    children never reuse a connection opened by their parent.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._last_used = 0.0
+
+    def _get(self):
+        idle = time.monotonic() - self._last_used
+        if self._connection is not None and (
+            self._pid != os.getpid() or idle > settings.EMAILS_CONNECTION_IDLE_TIMEOUT
+        ):
+            self._close()
+
+        if self._connection is None:
+            connection = get_connection()
+            connection.open()
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _close(self):
+        connection, self._connection = self._connection, None
+        # The socket of a parent process is not ours to QUIT
+        if connection is not None and self._pid == os.getpid():
+            with contextlib.suppress(OSError):
+                connection.close()
+
+    def send(self, message):
+        """Send one EmailMessage over the pooled connection."""
+        with self._lock:
+            try:
+                message.connection = self._get()
+                message.send()
+            except CONNECTION_ERRORS:
+                self._close()
+                message.connection = self._get()
+                message.send()
+            finally:
+                self._last_used = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+mail_connection = PooledMailConnection()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_mail_connection(**kwargs):
+    mail_connection.close()
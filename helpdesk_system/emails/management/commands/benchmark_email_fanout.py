@@ -0,0 +1,108 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
+
+from helpdesk_system.emails import tasks
+from helpdesk_system.emails.models import EmailLog
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.users.models import User
+
+
+def legacy_ticket_created_fanout(ticket):
+    """The per-agent loop send_ticket_created_email used before batching."""
+    for agent in User.objects.filter(role=User.Role.AGENT):
+        html_content = render_to_string(
+            "emails/ticket_created.html",
+            {"ticket": ticket, "recipient_name": agent.name or agent.username},
+        )
+        email_log = EmailLog.objects.create(
+            recipient=agent.email,
+            subject=f"[Ticket #{ticket.id}] {ticket.title}",
+            body_html=html_content,
+            ticket=ticket,
+        )
+        tasks.send_ticket_email.delay(email_log.id)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-ticket cost of the ticket created email fan-out, "
+        "legacy per-agent loop vs batched, for a number of agents. Task "
+        "dispatches are counted instead of sent to the broker and every row "
+        "created is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--agents",
+            type=int,
+            action="append",
+            dest="agent_counts",
+            help="Number of agents, repeatable (default: 10, 100 and 1000)",
+        )
+
+    def handle(self, *args, **options):
+        agent_counts = options["agent_counts"] or [10, 100, 1000]
+        self.stdout.write(self.style.NOTICE("Benchmarking email fan-out..."))
+
+        for count in agent_counts:
+            with transaction.atomic():
+                ticket = self._setup(count)
+                legacy = self._measure(legacy_ticket_created_fanout, ticket)
+                batched = self._measure(tasks.send_ticket_created_email, ticket.id)
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"\n{count} agents:\n"
+                f"   - legacy:  {self._format(legacy)}\n"
+                f"   - batched: {self._format(batched)}",
+            )
+
+    def _setup(self, count):
+        # Only the benchmark agents receive the fan-out
+        User.objects.filter(role=User.Role.AGENT).update(role=User.Role.CUSTOMER)
+        agents = User.objects.bulk_create(
+            User(
+                username=f"benchmark_agent_{i}",
+                email=f"benchmark_agent_{i}@test.com",
+                name=f"Agent {i}",
+                role=User.Role.AGENT,
+                password=make_password(None),
+            )
+            for i in range(count)
+        )
+        # bulk_create skips post_save, so no real email task is queued
+        [ticket] = Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    title="Benchmark ticket",
+                    description="Email fan-out benchmark",
+                    created_by=agents[0],
+                ),
+            ],
+        )
+        return Ticket.objects.select_related("created_by").get(pk=ticket.pk)
+
+    def _measure(self, fanout, *args):
+        with (
+            mock.patch.object(tasks.send_ticket_email, "delay") as single,
+            mock.patch.object(tasks.send_ticket_email_batch, "delay") as batch,
+            CaptureQueriesContext(connection) as queries,
+        ):
+            start = time.perf_counter()
+            fanout(*args)
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries), single.call_count + batch.call_count
+
+    def _format(self, result):
+        elapsed, queries, dispatches = result
+        return (
+            f"{elapsed * 1000:9.2f} ms  {queries:>5} queries  "
+            f"{dispatches:>5} task dispatches"
+        )
@@ -1,7 +1,40 @@
+import uuid
+
 from celery import shared_task
+from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.html import conditional_escape
+
+from .connection import mail_connection
+
+PLAIN_TEXT_BODY = "Please view this email in an HTML-compatible email client."
+
+
+def _build_message(email_log):
+    msg = EmailMultiAlternatives(
+        subject=email_log.subject,
+        body=PLAIN_TEXT_BODY,
+        to=[email_log.recipient],
+    )
+    msg.attach_alternative(email_log.body_html, "text/html")
+    return msg
+
+
+def render_for_recipients(template_name, context, recipient_names):
+    """
+    Render a template once and personalize it for each recipient name.
+
+    The template is rendered with a unique placeholder as ``recipient_name``,
+    which is then replaced by each (escaped) name, so the cost no longer
+    grows with the number of recipients.
+    """
+    placeholder = f"recipient-{uuid.uuid4().hex}"
+    html = render_to_string(template_name, {**context, "recipient_name": placeholder})
+    return [
+        html.replace(placeholder, conditional_escape(name)) for name in recipient_names
+    ]
 
 
 @shared_task(bind=True, max_retries=3)
@@ -12,13 +45,7 @@ def send_ticket_email(self, email_log_id: int):
     try:
         email_log = EmailLog.objects.get(id=email_log_id)
 
-        msg = EmailMultiAlternatives(
-            subject=email_log.subject,
-            body="Please view this email in an HTML-compatible email client.",
-            to=[email_log.recipient],
-        )
-        msg.attach_alternative(email_log.body_html, "text/html")
-        msg.send()
+        mail_connection.send(_build_message(email_log))
 
         email_log.status = EmailLog.Status.SENT
         email_log.sent_at = timezone.now()
@@ -33,6 +60,52 @@ def send_ticket_email(self, email_log_id: int):
         raise self.retry(exc=exc, countdown=60) from exc
 
 
+@shared_task(bind=True, max_retries=3)
+def send_ticket_email_batch(self, email_log_ids: list[int]):
+    """Send a batch of emails over the pooled connection, updating EmailLogs."""
+    from .models import EmailLog  # noqa: PLC0415
+
+    # Already sent logs are skipped, so redelivered or retried batches
+    # never send twice.
+    email_logs = (
+        EmailLog.objects.filter(id__in=email_log_ids)
+        .exclude(status=EmailLog.Status.SENT)
+        .order_by("id")
+    )
+
+    sent_ids = []
+    failed = {}
+    for email_log in email_logs:
+        try:
+            mail_connection.send(_build_message(email_log))
+        except Exception as exc:  # noqa: BLE001
+            failed[email_log.id] = exc
+        else:
+            sent_ids.append(email_log.id)
+
+    EmailLog.objects.filter(id__in=sent_ids).update(
+        status=EmailLog.Status.SENT,
+        sent_at=timezone.now(),
+    )
+    for email_log_id, exc in failed.items():
+        EmailLog.objects.filter(id=email_log_id).update(
+            status=EmailLog.Status.FAILED,
+            error_message=str(exc),
+        )
+
+    if failed:
+        exc = next(iter(failed.values()))
+        raise self.retry(args=[list(failed)], exc=exc, countdown=60)
+
+
+def dispatch_email_batches(email_logs):
+    """Queue EmailLogs for sending in chunks of ``EMAILS_BATCH_SIZE``."""
+    ids = [email_log.id for email_log in email_logs]
+    batch_size = settings.EMAILS_BATCH_SIZE
+    for start in range(0, len(ids), batch_size):
+        send_ticket_email_batch.delay(ids[start : start + batch_size])
+
+
 @shared_task
 def send_ticket_created_email(ticket_id: int):
     """Send email notification when a ticket is created."""
@@ -47,25 +120,27 @@ def send_ticket_created_email(ticket_id: int):
         return
 
     # Notify all agents
-    agents = User.objects.filter(role=User.Role.AGENT)
-
-    for agent in agents:
-        html_content = render_to_string(
-            "emails/ticket_created.html",
-            {
-                "ticket": ticket,
-                "recipient_name": agent.name or agent.username,
-            },
-        )
+    agents = list(
+        User.objects.filter(role=User.Role.AGENT).only("name", "username", "email"),
+    )
+    bodies = render_for_recipients(
+        "emails/ticket_created.html",
+        {"ticket": ticket},
+        [agent.name or agent.username for agent in agents],
+    )
 
-        email_log = EmailLog.objects.create(
+    subject = f"[Ticket #{ticket.id}] {ticket.title}"
+    email_logs = EmailLog.objects.bulk_create(
+        EmailLog(
             recipient=agent.email,
-            subject=f"[Ticket #{ticket.id}] {ticket.title}",
-            body_html=html_content,
+            subject=subject,
+            body_html=body_html,
             ticket=ticket,
         )
+        for agent, body_html in zip(agents, bodies, strict=True)
+    )
 
-        send_ticket_email.delay(email_log.id)
+    dispatch_email_batches(email_logs)
 
 
 @shared_task
@@ -0,0 +1,132 @@
+import smtplib
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from helpdesk_system.emails.connection import mail_connection
+from helpdesk_system.emails.models import EmailLog
+from helpdesk_system.emails.tasks import send_ticket_email
+from helpdesk_system.emails.tasks import send_ticket_email_batch
+from helpdesk_system.users.tests.factories import TicketFactory
+
+REJECTED = "rejected@example.com"
+
+
+class RecordingHandler:
+    """aiosmtpd handler counting SMTP sessions and recording deliveries."""
+
+    def __init__(self):
+        self.sessions = 0
+        self.recipients = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):  # noqa: N802
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):  # noqa: N802
+        if address == REJECTED:
+            return "550 Mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802
+        self.recipients.extend(envelope.rcpt_tos)
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture
+def smtp_server(settings):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    settings.EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+    settings.EMAIL_HOST = "127.0.0.1"
+    settings.EMAIL_PORT = port
+    settings.EMAIL_USE_TLS = False
+    mail_connection.close()
+    yield handler
+    mail_connection.close()
+    controller.stop()
+
+
+@pytest.fixture
+def email_logs(db):
+    ticket = TicketFactory()
+
+    def create(*recipients):
+        return [
+            EmailLog.objects.create(
+                recipient=recipient,
+                subject="Subject",
+                body_html="<p>Body</p>",
+                ticket=ticket,
+            )
+            for recipient in recipients
+        ]
+
+    return create
+
+
+class TestPooledMailConnection:
+    def test_batch_uses_one_session(self, smtp_server, email_logs):
+        logs = email_logs("a@example.com", "b@example.com", "c@example.com")
+
+        send_ticket_email_batch([log.id for log in logs])
+
+        assert smtp_server.recipients == [log.recipient for log in logs]
+        assert smtp_server.sessions == 1
+        assert set(
+            EmailLog.objects.values_list("status", flat=True),
+        ) == {EmailLog.Status.SENT}
+
+    def test_session_is_reused_across_tasks(self, smtp_server, email_logs):
+        first, second = email_logs("a@example.com", "b@example.com")
+
+        send_ticket_email(first.id)
+        send_ticket_email(second.id)
+
+        assert smtp_server.recipients == ["a@example.com", "b@example.com"]
+        assert smtp_server.sessions == 1
+
+    def test_reconnects_when_connection_dropped(self, smtp_server, email_logs):
+        first, second = email_logs("a@example.com", "b@example.com")
+        send_ticket_email(first.id)
+
+        # Simulate the server closing the idle session under us
+        smtp = mail_connection._connection.connection  # noqa: SLF001
+        smtp.sock.shutdown(socket.SHUT_RDWR)
+        send_ticket_email(second.id)
+
+        assert smtp_server.recipients == ["a@example.com", "b@example.com"]
+        assert smtp_server.sessions == 2  # noqa: PLR2004
+
+    def test_idle_connection_is_replaced(self, smtp_server, email_logs, settings):
+        settings.EMAILS_CONNECTION_IDLE_TIMEOUT = 0
+        first, second = email_logs("a@example.com", "b@example.com")
+
+        send_ticket_email(first.id)
+        send_ticket_email(second.id)
+
+        assert smtp_server.sessions == 2  # noqa: PLR2004
+
+    def test_rejected_recipient_keeps_session(self, smtp_server, email_logs):
+        logs = email_logs("a@example.com", REJECTED, "c@example.com")
+
+        # Called directly, retry re-raises the error instead of scheduling
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            send_ticket_email_batch([log.id for log in logs])
+
+        assert smtp_server.recipients == ["a@example.com", "c@example.com"]
+        assert smtp_server.sessions == 1
+        statuses = dict(EmailLog.objects.values_list("recipient", "status"))
+        assert statuses == {
+            "a@example.com": EmailLog.Status.SENT,
+            REJECTED: EmailLog.Status.FAILED,
+            "c@example.com": EmailLog.Status.SENT,
+        }
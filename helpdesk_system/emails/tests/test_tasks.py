@@ -1,7 +1,13 @@
+from unittest import mock
+
 import pytest
+from django.core import mail
 
+from helpdesk_system.emails import tasks
 from helpdesk_system.emails.models import EmailLog
+from helpdesk_system.emails.tasks import send_ticket_created_email
 from helpdesk_system.emails.tasks import send_ticket_email
+from helpdesk_system.emails.tasks import send_ticket_email_batch
 from helpdesk_system.users.models import User
 from helpdesk_system.users.tests.factories import TicketFactory
 from helpdesk_system.users.tests.factories import UserFactory
@@ -31,3 +37,82 @@ class TestEmailLogCreation:
 
         assert email_log.ticket == ticket
         assert email_log.recipient == customer.email
+
+
+@pytest.mark.django_db
+class TestSendTicketCreatedEmail:
+    def test_emails_every_agent(self, settings, customer):
+        agents = UserFactory.create_batch(3, role=User.Role.AGENT)
+        ticket = TicketFactory(created_by=customer)
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+        settings.EMAILS_BATCH_SIZE = 2
+        mail.outbox = []
+
+        send_ticket_created_email(ticket.id)
+
+        assert sorted(message.to[0] for message in mail.outbox) == sorted(
+            agent.email for agent in agents
+        )
+        logs = EmailLog.objects.filter(ticket=ticket)
+        assert {log.status for log in logs} == {EmailLog.Status.SENT}
+        assert all(log.sent_at for log in logs)
+
+    def test_body_is_personalized_and_escaped(self, customer):
+        UserFactory(role=User.Role.AGENT, name="Ann <Admin>")
+        UserFactory(role=User.Role.AGENT, name="Bob")
+        ticket = TicketFactory(created_by=customer, title="Printer <jam>")
+
+        with mock.patch.object(tasks.send_ticket_email_batch, "delay"):
+            send_ticket_created_email(ticket.id)
+
+        bodies = {
+            log.body_html.split("Hello ")[1].split(",")[0]: log.body_html
+            for log in EmailLog.objects.filter(ticket=ticket)
+        }
+        assert set(bodies) == {"Ann &lt;Admin&gt;", "Bob"}
+        assert "Printer &lt;jam&gt;" in bodies["Bob"]
+
+    def test_fan_out_cost_does_not_grow_with_agents(
+        self,
+        settings,
+        customer,
+        django_assert_num_queries,
+    ):
+        UserFactory.create_batch(7, role=User.Role.AGENT)
+        ticket = TicketFactory(created_by=customer)
+        settings.EMAILS_BATCH_SIZE = 3
+
+        # Ticket, agents and a single bulk INSERT
+        with (
+            django_assert_num_queries(3),
+            mock.patch.object(tasks.send_ticket_email_batch, "delay") as delay,
+        ):
+            send_ticket_created_email(ticket.id)
+
+        assert [len(call.args[0]) for call in delay.call_args_list] == [3, 3, 1]
+
+
+@pytest.mark.django_db
+class TestSendTicketEmailBatch:
+    def test_sends_pending_and_skips_sent(self, customer):
+        ticket = TicketFactory(created_by=customer)
+        pending = EmailLog.objects.create(
+            recipient="pending@example.com",
+            subject="Pending",
+            body_html="<p>Pending</p>",
+            ticket=ticket,
+        )
+        sent = EmailLog.objects.create(
+            recipient="sent@example.com",
+            subject="Sent",
+            body_html="<p>Sent</p>",
+            ticket=ticket,
+            status=EmailLog.Status.SENT,
+        )
+        mail.outbox = []
+
+        send_ticket_email_batch([pending.id, sent.id])
+
+        assert [message.to for message in mail.outbox] == [["pending@example.com"]]
+        pending.refresh_from_db()
+        assert pending.status == EmailLog.Status.SENT
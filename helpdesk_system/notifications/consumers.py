@@ -1,8 +1,42 @@
+import asyncio
+import logging
+import time
+from urllib.parse import parse_qs
+
+import redis
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from . import metrics
+from .delivery import NotificationOutbox
+from .replay import read_notifications
+
+logger = logging.getLogger(__name__)
+
+# Policies for a client whose outbox is full
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+# Close code sent to clients disconnected for falling behind
+SLOW_CLIENT_CLOSE_CODE = 4008
 
 
 class NotificationConsumer(AsyncJsonWebsocketConsumer):
-    """WebSocket consumer for real-time notifications."""
+    """
+    WebSocket consumer for real-time notifications.
+
+    Notifications are queued in a bounded NotificationOutbox and written by a
+    separate task, so a slow client never stalls the channel layer receive
+    loop. Clients connecting with ``?batch=true`` get everything pending in
+    a single ``{"type": "batch", "notifications": [...]}`` frame. When the
+    outbox is full, NOTIFICATIONS_SLOW_CLIENT_POLICY either drops the oldest
+    notification or closes the socket with SLOW_CLIENT_CLOSE_CODE.
+
+    Notifications carry the "seq" they were logged under. Clients
+    reconnecting with ``?since=<seq>`` first get what they missed, or a
+    ``{"type": "resync", "seq": ...}`` frame when it is no longer available
+    and the ticket list has to be reloaded.
+    """
 
     async def connect(self):
         """Handle WebSocket connection."""
@@ -22,6 +56,22 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
 
         await self.accept()
 
+        query_params = parse_qs(self.scope.get("query_string", b"").decode())
+        self.batch_frames = query_params.get("batch", [""])[0] in ("1", "true")
+        self.outbox = NotificationOutbox(settings.NOTIFICATIONS_CLIENT_QUEUE_SIZE)
+        self.sender = asyncio.create_task(self.deliver())
+        self.replayed_until = 0
+        since = query_params.get("since", [""])[0]
+        if since.isdigit() and settings.NOTIFICATIONS_REPLAY_ENABLED:
+            await self.replay(int(since))
+
+        self.metric_groups = [metrics.USER_GROUP]
+        if self.user.role == "agent":
+            self.metric_groups.append(metrics.AGENTS_GROUP)
+        metrics.OPEN_CONNECTIONS.inc()
+        for group in self.metric_groups:
+            metrics.GROUP_MEMBERS.labels(group).inc()
+
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection."""
         if hasattr(self, "user_group"):
@@ -31,6 +81,14 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
             if self.user.role == "agent":
                 await self.channel_layer.group_discard("agents", self.channel_name)
 
+        if hasattr(self, "sender"):
+            self.sender.cancel()
+
+        if hasattr(self, "metric_groups"):
+            metrics.OPEN_CONNECTIONS.dec()
+            for group in self.metric_groups:
+                metrics.GROUP_MEMBERS.labels(group).dec()
+
     async def receive_json(self, content):
         """Handle incoming WebSocket messages."""
         # For now, we just echo back or handle ping/pong
@@ -39,10 +97,71 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
         if message_type == "ping":
             await self.send_json({"type": "pong"})
 
+    async def replay(self, since):
+        """Queue the notifications missed since a sequence number."""
+        groups = [self.user_group]
+        if self.user.role == "agent":
+            groups.append("agents")
+        try:
+            notifications, sequence = await read_notifications(groups, since)
+        except redis.RedisError:
+            logger.exception("Failed to replay notifications since %s", since)
+            notifications, sequence = None, since
+
+        if notifications is None or (
+            len(notifications) > settings.NOTIFICATIONS_CLIENT_QUEUE_SIZE
+        ):
+            notifications = [{"type": "resync", "seq": sequence}]
+        for notification in notifications:
+            self.outbox.put(notification)
+        # Live notifications up to here are already part of the replay
+        self.replayed_until = sequence
+
+    async def queue_notification(self, data):
+        """Queue a notification for the sender, applying the slow client policy."""
+        if self.sender.done() or self.sender.cancelling():
+            return  # Disconnected, or being disconnected for falling behind
+        if data.get("seq", self.replayed_until + 1) <= self.replayed_until:
+            return
+        if self.outbox.is_coalesced(data):
+            metrics.MESSAGES_COALESCED.inc()
+        if self.outbox.put(data):
+            return
+
+        if settings.NOTIFICATIONS_SLOW_CLIENT_POLICY == DISCONNECT:
+            metrics.MESSAGES_DROPPED.labels(DISCONNECT).inc(len(self.outbox) + 1)
+            self.sender.cancel()
+            await self.close(code=SLOW_CLIENT_CLOSE_CODE)
+            return
+
+        self.outbox.drop_oldest()
+        self.outbox.put(data)
+        metrics.MESSAGES_DROPPED.labels(DROP_OLDEST).inc()
+
+    async def deliver(self):
+        """Write queued notifications to the WebSocket until disconnected."""
+        limit = settings.NOTIFICATIONS_CLIENT_BATCH_SIZE if self.batch_frames else 1
+        while True:
+            notifications = await self.outbox.get(limit)
+            if len(notifications) == 1:
+                frame = notifications[0]
+            else:
+                frame = {"type": "batch", "notifications": notifications}
+            await self.send_notifications(frame, notifications)
+
+    async def send_notifications(self, frame, notifications):
+        """Send a frame to the WebSocket, recording its latency."""
+        start = time.perf_counter()
+        await self.send_json(frame)
+        frame_type = frame.get("type", "unknown")
+        metrics.SEND_LATENCY.labels(frame_type).observe(time.perf_counter() - start)
+        for notification in notifications:
+            metrics.MESSAGES_SENT.labels(notification.get("type", "unknown")).inc()
+
     async def ticket_notification(self, event):
         """Send ticket notification to WebSocket."""
-        await self.send_json(event["data"])
+        await self.queue_notification(event["data"])
 
     async def comment_notification(self, event):
         """Send comment notification to WebSocket."""
-        await self.send_json(event["data"])
+        await self.queue_notification(event["data"])
@@ -0,0 +1,81 @@
+import asyncio
+import collections
+import itertools
+
+# Notification types where only the latest event per ticket matters
+COALESCED_TYPES = ("ticket_created", "status_changed")
+
+
+def get_coalesce_key(notification):
+    """Return the key a pending notification is replaced under, if any."""
+    if notification.get("type") in COALESCED_TYPES and "ticket" in notification:
+        return (notification["type"], notification["ticket"]["id"])
+    return None
+
+
+def merge(pending, notification):
+    """Merge a notification into the pending one for the same ticket."""
+    if notification["type"] == "status_changed":
+        # Report the whole transition, e.g. open -> resolved for two changes
+        old_status = pending["ticket"]["old_status"]
+        return {
+            **notification,
+            "ticket": {**notification["ticket"], "old_status": old_status},
+        }
+    return notification
+
+
+class NotificationOutbox:
+    """
+    Bounded queue of the notifications pending for one WebSocket.
+
+    A notification about a ticket that already has one of the same type
+    pending replaces it in place instead of queueing another frame, so a burst
+    of updates to a ticket costs the client a single message. The queue never
+    grows beyond maxsize: put() refuses new notifications once full and the
+    caller decides whether to drop the oldest or give up on the client.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._pending = collections.OrderedDict()
+        self._keys = itertools.count()
+        self._ready = asyncio.Event()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, notification):
+        """
+        Queue a notification, return whether it was accepted.
+
+        Coalescing into a pending notification always succeeds, even when the
+        queue is full.
+        """
+        key = get_coalesce_key(notification)
+        if key is not None and key in self._pending:
+            self._pending[key] = merge(self._pending[key], notification)
+            return True
+        if len(self._pending) >= self.maxsize:
+            return False
+
+        self._pending[key if key is not None else next(self._keys)] = notification
+        self._ready.set()
+        return True
+
+    def is_coalesced(self, notification):
+        key = get_coalesce_key(notification)
+        return key is not None and key in self._pending
+
+    def drop_oldest(self):
+        self._pending.popitem(last=False)
+
+    async def get(self, limit):
+        """Wait for notifications and return up to limit of them, oldest first."""
+        await self._ready.wait()
+        notifications = []
+        while self._pending and len(notifications) < limit:
+            notifications.append(self._pending.popitem(last=False)[1])
+        if not self._pending:
+            self._ready.clear()
+        return notifications
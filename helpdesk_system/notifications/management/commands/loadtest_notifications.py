@@ -0,0 +1,148 @@
+import asyncio
+import statistics
+import time
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from helpdesk_system.notifications.consumers import NotificationConsumer
+from helpdesk_system.users.models import User
+
+# Keys written by the load test, removed by flushing the layer afterwards
+LOADTEST_PREFIX = "loadtest"
+
+# Clients connecting at the same time
+CONNECT_CONCURRENCY = 200
+
+
+class Command(BaseCommand):
+    help = (
+        "Connect many agent NotificationConsumer clients in-process and "
+        "measure the latency of broadcasts to the agents group, for each "
+        "channel layer backend. Needs the Redis of CHANNEL_LAYERS_HOSTS, "
+        "nothing is written to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=2000,
+            help="Connected agents (default: 2000)",
+        )
+        parser.add_argument(
+            "--broadcasts",
+            type=int,
+            default=20,
+            help="Notifications sent to the agents group (default: 20)",
+        )
+        parser.add_argument(
+            "--backend",
+            action="append",
+            dest="backends",
+            choices=sorted(settings.CHANNEL_LAYERS_BACKENDS),
+            help="Channel layer backend, repeatable (default: all)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Seconds a client waits for each broadcast (default: 30)",
+        )
+
+    def handle(self, *args, **options):
+        backends = options["backends"] or sorted(settings.CHANNEL_LAYERS_BACKENDS)
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Broadcasting {options['broadcasts']} notifications to "
+                f"{options['clients']} agents...",
+            ),
+        )
+
+        for backend in backends:
+            layers = {
+                "default": {
+                    "BACKEND": settings.CHANNEL_LAYERS_BACKENDS[backend],
+                    "CONFIG": {
+                        "hosts": settings.CHANNEL_LAYERS_HOSTS,
+                        "prefix": LOADTEST_PREFIX,
+                    },
+                },
+            }
+            with override_settings(CHANNEL_LAYERS=layers):
+                result = asyncio.run(self._run(options))
+            self.stdout.write(f"\n{backend}:\n{self._format(result)}")
+
+    async def _run(self, options):
+        application = NotificationConsumer.as_asgi()
+        communicators = []
+        for i in range(options["clients"]):
+            communicator = WebsocketCommunicator(application, "/ws/notifications/")
+            communicator.scope["user"] = User(
+                id=i + 1,
+                username=f"loadtest_agent_{i}",
+                role=User.Role.AGENT,
+            )
+            communicators.append(communicator)
+
+        start = time.perf_counter()
+        for i in range(0, len(communicators), CONNECT_CONCURRENCY):
+            batch = communicators[i : i + CONNECT_CONCURRENCY]
+            results = await asyncio.gather(*(c.connect() for c in batch))
+            if not all(connected for connected, _ in results):
+                msg = "A load test client was refused"
+                raise RuntimeError(msg)
+        connect_time = time.perf_counter() - start
+
+        channel_layer = get_channel_layer()
+        send_times = []
+        latencies = []
+        fanout_times = []
+        try:
+            for sequence in range(options["broadcasts"]):
+                receipts = [
+                    asyncio.create_task(self._receive(c, options["timeout"]))
+                    for c in communicators
+                ]
+                sent_at = time.perf_counter()
+                await channel_layer.group_send(
+                    "agents",
+                    {
+                        "type": "ticket_notification",
+                        "data": {"type": "ticket_created", "sequence": sequence},
+                    },
+                )
+                send_times.append(time.perf_counter() - sent_at)
+                received_at = await asyncio.gather(*receipts)
+                latencies.extend(received - sent_at for received in received_at)
+                fanout_times.append(max(received_at) - sent_at)
+        finally:
+            for i in range(0, len(communicators), CONNECT_CONCURRENCY):
+                batch = communicators[i : i + CONNECT_CONCURRENCY]
+                await asyncio.gather(*(c.disconnect() for c in batch))
+            await channel_layer.flush()
+
+        return connect_time, send_times, latencies, fanout_times
+
+    async def _receive(self, communicator, wait):
+        await communicator.receive_json_from(timeout=wait)
+        return time.perf_counter()
+
+    def _format(self, result):
+        connect_time, send_times, latencies, fanout_times = result
+        latencies = sorted(latencies)
+        percentiles = statistics.quantiles(latencies, n=100)
+        return (
+            f"   - connect:    {connect_time * 1000:9.2f} ms total\n"
+            f"   - group_send: {statistics.median(send_times) * 1000:9.2f} ms p50"
+            f"  {max(send_times) * 1000:9.2f} ms max\n"
+            f"   - delivery:   {statistics.median(latencies) * 1000:9.2f} ms p50"
+            f"  {percentiles[94] * 1000:9.2f} ms p95"
+            f"  {percentiles[98] * 1000:9.2f} ms p99"
+            f"  {latencies[-1] * 1000:9.2f} ms max\n"
+            f"   - fan-out:    {statistics.median(fanout_times) * 1000:9.2f} ms p50"
+            f"  (last client served)"
+        )
@@ -0,0 +1,65 @@
+import logging
+
+from django.conf import settings
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+from prometheus_client import start_http_server
+
+logger = logging.getLogger(__name__)
+
+# Values are per process, Prometheus scrapes each ASGI worker on its own.
+# Personal user_{id} groups are counted together under the "user" kind, a
+# label per user would grow without bound.
+OPEN_CONNECTIONS = Gauge(
+    "helpdesk_notification_connections",
+    "Open NotificationConsumer WebSockets.",
+)
+GROUP_MEMBERS = Gauge(
+    "helpdesk_notification_group_members",
+    "NotificationConsumer channels subscribed to a group.",
+    ["group"],
+)
+MESSAGES_SENT = Counter(
+    "helpdesk_notification_messages_sent",
+    "Notifications sent to WebSocket clients.",
+    ["type"],
+)
+SEND_LATENCY = Histogram(
+    "helpdesk_notification_send_seconds",
+    "Time to hand a notification frame to the WebSocket client.",
+    ["type"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+MESSAGES_COALESCED = Counter(
+    "helpdesk_notification_messages_coalesced",
+    "Notifications merged into one already pending for the same ticket.",
+)
+MESSAGES_DROPPED = Counter(
+    "helpdesk_notification_messages_dropped",
+    "Notifications dropped for slow clients, by slow client policy.",
+    ["policy"],
+)
+
+AGENTS_GROUP = "agents"
+USER_GROUP = "user"
+
+
+def start_metrics_server():
+    """
+    Serve the metrics of this process on NOTIFICATIONS_METRICS_PORT, if set.
+
+    Started by the ASGI application, where the NotificationConsumer sockets
+    are, since the HTTP API may be served by WSGI workers that never see one.
+    Returns whether the server is running.
+    """
+    port = settings.NOTIFICATIONS_METRICS_PORT
+    if not port:
+        return False
+    try:
+        start_http_server(port)
+    except OSError:
+        # E.g. a second worker on the same host, give each its own port
+        logger.exception("Failed to serve notification metrics on port %s", port)
+        return False
+    return True
@@ -2,24 +2,58 @@ from urllib.parse import parse_qs
 
 from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import AccessToken
 
+from helpdesk_system.users.cache import get_auth_user_cache_key
+
+# Fields of the cached user, all the consumers need
+AUTH_USER_FIELDS = ("id", "role", "is_active", "username")
+
 
 @database_sync_to_async
-def get_user(token_key):
-    """Get user from JWT token."""
+def fetch_user(user_id):
+    from helpdesk_system.users.models import User  # noqa: PLC0415
+
+    return User.objects.filter(id=user_id).values(*AUTH_USER_FIELDS).first()
+
+
+def build_user(fields):
     from helpdesk_system.users.models import User  # noqa: PLC0415
 
+    return User(**fields)
+
+
+async def get_user(token_key):
+    """
+    Get user from JWT token.
+
+    Users are cached for USERS_AUTH_CACHE_TTL seconds and invalidated when
+    saved (e.g. their role changed) or deleted, so reconnect storms after a
+    deploy do not turn into one query per socket. The token is decoded on
+    the event loop, only cache misses go through the database thread.
+    Only AUTH_USER_FIELDS are cached, never the password hash.
+    """
     try:
         token = AccessToken(token_key)
-        user_id = token.payload.get("user_id")
-        return User.objects.get(id=user_id)
-    except (InvalidToken, TokenError, User.DoesNotExist):
+    except (InvalidToken, TokenError):
         return AnonymousUser()
 
+    user_id = token.payload.get(api_settings.USER_ID_CLAIM)
+    key = get_auth_user_cache_key(user_id)
+    fields = await cache.aget(key)
+    if fields is None:
+        fields = await fetch_user(user_id)
+        if fields is None:
+            return AnonymousUser()
+        await cache.aset(key, fields, settings.USERS_AUTH_CACHE_TTL)
+    return build_user(fields)
+
 
 class JWTAuthMiddleware(BaseMiddleware):
     """Middleware to authenticate WebSocket connections using JWT."""
@@ -0,0 +1,248 @@
+import asyncio
+import atexit
+import collections
+import logging
+import os
+import socket
+import threading
+import time
+
+import redis
+from celery.signals import worker_process_shutdown
+from celery.signals import worker_shutdown
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+from .replay import append_notifications
+
+logger = logging.getLogger(__name__)
+
+# Cache keys of the metrics reported by each process
+PUBLISHER_METRICS_KEY = "notifications:publisher:{process}"
+PUBLISHER_REGISTRY_KEY = "notifications:publishers"
+
+# Seconds between two metrics reports of a process, and how long a report
+# outlives it (a process gone for longer disappears from the endpoint).
+METRICS_REPORT_INTERVAL = 10
+METRICS_TTL = 60
+
+COUNTERS = ("queued", "sent", "failed", "dropped", "flushes")
+
+
+class NotificationPublisher:
+    """
+    Buffer channel layer group sends and flush them from a background thread.
+
+    ``publish`` only appends to an in-memory queue, so callers never wait on
+    the channel layer. A daemon thread flushes the queue every
+    ``NOTIFICATIONS_FLUSH_INTERVAL`` seconds, or as soon as
+    ``NOTIFICATIONS_FLUSH_BATCH_SIZE`` messages are pending. A flush sends the
+    whole batch concurrently on one long-lived event loop, so the Redis round
+    trips overlap instead of each paying for an ``async_to_sync`` loop. Once
+    ``NOTIFICATIONS_QUEUE_SIZE`` messages are pending, the oldest are dropped.
+    Forked children never reuse the queue or thread of their parent.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._buffer = collections.deque()
+        self._thread = None
+        self._loop = None
+        self._pid = os.getpid()
+        self._last_report = 0.0
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._flush_ms = {"last": 0.0, "max": 0.0, "total": 0.0}
+
+    @property
+    def process(self):
+        return f"{socket.gethostname()}:{self._pid}"
+
+    def publish(self, group, message):
+        """Queue a ``group_send`` of message to group, without blocking."""
+        if self._pid != os.getpid():
+            self._reset()
+
+        with self._lock:
+            if len(self._buffer) >= settings.NOTIFICATIONS_QUEUE_SIZE:
+                self._buffer.popleft()
+                self._counters["dropped"] += 1
+            self._buffer.append((group, message))
+            self._counters["queued"] += 1
+            pending = len(self._buffer)
+
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        if pending >= settings.NOTIFICATIONS_FLUSH_BATCH_SIZE:
+            self._wakeup.set()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="notification-publisher",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(settings.NOTIFICATIONS_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_report >= METRICS_REPORT_INTERVAL:
+                    self.report()
+            except Exception:
+                # Keep the thread alive, the next flush may well succeed
+                logger.exception("Notification publisher flush failed")
+
+    def flush(self):
+        """Send every pending message now and return how many were sent."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            start = time.perf_counter()
+            if settings.NOTIFICATIONS_REPLAY_ENABLED:
+                batch = self._number(batch)
+            results = self._loop.run_until_complete(self._send(batch))
+            elapsed = (time.perf_counter() - start) * 1000
+
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                logger.error(
+                    "Failed to publish %s of %s notifications",
+                    len(errors),
+                    len(batch),
+                    exc_info=errors[0],
+                )
+            with self._lock:
+                self._counters["sent"] += len(batch) - len(errors)
+                self._counters["failed"] += len(errors)
+                self._counters["flushes"] += 1
+                self._flush_ms["last"] = elapsed
+                self._flush_ms["max"] = max(self._flush_ms["max"], elapsed)
+                self._flush_ms["total"] += elapsed
+            return len(batch) - len(errors)
+
+    def _number(self, batch):
+        # Log the batch for replay and stamp each message with its sequence
+        # number. Live delivery does not depend on the log being available.
+        try:
+            sequences = append_notifications(batch)
+        except redis.RedisError:
+            logger.exception("Failed to log %s notifications for replay", len(batch))
+            return batch
+        return [
+            (group, {**message, "data": {**message["data"], "seq": sequence}})
+            for (group, message), sequence in zip(batch, sequences, strict=True)
+        ]
+
+    async def _send(self, batch):
+        channel_layer = get_channel_layer()
+        return await asyncio.gather(
+            *(channel_layer.group_send(group, message) for group, message in batch),
+            return_exceptions=True,
+        )
+
+    def metrics(self):
+        """Return a snapshot of the queue depth, counters and flush latency."""
+        with self._lock:
+            flushes = self._counters["flushes"]
+            return {
+                "queue_depth": len(self._buffer),
+                **self._counters,
+                "last_flush_ms": round(self._flush_ms["last"], 3),
+                "max_flush_ms": round(self._flush_ms["max"], 3),
+                "avg_flush_ms": (
+                    round(self._flush_ms["total"] / flushes, 3) if flushes else 0.0
+                ),
+            }
+
+    def report(self):
+        """Store the metrics of this process for get_publisher_metrics."""
+        self._last_report = time.monotonic()
+        process = self.process
+        cache.set(
+            PUBLISHER_METRICS_KEY.format(process=process),
+            self.metrics(),
+            METRICS_TTL,
+        )
+        # Prune processes whose report expired while registering this one
+        registry = cache.get(PUBLISHER_REGISTRY_KEY, [])
+        reports = cache.get_many(
+            [PUBLISHER_METRICS_KEY.format(process=name) for name in registry],
+        )
+        live = [
+            name
+            for name in registry
+            if PUBLISHER_METRICS_KEY.format(process=name) in reports
+        ]
+        if process not in live:
+            live.append(process)
+        if live != registry:
+            cache.set(PUBLISHER_REGISTRY_KEY, live, None)
+
+    def close(self):
+        """Stop the thread and send whatever is still queued."""
+        if self._pid != os.getpid():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush notifications on shutdown")
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+
+def get_publisher_metrics():
+    """Return the reported metrics of every process, and their totals."""
+    registry = cache.get(PUBLISHER_REGISTRY_KEY, [])
+    reports = cache.get_many(
+        [PUBLISHER_METRICS_KEY.format(process=name) for name in registry],
+    )
+    processes = {
+        name: reports[PUBLISHER_METRICS_KEY.format(process=name)]
+        for name in registry
+        if PUBLISHER_METRICS_KEY.format(process=name) in reports
+    }
+    totals = {
+        key: sum(metrics[key] for metrics in processes.values())
+        for key in ("queue_depth", *COUNTERS)
+    }
+    totals["max_flush_ms"] = max(
+        (metrics["max_flush_ms"] for metrics in processes.values()),
+        default=0.0,
+    )
+    return {"totals": totals, "processes": processes}
+
+
+notification_publisher = NotificationPublisher()
+atexit.register(notification_publisher.close)
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_notification_publisher(**kwargs):
+    notification_publisher.close()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import weakref
+
+import redis
+from django.conf import settings
+from redis import asyncio as aioredis
+
+# Redis keys
+SEQUENCE_KEY = "notifications:seq"
+STREAM_KEY = "notifications:stream:{group}"
+
+# Numbers a notification and logs it in the stream of its group, atomically,
+# so stream ids follow the global sequence and a client can resume every
+# group it is subscribed to from one number.
+APPEND_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('XADD', KEYS[2], 'MAXLEN', ARGV[2], seq .. '-0', 'data', ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return seq
+"""
+
+_clients = {}
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_redis():
+    url = settings.NOTIFICATIONS_REPLAY_REDIS_URL
+    if url not in _clients:
+        _clients[url] = redis.Redis.from_url(url)
+    return _clients[url]
+
+
+def get_async_redis():
+    # asyncio connections belong to the loop they were opened on
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = aioredis.Redis.from_url(
+            settings.NOTIFICATIONS_REPLAY_REDIS_URL,
+        )
+    return _async_clients[loop]
+
+
+def append_notifications(batch):
+    """
+    Log a batch of (group, message) group sends to the replay streams.
+
+    Returns the sequence number of each message. Every stream keeps its last
+    NOTIFICATIONS_REPLAY_MAXLEN notifications for NOTIFICATIONS_REPLAY_TTL
+    seconds after the last one. The whole batch is one pipelined round trip.
+    """
+    client = get_redis()
+    script = client.register_script(APPEND_SCRIPT)
+    pipe = client.pipeline(transaction=False)
+    for group, message in batch:
+        script(
+            keys=[SEQUENCE_KEY, STREAM_KEY.format(group=group)],
+            args=[
+                json.dumps(message["data"]),
+                settings.NOTIFICATIONS_REPLAY_MAXLEN,
+                settings.NOTIFICATIONS_REPLAY_TTL,
+            ],
+            client=pipe,
+        )
+    return pipe.execute()
+
+
+async def read_notifications(groups, since):
+    """
+    Return the notifications of groups logged after sequence number since.
+
+    Returns ``(notifications, sequence)`` oldest first, each with its "seq",
+    and the last sequence number. notifications is None when some were lost:
+    trimmed from a full stream, or since is ahead of a sequence that was
+    reset. The client then has to resync from the API.
+    """
+    client = get_async_redis()
+    keys = [STREAM_KEY.format(group=group) for group in groups]
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.get(SEQUENCE_KEY)
+        for key in keys:
+            pipe.xlen(key)
+            pipe.xrange(key, "-", "+", count=1)
+            pipe.xrange(key, f"{since + 1}-0", "+")
+        results = await pipe.execute()
+
+    sequence = int(results[0] or 0)
+    if since > sequence:
+        return None, sequence
+
+    notifications = []
+    for index in range(len(keys)):
+        length, first, entries = results[1 + index * 3 : 4 + index * 3]
+        trimmed = length >= settings.NOTIFICATIONS_REPLAY_MAXLEN
+        if trimmed and first and _sequence(first[0][0]) > since + 1:
+            return None, sequence
+        notifications.extend(
+            {**json.loads(fields[b"data"]), "seq": _sequence(entry_id)}
+            for entry_id, fields in entries
+        )
+    notifications.sort(key=lambda notification: notification["seq"])
+    return notifications, sequence
+
+
+def _sequence(entry_id):
+    return int(entry_id.split(b"-")[0])
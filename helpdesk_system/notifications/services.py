@@ -1,19 +1,17 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from .publisher import notification_publisher
 
 
 class NotificationService:
-    """Service for sending real-time notifications via WebSocket."""
+    """
+    Service for sending real-time notifications via WebSocket.
 
-    @staticmethod
-    def _get_channel_layer():
-        return get_channel_layer()
+    Messages are handed to the buffered notification_publisher, so callers
+    never block on the channel layer.
+    """
 
     @classmethod
     def notify_ticket_created(cls, ticket):
         """Notify all agents when a new ticket is created."""
-        channel_layer = cls._get_channel_layer()
-
         data = {
             "type": "ticket_created",
             "ticket": {
@@ -26,7 +24,7 @@ class NotificationService:
             "message": f"New ticket #{ticket.id}: {ticket.title}",
         }
 
-        async_to_sync(channel_layer.group_send)(
+        notification_publisher.publish(
             "agents",
             {"type": "ticket_notification", "data": data},
         )
@@ -34,8 +32,6 @@ class NotificationService:
     @classmethod
     def notify_status_changed(cls, ticket, old_status):
         """Notify ticket creator when status changes."""
-        channel_layer = cls._get_channel_layer()
-
         status_display = ticket.get_status_display()
         data = {
             "type": "status_changed",
@@ -49,7 +45,7 @@ class NotificationService:
         }
 
         # Notify ticket creator
-        async_to_sync(channel_layer.group_send)(
+        notification_publisher.publish(
             f"user_{ticket.created_by.id}",
             {"type": "ticket_notification", "data": data},
         )
@@ -57,7 +53,6 @@ class NotificationService:
     @classmethod
     def notify_comment_added(cls, comment):
         """Notify relevant users when a comment is added."""
-        channel_layer = cls._get_channel_layer()
         ticket = comment.ticket
 
         data = {
@@ -76,14 +71,14 @@ class NotificationService:
 
         # Notify ticket creator if comment is from someone else
         if comment.author != ticket.created_by:
-            async_to_sync(channel_layer.group_send)(
+            notification_publisher.publish(
                 f"user_{ticket.created_by.id}",
                 {"type": "comment_notification", "data": data},
             )
 
         # Notify assigned agent if exists and is not the comment author
         if ticket.assigned_to and ticket.assigned_to != comment.author:
-            async_to_sync(channel_layer.group_send)(
+            notification_publisher.publish(
                 f"user_{ticket.assigned_to.id}",
                 {"type": "comment_notification", "data": data},
             )
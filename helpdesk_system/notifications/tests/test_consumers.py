@@ -0,0 +1,292 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.test import AsyncClient
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+
+from helpdesk_system.notifications import metrics
+from helpdesk_system.notifications.consumers import SLOW_CLIENT_CLOSE_CODE
+from helpdesk_system.notifications.consumers import NotificationConsumer
+from helpdesk_system.users.models import User
+from helpdesk_system.users.tests.factories import UserFactory
+
+METRICS_TOKEN = "scrape-me"  # noqa: S105
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture(autouse=True)
+def _in_memory_layer(settings):
+    settings.CHANNEL_LAYERS = {
+        "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+    }
+
+
+def connect(user, path="/ws/notifications/"):
+    communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), path)
+    communicator.scope["user"] = user
+    return communicator
+
+
+class TestNotificationConsumerMetrics:
+    def test_connections_and_groups(self):
+        before = {
+            "connections": sample("helpdesk_notification_connections"),
+            "agents": sample("helpdesk_notification_group_members", group="agents"),
+            "user": sample("helpdesk_notification_group_members", group="user"),
+        }
+
+        async def scenario():
+            agent = connect(User(id=1, role=User.Role.AGENT))
+            customer = connect(User(id=2, role=User.Role.CUSTOMER))
+            await agent.connect()
+            await customer.connect()
+            connected = {
+                "connections": sample("helpdesk_notification_connections"),
+                "agents": sample(
+                    "helpdesk_notification_group_members",
+                    group="agents",
+                ),
+                "user": sample("helpdesk_notification_group_members", group="user"),
+            }
+            await agent.disconnect()
+            await customer.disconnect()
+            return connected
+
+        connected = async_to_sync(scenario)()
+
+        assert connected == {
+            "connections": before["connections"] + 2,
+            "agents": before["agents"] + 1,
+            "user": before["user"] + 2,
+        }
+        assert sample("helpdesk_notification_connections") == before["connections"]
+
+    def test_anonymous_is_not_counted(self):
+        before = sample("helpdesk_notification_connections")
+
+        async def scenario():
+            anonymous = connect(AnonymousUser())
+            connected, _ = await anonymous.connect()
+            await anonymous.disconnect()
+            return connected
+
+        assert not async_to_sync(scenario)()
+        assert sample("helpdesk_notification_connections") == before
+
+    def test_sent_notifications(self):
+        before = sample(
+            "helpdesk_notification_messages_sent_total",
+            type="ticket_created",
+        )
+
+        async def scenario():
+            agent = connect(User(id=1, role=User.Role.AGENT))
+            await agent.connect()
+            await get_channel_layer().group_send(
+                "agents",
+                {"type": "ticket_notification", "data": {"type": "ticket_created"}},
+            )
+            message = await agent.receive_json_from()
+            await agent.disconnect()
+            return message
+
+        assert async_to_sync(scenario)() == {"type": "ticket_created"}
+        assert (
+            sample(
+                "helpdesk_notification_messages_sent_total",
+                type="ticket_created",
+            )
+            == before + 1
+        )
+        assert (
+            sample(
+                "helpdesk_notification_send_seconds_count",
+                type="ticket_created",
+            )
+            >= 1
+        )
+
+
+def comment_added(comment_id):
+    return {"type": "comment_added", "ticket": {"id": 1}, "comment": {"id": comment_id}}
+
+
+async def notify_agents(*notifications):
+    for notification in notifications:
+        await get_channel_layer().group_send(
+            "agents",
+            {"type": "comment_notification", "data": notification},
+        )
+    # Let the consumer take them off the channel layer
+    await asyncio.sleep(0.05)
+
+
+@pytest.fixture
+def gate():
+    """Hold every frame until the gate is set, like a client not reading."""
+    gate = asyncio.Event()
+    send_notifications = NotificationConsumer.send_notifications
+
+    async def slow_send(self, frame, notifications):
+        await gate.wait()
+        await send_notifications(self, frame, notifications)
+
+    with mock.patch.object(NotificationConsumer, "send_notifications", slow_send):
+        yield gate
+
+
+class TestNotificationConsumerDelivery:
+    def test_batch_frames(self, gate):
+        async def scenario():
+            agent = connect(User(id=1, role=User.Role.AGENT), "/ws/?batch=true")
+            await agent.connect()
+            # The first notification is taken while the rest queue behind it
+            await notify_agents(comment_added(1))
+            await notify_agents(comment_added(2), comment_added(3))
+            gate.set()
+            frames = [await agent.receive_json_from(), await agent.receive_json_from()]
+            await agent.disconnect()
+            return frames
+
+        assert async_to_sync(scenario)() == [
+            comment_added(1),
+            {"type": "batch", "notifications": [comment_added(2), comment_added(3)]},
+        ]
+
+    def test_single_frames_without_batch(self, gate):
+        async def scenario():
+            agent = connect(User(id=1, role=User.Role.AGENT))
+            await agent.connect()
+            await notify_agents(comment_added(1))
+            await notify_agents(comment_added(2), comment_added(3))
+            gate.set()
+            frames = [await agent.receive_json_from() for _ in range(3)]
+            await agent.disconnect()
+            return frames
+
+        assert async_to_sync(scenario)() == [comment_added(i) for i in (1, 2, 3)]
+
+    def test_drop_oldest(self, gate, settings):
+        settings.NOTIFICATIONS_CLIENT_QUEUE_SIZE = 2
+        before = sample(
+            "helpdesk_notification_messages_dropped_total",
+            policy="drop_oldest",
+        )
+
+        async def scenario():
+            agent = connect(User(id=1, role=User.Role.AGENT))
+            await agent.connect()
+            await notify_agents(comment_added(1))
+            await notify_agents(comment_added(2), comment_added(3), comment_added(4))
+            gate.set()
+            frames = [await agent.receive_json_from() for _ in range(3)]
+            await agent.disconnect()
+            return frames
+
+        assert async_to_sync(scenario)() == [comment_added(i) for i in (1, 3, 4)]
+        assert (
+            sample(
+                "helpdesk_notification_messages_dropped_total",
+                policy="drop_oldest",
+            )
+            == before + 1
+        )
+
+    def test_disconnect_slow_client(self, gate, settings):
+        settings.NOTIFICATIONS_CLIENT_QUEUE_SIZE = 1
+        settings.NOTIFICATIONS_SLOW_CLIENT_POLICY = "disconnect"
+
+        async def scenario():
+            agent = connect(User(id=1, role=User.Role.AGENT))
+            await agent.connect()
+            await notify_agents(comment_added(1))
+            await notify_agents(comment_added(2), comment_added(3))
+            output = await agent.receive_output()
+            await agent.disconnect()
+            return output
+
+        assert async_to_sync(scenario)() == {
+            "type": "websocket.close",
+            "code": SLOW_CLIENT_CLOSE_CODE,
+        }
+
+
+@pytest.mark.django_db
+class TestPrometheusMetricsView:
+    url = "api:notification-prometheus-metrics"
+
+    def get(self, user=None, **headers):
+        """Request the metrics like an ASGI process serving HTTP would."""
+        client = AsyncClient()
+
+        async def scenario():
+            if user is not None:
+                await client.aforce_login(user)
+            return await client.get(reverse(self.url), headers=headers)
+
+        return async_to_sync(scenario)()
+
+    def test_staff(self):
+        response = self.get(UserFactory(is_staff=True))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert b"helpdesk_notification_connections" in response.content
+
+    def test_bearer_token(self, settings):
+        settings.NOTIFICATIONS_METRICS_TOKEN = METRICS_TOKEN
+
+        response = self.get(Authorization=f"Bearer {METRICS_TOKEN}")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_forbidden(self, agent, settings):
+        settings.NOTIFICATIONS_METRICS_TOKEN = METRICS_TOKEN
+
+        response = self.get(agent, Authorization="Bearer wrong")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_not_found_under_wsgi(self, api_client):
+        api_client.force_login(UserFactory(is_staff=True))
+
+        response = api_client.get(reverse(self.url))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestStartMetricsServer:
+    def test_disabled_without_port(self, settings):
+        settings.NOTIFICATIONS_METRICS_PORT = 0
+
+        with mock.patch.object(metrics, "start_http_server") as start_http_server:
+            assert not metrics.start_metrics_server()
+
+        start_http_server.assert_not_called()
+
+    def test_serves_on_port(self, settings):
+        settings.NOTIFICATIONS_METRICS_PORT = 9101
+
+        with mock.patch.object(metrics, "start_http_server") as start_http_server:
+            assert metrics.start_metrics_server()
+
+        start_http_server.assert_called_once_with(9101)
+
+    def test_port_in_use(self, settings):
+        settings.NOTIFICATIONS_METRICS_PORT = 9101
+
+        with mock.patch.object(
+            metrics,
+            "start_http_server",
+            side_effect=OSError("Address already in use"),
+        ):
+            assert not metrics.start_metrics_server()
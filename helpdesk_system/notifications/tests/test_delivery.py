@@ -0,0 +1,54 @@
+from asgiref.sync import async_to_sync
+
+from helpdesk_system.notifications.delivery import NotificationOutbox
+
+
+def status_changed(ticket_id, old_status, new_status):
+    return {
+        "type": "status_changed",
+        "ticket": {"id": ticket_id, "old_status": old_status, "new_status": new_status},
+    }
+
+
+def comment_added(comment_id):
+    return {"type": "comment_added", "ticket": {"id": 1}, "comment": {"id": comment_id}}
+
+
+class TestNotificationOutbox:
+    def test_same_ticket_is_coalesced_in_place(self):
+        outbox = NotificationOutbox(maxsize=10)
+        outbox.put(status_changed(1, "open", "in_progress"))
+        outbox.put(comment_added(1))
+        outbox.put(status_changed(1, "in_progress", "resolved"))
+
+        assert len(outbox) == 2  # noqa: PLR2004
+        assert async_to_sync(outbox.get)(10) == [
+            status_changed(1, "open", "resolved"),
+            comment_added(1),
+        ]
+
+    def test_other_tickets_and_comments_are_not_coalesced(self):
+        outbox = NotificationOutbox(maxsize=10)
+        outbox.put(status_changed(1, "open", "closed"))
+        outbox.put(status_changed(2, "open", "closed"))
+        outbox.put(comment_added(1))
+        outbox.put(comment_added(2))
+
+        assert len(outbox) == 4  # noqa: PLR2004
+
+    def test_full_outbox_refuses_but_coalesces(self):
+        outbox = NotificationOutbox(maxsize=1)
+        assert outbox.put(status_changed(1, "open", "in_progress"))
+
+        assert not outbox.put(comment_added(1))
+        assert outbox.put(status_changed(1, "in_progress", "closed"))
+        assert len(outbox) == 1
+
+    def test_get_respects_limit(self):
+        outbox = NotificationOutbox(maxsize=10)
+        for comment_id in range(3):
+            outbox.put(comment_added(comment_id))
+
+        assert async_to_sync(outbox.get)(2) == [comment_added(0), comment_added(1)]
+        assert async_to_sync(outbox.get)(2) == [comment_added(2)]
+        assert len(outbox) == 0
@@ -0,0 +1,60 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+
+from helpdesk_system.notifications.middleware import get_user
+from helpdesk_system.users.cache import get_auth_user_cache_key
+from helpdesk_system.users.models import User
+
+
+# database_sync_to_async closes the connection of the test transaction
+@pytest.mark.django_db(transaction=True)
+class TestGetUser:
+    def test_user_is_cached(self, agent, django_assert_num_queries):
+        token = str(AccessToken.for_user(agent))
+        assert async_to_sync(get_user)(token) == agent
+
+        with django_assert_num_queries(0):
+            user = async_to_sync(get_user)(token)
+
+        assert user == agent
+        assert user.is_agent
+
+    def test_password_is_not_cached(self, agent):
+        token = str(AccessToken.for_user(agent))
+        async_to_sync(get_user)(token)
+
+        assert cache.get(get_auth_user_cache_key(agent.id)) == {
+            "id": agent.id,
+            "role": User.Role.AGENT,
+            "is_active": True,
+            "username": agent.username,
+        }
+        user = async_to_sync(get_user)(token)
+        assert user.is_authenticated
+        assert user.username == agent.username
+        assert not user.password
+
+    def test_role_change_invalidates(self, agent):
+        token = str(AccessToken.for_user(agent))
+        async_to_sync(get_user)(token)
+
+        agent.role = User.Role.CUSTOMER
+        agent.save()
+
+        assert async_to_sync(get_user)(token).is_customer
+
+    def test_deleted_user_is_anonymous(self, agent):
+        token = str(AccessToken.for_user(agent))
+        async_to_sync(get_user)(token)
+
+        agent.delete()
+
+        assert not async_to_sync(get_user)(token).is_authenticated
+
+    def test_invalid_token_is_anonymous(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            user = async_to_sync(get_user)("not-a-token")
+
+        assert not user.is_authenticated
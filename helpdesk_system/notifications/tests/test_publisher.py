@@ -0,0 +1,152 @@
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from helpdesk_system.notifications import publisher as publisher_module
+from helpdesk_system.notifications import services
+from helpdesk_system.notifications.publisher import NotificationPublisher
+from helpdesk_system.notifications.publisher import get_publisher_metrics
+from helpdesk_system.notifications.services import NotificationService
+from helpdesk_system.users.tests.factories import CommentFactory
+from helpdesk_system.users.tests.factories import TicketFactory
+from helpdesk_system.users.tests.factories import UserFactory
+
+
+class RecordingChannelLayer:
+    """Channel layer recording group sends and how many ran concurrently."""
+
+    def __init__(self, delay=0.0, failing_groups=()):
+        self.delay = delay
+        self.failing_groups = failing_groups
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def group_send(self, group, message):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if group in self.failing_groups:
+                msg = "Redis is down"
+                raise ConnectionError(msg)
+            self.sent.append((group, message))
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def channel_layer():
+    layer = RecordingChannelLayer()
+    with mock.patch.object(publisher_module, "get_channel_layer", return_value=layer):
+        yield layer
+
+
+@pytest.fixture
+def publisher(settings, channel_layer):
+    # Flushes are triggered by the tests unless they shorten the interval
+    settings.NOTIFICATIONS_FLUSH_INTERVAL = 60
+    publisher = NotificationPublisher()
+    yield publisher
+    publisher.close()
+
+
+class TestNotificationPublisher:
+    def test_publish_does_not_send(self, publisher, channel_layer):
+        publisher.publish("agents", {"type": "ticket_notification"})
+
+        assert channel_layer.sent == []
+        assert publisher.metrics()["queue_depth"] == 1
+
+    def test_flush_sends_batch_concurrently(self, publisher, channel_layer):
+        channel_layer.delay = 0.01
+        for user_id in range(10):
+            publisher.publish(f"user_{user_id}", {"type": "comment_notification"})
+
+        assert publisher.flush() == 10  # noqa: PLR2004
+
+        assert [group for group, _ in channel_layer.sent] == [
+            f"user_{user_id}" for user_id in range(10)
+        ]
+        assert channel_layer.max_in_flight == 10  # noqa: PLR2004
+        metrics = publisher.metrics()
+        assert metrics["queue_depth"] == 0
+        assert metrics["sent"] == 10  # noqa: PLR2004
+        assert metrics["flushes"] == 1
+        assert metrics["last_flush_ms"] > 0
+
+    def test_full_queue_drops_oldest(self, publisher, channel_layer, settings):
+        settings.NOTIFICATIONS_QUEUE_SIZE = 2
+        for user_id in range(3):
+            publisher.publish(f"user_{user_id}", {})
+
+        publisher.flush()
+
+        assert [group for group, _ in channel_layer.sent] == ["user_1", "user_2"]
+        assert publisher.metrics()["dropped"] == 1
+
+    def test_failed_send_does_not_drop_batch(self, publisher, channel_layer):
+        channel_layer.failing_groups = ("user_1",)
+        for user_id in range(3):
+            publisher.publish(f"user_{user_id}", {})
+
+        assert publisher.flush() == 2  # noqa: PLR2004
+
+        assert [group for group, _ in channel_layer.sent] == ["user_0", "user_2"]
+        assert publisher.metrics()["failed"] == 1
+
+    def test_background_thread_flushes(self, publisher, channel_layer, settings):
+        settings.NOTIFICATIONS_FLUSH_BATCH_SIZE = 1
+        publisher.publish("agents", {})
+
+        deadline = time.monotonic() + 5
+        while not channel_layer.sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert channel_layer.sent == [("agents", {})]
+
+    def test_close_flushes_pending(self, publisher, channel_layer):
+        publisher.publish("agents", {})
+
+        publisher.close()
+
+        assert channel_layer.sent == [("agents", {})]
+
+
+@pytest.mark.django_db
+class TestNotificationServicePublishing:
+    def test_comment_notifies_creator_and_assignee(self, publisher, customer, agent):
+        ticket = TicketFactory(created_by=customer, assigned_to=agent)
+        comment = CommentFactory(ticket=ticket, author=UserFactory())
+
+        with mock.patch.object(services, "notification_publisher", publisher):
+            NotificationService.notify_comment_added(comment)
+
+        assert publisher.metrics()["queue_depth"] == 2  # noqa: PLR2004
+        publisher.flush()
+        assert publisher.metrics()["sent"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+class TestNotificationMetricsView:
+    def test_admin_reads_reported_metrics(self, publisher, api_client):
+        publisher.publish("agents", {})
+        publisher.flush()
+        publisher.report()
+        api_client.force_authenticate(user=UserFactory(is_staff=True))
+
+        response = api_client.get(reverse("api:notification-metrics"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == get_publisher_metrics()
+        assert response.data["totals"]["sent"] == 1
+        assert response.data["processes"][publisher.process]["flushes"] == 1
+
+    def test_agent_forbidden(self, agent_api_client):
+        response = agent_api_client.get(reverse("api:notification-metrics"))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
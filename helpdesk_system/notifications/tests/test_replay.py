@@ -0,0 +1,169 @@
+import uuid
+from unittest import mock
+
+import pytest
+import redis
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+
+from helpdesk_system.notifications import publisher as publisher_module
+from helpdesk_system.notifications import replay
+from helpdesk_system.notifications.consumers import NotificationConsumer
+from helpdesk_system.notifications.publisher import NotificationPublisher
+from helpdesk_system.notifications.replay import append_notifications
+from helpdesk_system.notifications.replay import read_notifications
+from helpdesk_system.notifications.tests.test_publisher import RecordingChannelLayer
+from helpdesk_system.users.models import User
+
+
+def message(ticket_id):
+    return {
+        "type": "ticket_notification",
+        "data": {"type": "ticket_created", "ticket": {"id": ticket_id}},
+    }
+
+
+@pytest.fixture
+def replay_redis(settings, monkeypatch):
+    """The Redis of REDIS_URL, with replay keys private to the test."""
+    settings.NOTIFICATIONS_REPLAY_ENABLED = True
+    settings.NOTIFICATIONS_REPLAY_REDIS_URL = settings.REDIS_URL
+    client = replay.get_redis()
+    try:
+        client.ping()
+    except redis.RedisError:
+        pytest.skip("Redis is not reachable at REDIS_URL")
+
+    prefix = f"test:notifications:{uuid.uuid4().hex}"
+    monkeypatch.setattr(replay, "SEQUENCE_KEY", f"{prefix}:seq")
+    monkeypatch.setattr(replay, "STREAM_KEY", prefix + ":stream:{group}")
+    yield client
+    keys = list(client.scan_iter(f"{prefix}:*"))
+    if keys:
+        client.delete(*keys)
+
+
+@pytest.fixture
+def in_memory_layer(settings):
+    settings.CHANNEL_LAYERS = {
+        "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+    }
+
+
+def connect(user, since):
+    communicator = WebsocketCommunicator(
+        NotificationConsumer.as_asgi(),
+        f"/ws/notifications/?since={since}",
+    )
+    communicator.scope["user"] = user
+    return communicator
+
+
+class TestReplayLog:
+    def test_publisher_numbers_notifications(self, replay_redis, settings):
+        settings.NOTIFICATIONS_FLUSH_INTERVAL = 60
+        layer = RecordingChannelLayer()
+        publisher = NotificationPublisher()
+        with mock.patch.object(
+            publisher_module,
+            "get_channel_layer",
+            return_value=layer,
+        ):
+            publisher.publish("agents", message(1))
+            publisher.publish("user_1", message(2))
+            publisher.flush()
+            publisher.close()
+
+        assert [(group, data["data"]["seq"]) for group, data in layer.sent] == [
+            ("agents", 1),
+            ("user_1", 2),
+        ]
+
+    def test_publisher_sends_without_log(self, settings):
+        settings.NOTIFICATIONS_FLUSH_INTERVAL = 60
+        settings.NOTIFICATIONS_REPLAY_ENABLED = True
+        settings.NOTIFICATIONS_REPLAY_REDIS_URL = "redis://127.0.0.1:1/0"
+        layer = RecordingChannelLayer()
+        publisher = NotificationPublisher()
+        with mock.patch.object(
+            publisher_module,
+            "get_channel_layer",
+            return_value=layer,
+        ):
+            publisher.publish("agents", message(1))
+            publisher.flush()
+            publisher.close()
+
+        assert layer.sent == [("agents", message(1))]
+
+    def test_read_merges_groups_after_since(self, replay_redis):
+        append_notifications(
+            [("agents", message(1)), ("user_2", message(2)), ("user_1", message(3))],
+        )
+
+        notifications, sequence = async_to_sync(read_notifications)(
+            ["user_1", "agents"],
+            0,
+        )
+
+        assert sequence == 3  # noqa: PLR2004
+        assert notifications == [
+            {**message(1)["data"], "seq": 1},
+            {**message(3)["data"], "seq": 3},
+        ]
+        notifications, _ = async_to_sync(read_notifications)(["user_1", "agents"], 1)
+        assert [notification["seq"] for notification in notifications] == [3]
+
+    def test_trimmed_log_needs_resync(self, replay_redis, settings):
+        settings.NOTIFICATIONS_REPLAY_MAXLEN = 2
+        append_notifications([("agents", message(i)) for i in range(3)])
+
+        assert async_to_sync(read_notifications)(["agents"], 0) == (None, 3)
+        notifications, _ = async_to_sync(read_notifications)(["agents"], 1)
+        assert [notification["seq"] for notification in notifications] == [2, 3]
+
+    def test_reset_sequence_needs_resync(self, replay_redis):
+        append_notifications([("agents", message(1))])
+
+        assert async_to_sync(read_notifications)(["agents"], 5) == (None, 1)
+
+
+@pytest.mark.usefixtures("in_memory_layer")
+class TestConsumerReplay:
+    def test_missed_notifications_are_replayed_once(self, replay_redis):
+        append_notifications([("agents", message(1)), ("user_1", message(2))])
+
+        async def scenario():
+            agent = connect(User(id=1, role=User.Role.AGENT), since=0)
+            await agent.connect()
+            frames = [await agent.receive_json_from() for _ in range(2)]
+            layer = get_channel_layer()
+            # Already replayed, then a new one
+            await layer.group_send(
+                "agents",
+                {**message(1), "data": {**message(1)["data"], "seq": 1}},
+            )
+            await layer.group_send(
+                "agents",
+                {**message(3), "data": {**message(3)["data"], "seq": 3}},
+            )
+            frames.append(await agent.receive_json_from())
+            assert await agent.receive_nothing()
+            await agent.disconnect()
+            return frames
+
+        assert [frame["seq"] for frame in async_to_sync(scenario)()] == [1, 2, 3]
+
+    def test_lost_notifications_ask_for_resync(self, replay_redis, settings):
+        settings.NOTIFICATIONS_REPLAY_MAXLEN = 1
+        append_notifications([("user_1", message(1)), ("user_1", message(2))])
+
+        async def scenario():
+            customer = connect(User(id=1, role=User.Role.CUSTOMER), since=0)
+            await customer.connect()
+            frame = await customer.receive_json_from()
+            await customer.disconnect()
+            return frame
+
+        assert async_to_sync(scenario)() == {"type": "resync", "seq": 2}
@@ -1 +1,44 @@
-# Create your views here.
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse
+from django.http import HttpResponseForbidden
+from django.http import HttpResponseNotFound
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .publisher import get_publisher_metrics
+
+
+class NotificationMetricsView(APIView):
+    """Queue depth, counters and flush latency of the notification publishers."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_publisher_metrics())
+
+
+def prometheus_metrics(request):
+    """
+    Prometheus metrics of this process, e.g. its NotificationConsumer sockets.
+
+    Scrapers authenticate with ``Authorization: Bearer <token>`` when
+    NOTIFICATIONS_METRICS_TOKEN is set, staff users with their session.
+
+    Only served by ASGI processes: a WSGI worker has no sockets to report
+    and answers 404, the ASGI processes are then scraped on
+    NOTIFICATIONS_METRICS_PORT instead.
+    """
+    token = settings.NOTIFICATIONS_METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not request.user.is_staff and not (
+        token and constant_time_compare(authorization, f"Bearer {token}")
+    ):
+        return HttpResponseForbidden()
+    if not isinstance(request, ASGIRequest):
+        return HttpResponseNotFound()
+    return HttpResponse(generate_latest(), content_type=CONTENT_TYPE_LATEST)
@@ -1,37 +1,277 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
 from django.core.cache import cache
+from django.db import transaction
 
 # Cache keys
-TICKET_LIST_KEY = "tickets:list:user:{user_id}"
-TICKET_DETAIL_KEY = "tickets:detail:{ticket_id}"
+TICKET_LIST_KEY = "tickets:list:{scope}:g{generation}:w{window}:{query_hash}"
+TICKET_DETAIL_KEY = "tickets:detail:g{generation}:w{window}:{ticket_id}"
+TICKET_GENERATION_KEY = "tickets:generation:{scope}"
+TICKET_MODIFIED_KEY = "tickets:modified:{scope}"
 
 # Cache timeout (5 minutes)
 CACHE_TTL = 60 * 5
+# Timeout of the generation and modification time keys (1 hour). Past it
+# they start over from the clock, which only costs a cache miss.
+GENERATION_TTL = 60 * 60
+
+# Generation scopes:
+# - global: every ticket key, bumped by invalidate_all_ticket_list_cache
+# - agents: the unrestricted list agents see
+# - customer:{id}: the list of a single customer
+# - agent:{id}: an agent queue, i.e. lists filtered by assigned_to={id}
+# - ticket:{id}: the detail of a single ticket
+GLOBAL_SCOPE = "global"
+AGENTS_SCOPE = "agents"
+CUSTOMER_SCOPE = "customer:{user_id}"
+AGENT_SCOPE = "agent:{user_id}"
+TICKET_SCOPE = "ticket:{ticket_id}"
+
+
+def get_ticket_list_scope(user, query_params=None):
+    """Return the generation scope of a ticket list request."""
+    if user.is_customer:
+        return CUSTOMER_SCOPE.format(user_id=user.id)
+
+    assignees = query_params.getlist("assigned_to") if query_params else []
+    if len(assignees) == 1 and assignees[0].isdigit():
+        # As an int, so "05" shares the scope bumped for user 5
+        return AGENT_SCOPE.format(user_id=int(assignees[0]))
+    return AGENTS_SCOPE
+
+
+def canonicalize_query_params(query_params, allowed_params, multi_valued_params=()):
+    """
+    Build a canonical query string out of the parameters that shape the list.
+
+    Unknown parameters (cache busters, tracking params) are dropped, empty
+    values are ignored and keys are sorted, so equivalent requests share a
+    cache entry regardless of parameter order. A repeated parameter keeps
+    only its last value, the one filters, ordering and pagination read,
+    unless it is in multi_valued_params, whose values are all sorted in.
+    """
+    items = []
+    for key in sorted(set(query_params.keys()) & set(allowed_params)):
+        if key in multi_valued_params:
+            values = query_params.getlist(key)
+        else:
+            values = [query_params.get(key)]
+        values = sorted({" ".join(value.split()) for value in values} - {""})
+        items.extend((key, value) for value in values)
+    return urlencode(items)
+
+
+def _new_generation():
+    # Seeded from the clock so a counter evicted from the cache never
+    # comes back with a value that old entries were stored under.
+    return int(time.time() * 1000)
+
+
+def get_cache_window():
+    """
+    Return when the current CACHE_TTL window started, as a Unix timestamp.
+
+    Part of the response cache keys, and so of their ETags, and the earliest
+    Last-Modified: changes that no generation covers, such as a renamed user
+    nested in tickets, are served stale for at most CACHE_TTL.
+    """
+    now = int(time.time())
+    return now - now % CACHE_TTL
+
+
+def get_generations(*scopes, create=True):
+    """
+    Return the current generation of each scope, in one cache round trip.
+
+    Scopes without one start a new generation, or get None without create.
+    They also get None when the cache is unavailable.
+    """
+    keys = {scope: TICKET_GENERATION_KEY.format(scope=scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+
+    generations = []
+    for scope in scopes:
+        generation = found.get(keys[scope])
+        if generation is None and create:
+            cache.add(keys[scope], _new_generation(), GENERATION_TTL)
+            generation = cache.get(keys[scope])
+        generations.append(generation)
+    return generations
+
+
+def bump_generations(*scopes):
+    """Move scopes to a new generation, orphaning every key built on them."""
+    for scope in set(scopes):
+        generation_key = TICKET_GENERATION_KEY.format(scope=scope)
+        try:
+            cache.incr(generation_key)
+        except ValueError:
+            cache.set(generation_key, _new_generation(), GENERATION_TTL)
+    now = time.time()
+    cache.set_many(
+        {TICKET_MODIFIED_KEY.format(scope=scope): now for scope in scopes},
+        GENERATION_TTL,
+    )
+
+
+def get_last_modified(*scopes, create=True):
+    """
+    Return when any of the scopes last moved to a new generation.
+
+    As a Unix timestamp, for Last-Modified. A scope whose time was evicted
+    starts over from now, which can only make clients download again, or
+    makes it None without create or when the cache is unavailable. It is
+    never earlier than the start of the CACHE_TTL window.
+    """
+    keys = [TICKET_MODIFIED_KEY.format(scope=scope) for scope in scopes]
+    found = cache.get_many(keys)
+
+    last_modified = get_cache_window()
+    for key in keys:
+        modified = found.get(key)
+        if modified is None:
+            if not create:
+                return None
+            cache.add(key, time.time(), GENERATION_TTL)
+            modified = cache.get(key)
+            if modified is None:
+                return None
+        last_modified = max(last_modified, modified)
+    return last_modified
+
+
+def get_etag(cache_key):
+    """
+    Return a weak ETag for the response cached under a generation key.
+
+    The key changes with the generations it is built on, so it validates the
+    response without having to serialize it.
+    """
+    return f'W/"{hashlib.sha256(cache_key.encode()).hexdigest()[:32]}"'
+
+
+def get_ticket_list_cache_key(
+    user,
+    query_params=None,
+    allowed_params=(),
+    multi_valued_params=(),
+):
+    """
+    Generate cache key for a ticket list query.
+
+    Returns None when the cache is unavailable, as the key would then be the
+    same for every generation.
+    """
+    scope = get_ticket_list_scope(user, query_params)
+    query = (
+        canonicalize_query_params(query_params, allowed_params, multi_valued_params)
+        if query_params
+        else ""
+    )
+    query_hash = hashlib.sha256(query.encode()).hexdigest()[:32]
+    global_generation, scope_generation = get_generations(GLOBAL_SCOPE, scope)
+    if global_generation is None or scope_generation is None:
+        return None
+    return TICKET_LIST_KEY.format(
+        scope=scope,
+        generation=f"{global_generation}.{scope_generation}",
+        window=get_cache_window(),
+        query_hash=query_hash,
+    )
+
+
+def get_ticket_detail_cache_key(ticket_id, *, create=True):
+    """
+    Generate cache key for ticket detail.
+
+    Without create, returns None rather than start the generation of a ticket
+    not known to exist. Also None when the cache is unavailable.
+    """
+    global_generation, ticket_generation = get_generations(
+        GLOBAL_SCOPE,
+        TICKET_SCOPE.format(ticket_id=ticket_id),
+        create=create,
+    )
+    if global_generation is None and ticket_generation is not None:
+        # Shared by every ticket, so started whether this one exists or not
+        (global_generation,) = get_generations(GLOBAL_SCOPE)
+    if global_generation is None or ticket_generation is None:
+        return None
+    return TICKET_DETAIL_KEY.format(
+        generation=f"{global_generation}.{ticket_generation}",
+        window=get_cache_window(),
+        ticket_id=ticket_id,
+    )
+
+
+def start_ticket_generation(ticket_id):
+    """
+    Start the detail generation of a ticket that was read without one.
+
+    Returns its detail cache key, or None if a change started it first: that
+    change may have landed after the read, which must then not be cached.
+    """
+    scope = TICKET_SCOPE.format(ticket_id=ticket_id)
+    generation_key = TICKET_GENERATION_KEY.format(scope=scope)
+    if not cache.add(generation_key, _new_generation(), GENERATION_TTL):
+        return None
+    cache.add(TICKET_MODIFIED_KEY.format(scope=scope), time.time(), GENERATION_TTL)
+    return get_ticket_detail_cache_key(ticket_id)
+
+
+def get_ticket_scopes(ticket, *, previous_assignee_id=None):
+    """Return the generation scopes whose lists can contain a ticket."""
+    assignee_ids = {ticket.assigned_to_id, previous_assignee_id} - {None}
+    return [
+        CUSTOMER_SCOPE.format(user_id=ticket.created_by_id),
+        AGENTS_SCOPE,
+        *(AGENT_SCOPE.format(user_id=user_id) for user_id in assignee_ids),
+    ]
 
 
-def get_ticket_list_cache_key(user):
-    """Generate cache key for ticket list."""
-    return TICKET_LIST_KEY.format(user_id=user.id if user.is_customer else "all")
+def _invalidate(ticket_id, scopes):
+    bump_generations(*scopes, TICKET_SCOPE.format(ticket_id=ticket_id))
 
 
-def get_ticket_detail_cache_key(ticket_id):
-    """Generate cache key for ticket detail."""
-    return TICKET_DETAIL_KEY.format(ticket_id=ticket_id)
+def invalidate_ticket_cache(ticket, *, previous_assignee_id=None):
+    """
+    Invalidate all cache related to a ticket.
 
+    List caches are invalidated by bumping the generation of every scope that
+    can see the ticket (its creator, the agents and the assignee queues), which
+    covers every filter/search/page variant at once, and the detail by bumping
+    the scope of the ticket itself. It happens now, so the
+    writer's own follow-up reads are fresh, and again on commit, so nothing
+    cached from not-yet-committed data outlives the transaction.
+    """
+    scopes = get_ticket_scopes(ticket, previous_assignee_id=previous_assignee_id)
+    _invalidate(ticket.id, scopes)
+    transaction.on_commit(lambda: _invalidate(ticket.id, scopes))
 
-def invalidate_ticket_cache(ticket):
-    """Invalidate all cache related to a ticket."""
-    # Invalidate detail cache
-    cache.delete(get_ticket_detail_cache_key(ticket.id))
 
-    # Invalidate list caches (user-specific and all)
-    cache.delete(TICKET_LIST_KEY.format(user_id=ticket.created_by.id))
-    cache.delete(TICKET_LIST_KEY.format(user_id="all"))
+def invalidate_tickets_cache(tickets, previous_assignee_ids):
+    """
+    Invalidate the caches of many tickets at once, e.g. after a bulk update.
 
-    # If assigned, invalidate assigned user's cache too
-    if ticket.assigned_to:
-        cache.delete(TICKET_LIST_KEY.format(user_id=ticket.assigned_to.id))
+    Same as invalidate_ticket_cache for each ticket, but the scopes they share
+    (the agents list, a customer or an agent queue) are bumped only once.
+    previous_assignee_ids maps ticket IDs to their assignee before the update.
+    """
+    scopes = set()
+    for ticket in tickets:
+        previous_assignee_id = previous_assignee_ids.get(ticket.id)
+        scopes.update(
+            get_ticket_scopes(ticket, previous_assignee_id=previous_assignee_id),
+        )
+        scopes.add(TICKET_SCOPE.format(ticket_id=ticket.id))
+    if not scopes:
+        return
+    bump_generations(*scopes)
+    transaction.on_commit(lambda: bump_generations(*scopes))
 
 
 def invalidate_all_ticket_list_cache():
-    """Invalidate all ticket list caches using pattern."""
-    cache.delete_pattern("tickets:list:*")
+    """Invalidate every ticket list and detail cache with one increment."""
+    bump_generations(GLOBAL_SCOPE)
@@ -0,0 +1,100 @@
+import datetime
+import re
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.exceptions import ValidationError
+
+# A watermark is the (timestamp, ticket id) position of the last change a
+# client has seen, written as "<microseconds since the epoch>.<ticket id>".
+WATERMARK_RE = re.compile(r"^(\d{1,20})\.(\d{1,20})$")
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class WatermarkExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Changes since this watermark are no longer available."
+    default_code = "watermark_expired"
+
+
+def format_watermark(position):
+    timestamp, ticket_id = position
+    return f"{(timestamp - EPOCH) // MICROSECOND}.{ticket_id}"
+
+
+def parse_watermark(value, param="since"):
+    match = WATERMARK_RE.match(value)
+    if match is None:
+        raise ValidationError({param: ["Invalid watermark."]})
+    timestamp = EPOCH + int(match[1]) * MICROSECOND
+    return timestamp, int(match[2])
+
+
+def _after(position, time_field, id_field):
+    """``(time_field, id_field) > position`` as a keyset filter."""
+    timestamp, ticket_id = position
+    return Q(**{f"{time_field}__gte": timestamp}) & (
+        Q(**{f"{time_field}__gt": timestamp})
+        | Q(**{time_field: timestamp, f"{id_field}__gt": ticket_id})
+    )
+
+
+def get_changes(tickets, tombstones, since, limit):
+    """
+    Return the tickets saved and deleted after the since watermark.
+
+    Changes are read in ``(timestamp, ticket id)`` order off the updated_at
+    and deleted_at indexes, so a poll costs what changed, not the size of
+    the table. Returns ``(tickets, deleted_ids, watermark, has_more)``: the
+    client stores the watermark and polls again from it, straight away while
+    has_more is set.
+
+    Without since, every ticket is returned, so a client can also run its
+    initial load through here. Changes younger than
+    TICKETS_CHANGES_SETTLE_TIME are held back to the next poll: updated_at is
+    set before the transaction commits, and a change committing late would
+    otherwise land behind a watermark already handed out. A since older than
+    TICKETS_TOMBSTONE_RETENTION raises WatermarkExpired, as deletions from
+    that far back may have been pruned.
+    """
+    now = timezone.now()
+    retention = datetime.timedelta(seconds=settings.TICKETS_TOMBSTONE_RETENTION)
+    if since is not None and since[0] < now - retention:
+        raise WatermarkExpired
+
+    until = now - datetime.timedelta(seconds=settings.TICKETS_CHANGES_SETTLE_TIME)
+    tickets = tickets.filter(updated_at__lt=until).order_by("updated_at", "id")
+    changes = []
+    if since is not None:
+        tickets = tickets.filter(_after(since, "updated_at", "id"))
+        tombstones = tombstones.filter(
+            _after(since, "deleted_at", "ticket_id"),
+            deleted_at__lt=until,
+        ).order_by("deleted_at", "ticket_id")
+        changes.extend(
+            ((deleted_at, ticket_id), None)
+            for ticket_id, deleted_at in tombstones.values_list(
+                "ticket_id",
+                "deleted_at",
+            )[: limit + 1]
+        )
+    changes.extend(
+        ((ticket.updated_at, ticket.id), ticket) for ticket in tickets[: limit + 1]
+    )
+    changes.sort(key=lambda change: change[0])
+
+    page = changes[:limit]
+    has_more = len(changes) > limit
+    # Past the last change returned, or up to until when there are no more
+    watermark = page[-1][0] if has_more else max(since or (EPOCH, 0), (until, 0))
+    return (
+        [ticket for _, ticket in page if ticket is not None],
+        [position[1] for position, ticket in page if ticket is None],
+        format_watermark(watermark),
+        has_more,
+    )
@@ -0,0 +1,85 @@
+from collections import deque
+
+from asgiref.local import Local
+from django.db import transaction
+
+# Event types, handled by tasks.dispatch_ticket_events
+TICKET_CREATED = "ticket_created"
+STATUS_CHANGED = "status_changed"
+COMMENT_ADDED = "comment_added"
+
+# Per database connection: the on_commit hooks of the queued events, in the
+# order they were registered, and the events of those that already ran
+_pending = Local()
+
+
+def publish_events(events):
+    """Hand a list of events to a worker with a single broker publish."""
+    from .tasks import dispatch_ticket_events  # noqa: PLC0415
+
+    dispatch_ticket_events.delay(events)
+
+
+class EventHook:
+    """
+    on_commit hook of one event, discarded by Django with its savepoint.
+
+    The hooks that run collect their events, the last one publishes them.
+    """
+
+    def __init__(self, event, using, savepoint_ids):
+        self.event = event
+        self.using = using
+        self.savepoint_ids = savepoint_ids
+
+    def __call__(self):
+        hooks, events = _get_pending(self.using)
+        # Hooks registered before this one either ran or were rolled back
+        while hooks.popleft() is not self:
+            pass
+        events.append(self.event)
+
+        # A later hook queued under none but this one's savepoints is sure
+        # to run as well, it publishes the events instead
+        if any(hook.savepoint_ids <= self.savepoint_ids for hook in hooks):
+            return
+        batch = events.copy()
+        events.clear()
+        publish_events(batch)
+
+
+def _get_pending(alias):
+    pending = getattr(_pending, alias, None)
+    if pending is None:
+        pending = (deque(), [])
+        setattr(_pending, alias, pending)
+    return pending
+
+
+def queue_event(event_type, **payload):
+    """
+    Publish a ticket event (emails, WebSocket notifications) after commit.
+
+    The events of a transaction are coalesced into a single
+    dispatch_ticket_events task, so the request pays for one broker round
+    trip after commit instead of one per side effect, and workers never see
+    rows that are not committed yet. Outside a transaction the event is
+    published right away.
+
+    Each event has an on_commit hook of its own, recording the savepoints
+    open when it was queued, so events queued in a savepoint that is rolled
+    back are dropped along with it. Events queued before a savepoint whose
+    own events survive are published in a batch of their own, as whether
+    the savepoint was rolled back is only known once its hooks run.
+    """
+    event = {"type": event_type, **payload}
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        publish_events([event])
+        return
+
+    hook = EventHook(event, connection.alias, frozenset(connection.savepoint_ids))
+    hooks, _ = _get_pending(connection.alias)
+    hooks.append(hook)
+    # robust: a broker outage must not turn a committed write into a 500
+    transaction.on_commit(hook, using=connection.alias, robust=True)
@@ -0,0 +1,234 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import F
+from django.db.models import FloatField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import TextField
+from django.db.models import Value
+from django.db.models.functions import Cast
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Concat
+from django.db.models.functions import Greatest
+from django.utils.html import escape
+from rest_framework import filters
+
+from .models import PRIORITY_RANK
+from .models import Comment
+from .models import Ticket
+
+SEARCH_CONFIG = "english"
+SEARCH_RANK = "search_rank"
+
+FULLTEXT_BACKEND = "fulltext"
+
+# ts_headline does not escape the document, so matches are delimited with
+# control characters and only turned into <mark> after HTML-escaping.
+HEADLINE_START = "\x02"
+HEADLINE_STOP = "\x03"
+HEADLINE_OPTIONS = {
+    "start_sel": HEADLINE_START,
+    "stop_sel": HEADLINE_STOP,
+    "max_words": 35,
+    "min_words": 15,
+    "max_fragments": 2,
+    "fragment_delimiter": " … ",
+}
+
+
+def get_search_query(text):
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+
+
+def exact_rank(rank):
+    """
+    Widen a real (float4) rank to double precision.
+
+    Python reads a real as the shortest decimal that rounds back to it, which
+    is not its exact value once compared as a double. A cursor holding the
+    rank of its last row would then skip or repeat rows of the same rank; a
+    double survives the round trip unchanged.
+    """
+    return Cast(rank, FloatField())
+
+
+class TicketSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` backed by the ticket ``search_vector`` column.
+
+    Terms use web search syntax (``"exact phrase"``, ``or``, ``-excluded``)
+    and matches are annotated with ``search_rank`` so they can be ordered by
+    relevance. With ``TICKETS_SEARCH_BACKEND = "icontains"`` this behaves as
+    the stock DRF ``SearchFilter`` over ``search_fields``.
+    """
+
+    def get_search_text(self, request):
+        text = request.query_params.get(self.search_param, "")
+        return " ".join(text.replace("\x00", "").split())
+
+    def filter_queryset(self, request, queryset, view):
+        if settings.TICKETS_SEARCH_BACKEND != FULLTEXT_BACKEND:
+            return super().filter_queryset(request, queryset, view)
+
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+
+        query = get_search_query(text)
+        matches = queryset.filter(search_vector=query).annotate(
+            **{SEARCH_RANK: exact_rank(SearchRank(F("search_vector"), query))},
+        )
+
+        if settings.TICKETS_SEARCH_TRIGRAM_FALLBACK and not matches.exists():
+            return queryset.filter(title__trigram_word_similar=text).annotate(
+                **{SEARCH_RANK: exact_rank(TrigramWordSimilarity(text, "title"))},
+            )
+        return matches
+
+
+class TicketOrderingFilter(filters.OrderingFilter):
+    """
+    Ticket ordering with relevance, severity and stable tie-breakers.
+
+    Search results are ordered by relevance unless ``?ordering=`` is given.
+    ``priority`` sorts by the ``priority_rank`` annotation (low < medium <
+    high < urgent) rather than alphabetically, and ``created_at``/``id`` are appended in
+    the direction of the leading field so pages never shuffle ties and
+    match the ticket indexes.
+    """
+
+    ordering_aliases = {"priority": "priority_rank"}
+    # Always annotated, as the cursor positions and value rows read them
+    ordering_annotations = {"priority_rank": PRIORITY_RANK}
+    tie_breakers = ("created_at", "id")
+
+    def filter_queryset(self, request, queryset, view):
+        queryset = queryset.annotate(**self.ordering_annotations)
+        return super().filter_queryset(request, queryset, view)
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params and SEARCH_RANK in queryset.query.annotations:
+            ordering = [f"-{SEARCH_RANK}", *self.get_default_ordering(view)]
+        else:
+            ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return self.add_tie_breakers([self.resolve_alias(o) for o in ordering])
+
+    def resolve_alias(self, order):
+        prefix = "-" if order.startswith("-") else ""
+        field_name = order.removeprefix("-")
+        return prefix + self.ordering_aliases.get(field_name, field_name)
+
+    def add_tie_breakers(self, ordering):
+        prefix = "-" if ordering[0].startswith("-") else ""
+        fields = {order.removeprefix("-") for order in ordering}
+        return [
+            *ordering,
+            *(prefix + field for field in self.tie_breakers if field not in fields),
+        ]
+
+
+class TicketCommentSearchFilter(TicketSearchFilter):
+    """
+    ``?search=`` over tickets and their comments, ranked by the best match.
+
+    Candidates come from the ticket and comment GIN indexes, so the query
+    never scans either table. Each ticket is ranked by the better of its own
+    rank and the rank of its best matching comment, which is annotated as
+    ``matched_comment_id`` for the snippet. Comments are weighted C, so they
+    rank below equal matches in the title (A) or description (B).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+
+        query = get_search_query(text)
+        comments = Comment.objects.filter(search_vector=query).order_by()
+        candidates = (
+            Ticket.objects.filter(search_vector=query)
+            .order_by()
+            .values("pk")
+            .union(comments.values("ticket_id"))
+        )
+        best_comment = (
+            comments.filter(ticket=OuterRef("pk"))
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created_at", "-id")
+        )
+        return (
+            queryset.filter(pk__in=candidates)
+            .annotate(
+                ticket_rank=SearchRank(F("search_vector"), query),
+                matched_comment_id=Subquery(best_comment.values("pk")[:1]),
+                matched_comment_rank=Coalesce(
+                    Subquery(best_comment.values("rank")[:1]),
+                    Value(0.0),
+                    output_field=FloatField(),
+                ),
+            )
+            .annotate(
+                **{SEARCH_RANK: Greatest("ticket_rank", "matched_comment_rank")},
+            )
+            .order_by(f"-{SEARCH_RANK}", "-created_at", "-id")
+        )
+
+
+def render_headline(headline):
+    """HTML-escape a ts_headline result and wrap its matches in ``<mark>``."""
+    return (
+        str(escape(headline))
+        .replace(HEADLINE_START, "<mark>")
+        .replace(HEADLINE_STOP, "</mark>")
+    )
+
+
+def add_search_snippets(tickets, text):
+    """
+    Set ``search_snippet`` on a page of TicketCommentSearchFilter results.
+
+    The snippet is taken from whichever of the ticket or its best comment
+    ranked higher; ``snippet_comment_id`` tells which comment, if any.
+    Headlines are only built for the page, in at most two queries.
+    """
+    query = get_search_query(text)
+    from_comment = {}
+    from_ticket = {}
+    for ticket in tickets:
+        if ticket.matched_comment_id and (
+            ticket.matched_comment_rank > ticket.ticket_rank
+        ):
+            ticket.snippet_comment_id = ticket.matched_comment_id
+            from_comment[ticket.matched_comment_id] = ticket
+        else:
+            ticket.snippet_comment_id = None
+            from_ticket[ticket.pk] = ticket
+        ticket.search_snippet = ""
+
+    if from_ticket:
+        document = Concat(
+            "title",
+            Value(". "),
+            "description",
+            output_field=TextField(),
+        )
+        headlines = Ticket.objects.filter(pk__in=from_ticket).values_list(
+            "pk",
+            SearchHeadline(document, query, config=SEARCH_CONFIG, **HEADLINE_OPTIONS),
+        )
+        for pk, headline in headlines:
+            from_ticket[pk].search_snippet = render_headline(headline)
+
+    if from_comment:
+        headlines = Comment.objects.filter(pk__in=from_comment).values_list(
+            "pk",
+            SearchHeadline("content", query, config=SEARCH_CONFIG, **HEADLINE_OPTIONS),
+        )
+        for pk, headline in headlines:
+            from_comment[pk].search_snippet = render_headline(headline)
@@ -0,0 +1,119 @@
+import statistics
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from helpdesk_system.tickets.cache import CACHE_TTL
+from helpdesk_system.tickets.cache import invalidate_all_ticket_list_cache
+
+LEGACY_PATTERN = "tickets:list:*"
+BENCHMARK_PREFIX = "benchmark:tickets"
+
+
+class LatencyProbe(threading.Thread):
+    """Issue GETs in a loop to measure how other clients see the cache."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.latencies = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            start = time.perf_counter()
+            cache.get(f"{BENCHMARK_PREFIX}:probe")
+            self.latencies.append(time.perf_counter() - start)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the legacy delete_pattern ticket list invalidation against "
+        "generation counters on a populated Redis cache. Writes and deletes "
+        "tickets:list:* keys, so only run it against a disposable cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keys",
+            type=int,
+            default=200000,
+            help="Number of cached ticket list entries (default: 200000)",
+        )
+        parser.add_argument(
+            "--other-keys",
+            type=int,
+            default=200000,
+            help="Number of unrelated keys sharing the keyspace (default: 200000)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Keys written per pipeline while populating (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(cache, "delete_pattern"):
+            msg = "The default cache must be django-redis to run this benchmark."
+            raise CommandError(msg)
+
+        self.batch_size = options["batch_size"]
+        keys = options["keys"]
+
+        self.stdout.write(self.style.NOTICE("Populating cache..."))
+        self._populate(f"{BENCHMARK_PREFIX}:other", options["other_keys"])
+        self._populate("tickets:list:customer:bench:g0.0", keys)
+        legacy = self._measure(lambda: cache.delete_pattern(LEGACY_PATTERN))
+
+        self._populate("tickets:list:customer:bench:g0.0", keys)
+        generations = self._measure(invalidate_all_ticket_list_cache)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nInvalidation with {keys} ticket keys "
+                f"and {options['other_keys']} other keys:\n"
+                f"   - delete_pattern:      {self._format(legacy)}\n"
+                f"   - generation counters: {self._format(generations)}",
+            ),
+        )
+
+        cache.delete_pattern(f"{BENCHMARK_PREFIX}:*")
+        cache.delete_pattern("tickets:list:customer:bench:*")
+
+    def _populate(self, prefix, count):
+        for start in range(0, count, self.batch_size):
+            stop = min(start + self.batch_size, count)
+            cache.set_many(
+                {f"{prefix}:{i}": {"results": []} for i in range(start, stop)},
+                CACHE_TTL,
+            )
+
+    def _measure(self, invalidate):
+        probe = LatencyProbe()
+        probe.start()
+        # Let the probe settle before invalidating
+        time.sleep(0.2)
+
+        start = time.perf_counter()
+        invalidate()
+        elapsed = time.perf_counter() - start
+
+        probe.stop()
+        return elapsed, probe.latencies
+
+    def _format(self, result):
+        elapsed, latencies = result
+        if not latencies:
+            return f"{elapsed * 1000:9.2f} ms"
+        return (
+            f"{elapsed * 1000:9.2f} ms "
+            f"(concurrent GET p50 {statistics.median(latencies) * 1000:.2f} ms, "
+            f"max {max(latencies) * 1000:.2f} ms)"
+        )
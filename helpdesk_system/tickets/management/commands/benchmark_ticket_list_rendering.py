@@ -0,0 +1,108 @@
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from rest_framework.renderers import JSONRenderer
+
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.tickets.renderers import ORJSONRenderer
+from helpdesk_system.tickets.serializers import TicketListSerializer
+from helpdesk_system.tickets.serializers import compile_values_serializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the ticket list rendered by TicketListSerializer and "
+        "JSONRenderer against the compiled .values() fast path and orjson. "
+        "Fails unless both produce the same bytes. Load data first, e.g. "
+        "generate_fake_data --tickets 100000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10000,
+            help="Tickets rendered per run (default: 10000)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=5,
+            help="Runs per rendering path (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        queryset = Ticket.objects.order_by("-created_at", "-id")[:rows]
+        count = queryset.count()
+        if not count:
+            msg = "No tickets to render, run generate_fake_data first."
+            raise CommandError(msg)
+
+        serializer_body, serializer_timings = self._measure(
+            self._serializer_path,
+            queryset,
+            options["iterations"],
+        )
+        fast_body, fast_timings = self._measure(
+            self._fast_path,
+            queryset,
+            options["iterations"],
+        )
+        if fast_body != serializer_body:
+            offset = len(os.path.commonprefix([serializer_body, fast_body]))
+            msg = (
+                f"Outputs differ at byte {offset}: "
+                f"{serializer_body[offset - 40 : offset + 40]!r} != "
+                f"{fast_body[offset - 40 : offset + 40]!r}"
+            )
+            raise CommandError(msg)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {count} tickets, {len(fast_body)} identical bytes",
+            ),
+        )
+        self._report("serializer + JSONRenderer", count, serializer_timings)
+        self._report("values + orjson", count, fast_timings)
+        speedup = statistics.median(serializer_timings["total"]) / statistics.median(
+            fast_timings["total"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {speedup:.1f}x"))
+
+    def _serializer_path(self, queryset):
+        tickets = list(queryset.select_related("created_by", "assigned_to"))
+        fetched = time.perf_counter()
+        data = TicketListSerializer(tickets, many=True).data
+        return fetched, data, JSONRenderer()
+
+    def _fast_path(self, queryset):
+        columns, serialize_rows = compile_values_serializer(TicketListSerializer)
+        rows = list(queryset.values(*columns))
+        fetched = time.perf_counter()
+        data = serialize_rows(rows)
+        return fetched, data, ORJSONRenderer()
+
+    def _measure(self, path, queryset, iterations):
+        timings = {"fetch": [], "serialize": [], "render": [], "total": []}
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fetched, data, renderer = path(queryset)
+            serialized = time.perf_counter()
+            body = renderer.render(data)
+            end = time.perf_counter()
+            timings["fetch"].append(fetched - start)
+            timings["serialize"].append(serialized - fetched)
+            timings["render"].append(end - serialized)
+            timings["total"].append(end - start)
+        return body, timings
+
+    def _report(self, name, count, timings):
+        rates = "  ".join(
+            f"{step} {count / statistics.median(values):>10,.0f} rows/s"
+            for step, values in timings.items()
+        )
+        self.stdout.write(f"   - {name:<26} {rates}")
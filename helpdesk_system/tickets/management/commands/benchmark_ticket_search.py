@@ -0,0 +1,89 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test import override_settings
+from rest_framework.request import Request
+
+from helpdesk_system.tickets.filters import TicketOrderingFilter
+from helpdesk_system.tickets.filters import TicketSearchFilter
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.tickets.views import TicketViewSet
+
+BACKENDS = ["icontains", "fulltext"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ?search= on the ticket list between the icontains SearchFilter "
+        "and the full-text backend. Load data first, e.g. "
+        "generate_fake_data --tickets 1000000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--term",
+            action="append",
+            dest="terms",
+            help="Search term to benchmark, repeatable (default: a few samples)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=5,
+            help="Runs per term and backend (default: 5)",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=20,
+            help="Rows fetched per search, like one list page (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        terms = options["terms"] or ["project", "price include", "film -drop"]
+        total = Ticket.objects.count()
+        self.stdout.write(self.style.NOTICE(f"Benchmarking search on {total} tickets"))
+
+        for term in terms:
+            self.stdout.write(f'\nTerm "{term}":')
+            for backend in BACKENDS:
+                with override_settings(TICKETS_SEARCH_BACKEND=backend):
+                    timings, count, plan = self._run(term, options)
+                self.stdout.write(
+                    f"   - {backend:<9} p50 {statistics.median(timings):9.2f} ms  "
+                    f"max {max(timings):9.2f} ms  {count:>8} matches  [{plan}]",
+                )
+
+    def _run(self, term, options):
+        view = TicketViewSet(action="list", format_kwarg=None)
+        request = Request(RequestFactory().get("/", {"search": term}))
+        view.request = request
+
+        queryset = Ticket.objects.select_related("created_by", "assigned_to")
+        queryset = TicketSearchFilter().filter_queryset(request, queryset, view)
+        queryset = TicketOrderingFilter().filter_queryset(request, queryset, view)
+        page = queryset[: options["page_size"]]
+
+        timings = []
+        for _ in range(options["iterations"]):
+            start = time.perf_counter()
+            count = queryset.count()
+            list(page)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return timings, count, self._plan_summary(page)
+
+    def _plan_summary(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = [row[0] for row in cursor.fetchall()]
+        scans = [
+            line.strip().lstrip("-> ").split("  ")[0]
+            for line in plan
+            if "tickets_ticket" in line and "Scan" in line
+        ]
+        return "; ".join(scans) or plan[0].strip()
@@ -5,6 +5,7 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from faker import Faker
 
+from helpdesk_system.tickets.cache import invalidate_all_ticket_list_cache
 from helpdesk_system.tickets.models import Comment
 from helpdesk_system.tickets.models import Ticket
 from helpdesk_system.users.models import User
@@ -81,6 +82,9 @@ class Command(BaseCommand):
             avg_per_ticket=options["comments_per_ticket"],
         )
 
+        # bulk_create skips the signals that invalidate single tickets
+        invalidate_all_ticket_list_cache()
+
         elapsed = time.time() - start_time
 
         self.stdout.write(
@@ -202,3 +206,10 @@ class Command(BaseCommand):
         # Insert remaining comments
         if comments:
             Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+
+        # bulk_create skips signals, so refresh the denormalized counters
+        if tickets:
+            self.stdout.write("Updating ticket comment counters...")
+            Ticket.objects.filter(
+                id__gte=min(ticket.id for ticket in tickets),
+            ).refresh_comment_stats()
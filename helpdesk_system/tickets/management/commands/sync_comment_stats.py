@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.db.models import Min
+
+from helpdesk_system.tickets.cache import invalidate_all_ticket_list_cache
+from helpdesk_system.tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill and reconcile the denormalized comments_count and "
+        "last_comment_at columns on tickets"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of ticket ids checked per batch (default: 5000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report tickets with drifted counters, do not fix them",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        start_time = time.time()
+        bounds = Ticket.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+        if bounds["min_id"] is None:
+            self.stdout.write(self.style.SUCCESS("No tickets found."))
+            return
+
+        drifted = 0
+        for start in range(bounds["min_id"], bounds["max_id"] + 1, batch_size):
+            batch = Ticket.objects.filter(id__gte=start, id__lt=start + batch_size)
+
+            with transaction.atomic():
+                ids = list(
+                    batch.with_comment_stats_drift().values_list("id", flat=True),
+                )
+                if ids and not dry_run:
+                    Ticket.objects.filter(id__in=ids).refresh_comment_stats()
+
+            drifted += len(ids)
+            if ids:
+                self.stdout.write(
+                    f"  Ids {start}-{start + batch_size - 1}: {len(ids)} drifted",
+                )
+
+        # Bulk updates skip the signals that invalidate single tickets
+        if drifted and not dry_run:
+            invalidate_all_ticket_list_cache()
+
+        elapsed = time.time() - start_time
+        action = "found" if dry_run else "fixed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Comment counters {action} on {drifted} tickets "
+                f"in {elapsed:.2f} seconds.",
+            ),
+        )
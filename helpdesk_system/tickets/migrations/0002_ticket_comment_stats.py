@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-17 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Comments count'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Last comment at'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE tickets_ticket AS t
+                SET comments_count = s.comments_count,
+                    last_comment_at = s.last_comment_at
+                FROM (
+                    SELECT ticket_id,
+                           COUNT(*) AS comments_count,
+                           MAX(created_at) AS last_comment_at
+                    FROM tickets_comment
+                    GROUP BY ticket_id
+                ) AS s
+                WHERE s.ticket_id = t.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.9 on 2026-10-17 12:21
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+SEARCH_VECTOR_TRIGGER = """
+    CREATE FUNCTION tickets_ticket_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('pg_catalog.english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER tickets_ticket_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector
+    ON tickets_ticket
+    FOR EACH ROW EXECUTE FUNCTION tickets_ticket_search_vector_update();
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+    DROP TRIGGER IF EXISTS tickets_ticket_search_vector_trigger ON tickets_ticket;
+    DROP FUNCTION IF EXISTS tickets_ticket_search_vector_update();
+"""
+
+BACKFILL_SEARCH_VECTOR = """
+    UPDATE tickets_ticket SET search_vector =
+        setweight(to_tsvector('pg_catalog.english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(description, '')), 'B');
+"""
+
+
+def create_trigram_index(apps, schema_editor):
+    """Enable typo-tolerant title search where pg_trgm can be installed."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'",
+        )
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS tickets_ticket_title_trgm "
+            "ON tickets_ticket USING gin (title gin_trgm_ops)",
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS tickets_ticket_title_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_ticket_comment_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql=SEARCH_VECTOR_TRIGGER,
+            reverse_sql=DROP_SEARCH_VECTOR_TRIGGER,
+        ),
+        migrations.RunSQL(
+            sql=BACKFILL_SEARCH_VECTOR,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tickets_ticket_search_gin'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
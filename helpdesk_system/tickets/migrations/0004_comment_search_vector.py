@@ -0,0 +1,59 @@
+# Generated by Django 5.2.9 on 2026-10-17 12:27
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+SEARCH_VECTOR_TRIGGER = """
+    CREATE FUNCTION tickets_comment_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.english', coalesce(NEW.content, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER tickets_comment_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF content, search_vector
+    ON tickets_comment
+    FOR EACH ROW EXECUTE FUNCTION tickets_comment_search_vector_update();
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+    DROP TRIGGER IF EXISTS tickets_comment_search_vector_trigger ON tickets_comment;
+    DROP FUNCTION IF EXISTS tickets_comment_search_vector_update();
+"""
+
+BACKFILL_SEARCH_VECTOR = """
+    UPDATE tickets_comment SET search_vector =
+        setweight(to_tsvector('pg_catalog.english', coalesce(content, '')), 'C');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_ticket_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql=SEARCH_VECTOR_TRIGGER,
+            reverse_sql=DROP_SEARCH_VECTOR_TRIGGER,
+        ),
+        migrations.RunSQL(
+            sql=BACKFILL_SEARCH_VECTOR,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tickets_comment_search_gin'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.9 on 2026-10-17 12:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes on the tickets table are built without blocking its writes
+    atomic = False
+
+    dependencies = [
+        ('tickets', '0004_comment_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['-created_at', '-id'], name='tickets_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='tickets_creator_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='tickets_status_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_to', '-created_at', '-id'], name='tickets_assignee_queue_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_to', 'status', '-created_at', '-id'], name='tickets_assignee_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ['open', 'in_progress'])), fields=['priority', '-created_at', '-id'], name='tickets_active_priority_idx'),
+        ),
+        # The implicit FK indexes, dropped without the FK constraints, which
+        # AlterField would drop and validate again over the whole table
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='ticket',
+                    name='assigned_to',
+                    field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_tickets', to=settings.AUTH_USER_MODEL, verbose_name='Assigned to'),
+                ),
+                migrations.AlterField(
+                    model_name='ticket',
+                    name='created_by',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='created_tickets', to=settings.AUTH_USER_MODEL, verbose_name='Created by'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'DROP INDEX CONCURRENTLY IF EXISTS "tickets_ticket_assigned_to_id_142e13bf"',
+                    'CREATE INDEX CONCURRENTLY "tickets_ticket_assigned_to_id_142e13bf" ON "tickets_ticket" ("assigned_to_id")',
+                ),
+                migrations.RunSQL(
+                    'DROP INDEX CONCURRENTLY IF EXISTS "tickets_ticket_created_by_id_c418a145"',
+                    'CREATE INDEX CONCURRENTLY "tickets_ticket_created_by_id_c418a145" ON "tickets_ticket" ("created_by_id")',
+                ),
+            ],
+        ),
+        RemoveIndexConcurrently(
+            model_name='ticket',
+            name='tickets_tic_status_0e5646_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='ticket',
+            name='tickets_tic_priorit_0bec9b_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='ticket',
+            name='tickets_tic_created_d1df98_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='ticket',
+            name='tickets_tic_assigne_bcac0e_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='ticket',
+            name='tickets_tic_created_c2132d_idx',
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-17 12:32
+
+import django.db.models.expressions
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # An expression index rather than a stored column, which would rewrite the
+    # whole tickets table, built without blocking its writes
+    atomic = False
+
+    dependencies = [
+        ('tickets', '0005_ticket_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(django.db.models.expressions.OrderBy(models.Case(models.When(priority='low', then=models.Value(1)), models.When(priority='medium', then=models.Value(2)), models.When(priority='high', then=models.Value(3)), models.When(priority='urgent', then=models.Value(4)), default=models.Value(0), output_field=models.PositiveSmallIntegerField()), descending=True), django.db.models.expressions.OrderBy(models.F('created_at'), descending=True), django.db.models.expressions.OrderBy(models.F('id'), descending=True), name='tickets_priority_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.9 on 2026-10-17 13:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes on the tickets table are built without blocking its writes
+    atomic = False
+
+    dependencies = [
+        ('tickets', '0006_ticket_priority_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket_id', models.BigIntegerField(verbose_name='Ticket ID')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Deleted at')),
+            ],
+            options={
+                'verbose_name': 'Ticket tombstone',
+                'verbose_name_plural': 'Ticket tombstones',
+            },
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['updated_at', 'id'], name='tickets_changes_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['created_by', 'updated_at', 'id'], name='tickets_creator_changes_idx'),
+        ),
+        migrations.AddField(
+            model_name='tickettombstone',
+            name='created_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Created by'),
+        ),
+        migrations.AddIndex(
+            model_name='tickettombstone',
+            index=models.Index(fields=['deleted_at', 'ticket_id'], name='tickets_tombstone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tickettombstone',
+            index=models.Index(fields=['created_by', 'deleted_at', 'ticket_id'], name='tickets_tombstone_creator_idx'),
+        ),
+    ]
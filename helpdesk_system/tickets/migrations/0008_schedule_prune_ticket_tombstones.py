@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import migrations
+
+TASK_NAME = "Prune ticket tombstones"
+TASK = "helpdesk_system.tickets.tasks.prune_ticket_tombstones"
+
+
+def schedule_prune(apps, schema_editor):
+    CrontabSchedule = apps.get_model("django_celery_beat", "CrontabSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    # Daily, at night
+    crontab, _ = CrontabSchedule.objects.get_or_create(
+        minute="30",
+        hour="3",
+        day_of_week="*",
+        day_of_month="*",
+        month_of_year="*",
+        timezone=settings.TIME_ZONE,
+    )
+    PeriodicTask.objects.update_or_create(
+        name=TASK_NAME,
+        defaults={"task": TASK, "crontab": crontab, "enabled": True},
+    )
+
+
+def unschedule_prune(apps, schema_editor):
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    PeriodicTask.objects.filter(name=TASK_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0007_ticket_changes"),
+        ("django_celery_beat", "0019_alter_periodictasks_options"),
+    ]
+
+    operations = [
+        migrations.RunPython(schedule_prune, unschedule_prune),
+    ]
@@ -1,9 +1,87 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Prefetch
+from django.db.models import Q
+from django.db.models import Subquery
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from model_utils import FieldTracker
 
 
+class TicketQuerySet(models.QuerySet):
+    """QuerySet with helpers for the denormalized comment counters."""
+
+    @staticmethod
+    def _comment_stats():
+        comments = (
+            Comment.objects.filter(ticket=OuterRef("pk")).order_by().values("ticket")
+        )
+        count = Subquery(comments.annotate(count=Count("pk")).values("count"))
+        last = Subquery(comments.annotate(last=Max("created_at")).values("last"))
+        return Coalesce(count, 0), last
+
+    def refresh_comment_stats(self):
+        """Recompute comments_count and last_comment_at in a single UPDATE."""
+        count, last = self._comment_stats()
+        # updated_at moves too, so the changes endpoint picks them up
+        return self.update(
+            comments_count=count,
+            last_comment_at=last,
+            updated_at=timezone.now(),
+        )
+
+    def with_recent_comments(self, limit):
+        """Prefetch the latest ``limit`` comments per ticket with their authors.
+
+        They are stored newest first in ``recent_comments``.
+        """
+        comments = Comment.objects.select_related("author").order_by(
+            "-created_at",
+            "-id",
+        )
+        return self.prefetch_related(
+            Prefetch("comments", queryset=comments[:limit], to_attr="recent_comments"),
+        )
+
+    def with_comment_stats_drift(self):
+        """Tickets whose stored counters disagree with the comments table."""
+        count, last = self._comment_stats()
+        return self.annotate(
+            actual_comments_count=count,
+            actual_last_comment_at=last,
+        ).filter(
+            ~Q(comments_count=F("actual_comments_count"))
+            | Q(last_comment_at__isnull=True, actual_last_comment_at__isnull=False)
+            | Q(last_comment_at__isnull=False, actual_last_comment_at__isnull=True)
+            | Q(last_comment_at__lt=F("actual_last_comment_at"))
+            | Q(last_comment_at__gt=F("actual_last_comment_at")),
+        )
+
+
+# Severity of Ticket.priority as a number, so ?ordering=priority sorts
+# low < medium < high < urgent. Indexed as an expression by
+# tickets_priority_rank_idx rather than stored, and annotated by
+# TicketOrderingFilter as the same expression so it is read off the index.
+PRIORITY_RANK = Case(
+    When(priority="low", then=Value(1)),
+    When(priority="medium", then=Value(2)),
+    When(priority="high", then=Value(3)),
+    When(priority="urgent", then=Value(4)),
+    default=Value(0),
+    output_field=models.PositiveSmallIntegerField(),
+)
+
+
 class Ticket(models.Model):
     """Support ticket model."""
 
@@ -38,6 +116,8 @@ class Ticket(models.Model):
         on_delete=models.CASCADE,
         related_name="created_tickets",
         verbose_name=_("Created by"),
+        # Covered by tickets_creator_recent_idx
+        db_index=False,
     )
     assigned_to = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -46,22 +126,79 @@ class Ticket(models.Model):
         blank=True,
         related_name="assigned_tickets",
         verbose_name=_("Assigned to"),
+        # Covered by tickets_assignee_queue_idx
+        db_index=False,
+    )
+    # Denormalized from Comment, kept in sync by signals and the
+    # sync_comment_stats management command.
+    comments_count = models.PositiveIntegerField(
+        _("Comments count"),
+        default=0,
+        editable=False,
     )
+    last_comment_at = models.DateTimeField(
+        _("Last comment at"),
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    # Weighted title (A) + description (B) document, maintained by a
+    # database trigger (see migration 0003) so bulk writes stay in sync.
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Updated at"), auto_now=True)
 
-    tracker = FieldTracker(fields=["status"])
+    tracker = FieldTracker(fields=["status", "assigned_to"])
+
+    objects = TicketQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Ticket")
         verbose_name_plural = _("Tickets")
         ordering = ["-created_at"]
+        # Shaped to the TicketViewSet list queries: each filter combination is
+        # followed by the (-created_at, -id) order used by both paginations,
+        # so a page is read straight off the index. Covered by test_indexes.
         indexes = [
-            models.Index(fields=["status"]),
-            models.Index(fields=["priority"]),
-            models.Index(fields=["created_by"]),
-            models.Index(fields=["assigned_to"]),
-            models.Index(fields=["-created_at"]),
+            models.Index(fields=["-created_at", "-id"], name="tickets_recent_idx"),
+            models.Index(
+                fields=["created_by", "-created_at", "-id"],
+                name="tickets_creator_recent_idx",
+            ),
+            models.Index(
+                fields=["status", "-created_at", "-id"],
+                name="tickets_status_recent_idx",
+            ),
+            # An agent's whole queue, and the part of it in a given status:
+            # the status column between them would otherwise either sort the
+            # first or read the agent's closed history to filter the second
+            models.Index(
+                fields=["assigned_to", "-created_at", "-id"],
+                name="tickets_assignee_queue_idx",
+            ),
+            models.Index(
+                fields=["assigned_to", "status", "-created_at", "-id"],
+                name="tickets_assignee_recent_idx",
+            ),
+            models.Index(
+                PRIORITY_RANK.desc(),
+                F("created_at").desc(),
+                F("id").desc(),
+                name="tickets_priority_rank_idx",
+            ),
+            # Triage by priority only matters for tickets still being worked on
+            models.Index(
+                fields=["priority", "-created_at", "-id"],
+                condition=Q(status__in=["open", "in_progress"]),
+                name="tickets_active_priority_idx",
+            ),
+            # Delta syncs through the changes endpoint, in (updated_at, id) order
+            models.Index(fields=["updated_at", "id"], name="tickets_changes_idx"),
+            models.Index(
+                fields=["created_by", "updated_at", "id"],
+                name="tickets_creator_changes_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="tickets_ticket_search_gin"),
         ]
 
     def __str__(self):
@@ -84,6 +221,9 @@ class Comment(models.Model):
         verbose_name=_("Author"),
     )
     content = models.TextField(_("Content"))
+    # Content document weighted C, below the ticket title and description,
+    # maintained by a database trigger (see migration 0004).
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
 
     class Meta:
@@ -92,7 +232,46 @@ class Comment(models.Model):
         ordering = ["created_at"]
         indexes = [
             models.Index(fields=["ticket", "created_at"]),
+            GinIndex(fields=["search_vector"], name="tickets_comment_search_gin"),
         ]
 
     def __str__(self):
         return f"Comment by {self.author} on #{self.ticket_id}"
+
+
+class TicketTombstone(models.Model):
+    """
+    Record of a deleted ticket, so delta syncs can report the deletion.
+
+    Written by TicketViewSet.perform_destroy and kept for
+    TICKETS_TOMBSTONE_RETENTION by the prune_ticket_tombstones task.
+    """
+
+    # Not a foreign key, the ticket is gone
+    ticket_id = models.BigIntegerField(_("Ticket ID"))
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Created by"),
+        # Covered by tickets_tombstone_creator_idx
+        db_index=False,
+    )
+    deleted_at = models.DateTimeField(_("Deleted at"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Ticket tombstone")
+        verbose_name_plural = _("Ticket tombstones")
+        indexes = [
+            models.Index(
+                fields=["deleted_at", "ticket_id"],
+                name="tickets_tombstone_idx",
+            ),
+            models.Index(
+                fields=["created_by", "deleted_at", "ticket_id"],
+                name="tickets_tombstone_creator_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.ticket_id} (deleted)"
@@ -0,0 +1,313 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.pagination import CursorPagination
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+PAGINATION_QUERY_PARAM = "pagination"
+COUNT_QUERY_PARAM = "count"
+
+PAGE_MODE = "page"
+CURSOR_MODE = "cursor"
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+def include_count(request):
+    """Whether the paginated response should carry the total ``count``."""
+    value = request.query_params.get(COUNT_QUERY_PARAM, "").lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    return settings.TICKETS_PAGINATION_COUNT
+
+
+class TicketPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-out for the total count.
+
+    With ``?count=false`` the ``COUNT(*)`` query is skipped: one extra row is
+    fetched to know whether a next page exists and ``count`` is returned as null.
+    Invalid pages and pages past the end are still answered with a 404.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.with_count = include_count(request)
+        if self.with_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        page_number = request.query_params.get(self.page_query_param) or 1
+        self.page_number = self.validate_page_number(page_number)
+
+        offset = (self.page_number - 1) * page_size
+        results = list(queryset[offset : offset + page_size + 1])
+        if not results and self.page_number > 1:
+            self.raise_invalid_page(page_number, "no_results")
+        self.has_next = len(results) > page_size
+        return results[:page_size]
+
+    def validate_page_number(self, page_number):
+        """Same checks as ``Paginator.validate_number``, minus the page count."""
+        try:
+            number = int(page_number)
+        except (TypeError, ValueError):
+            self.raise_invalid_page(page_number, "invalid_page")
+        if number < 1:
+            self.raise_invalid_page(page_number, "min_page")
+        return number
+
+    def raise_invalid_page(self, page_number, code):
+        message = self.django_paginator_class.default_error_messages[code]
+        raise NotFound(
+            self.invalid_page_message.format(
+                page_number=page_number,
+                message=str(message),
+            ),
+        )
+
+    def get_next_link(self):
+        if self.with_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.with_count:
+            return super().get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.page.paginator.count if self.with_count else None,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            },
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["required"] = ["results"]
+        response_schema["properties"]["count"]["nullable"] = True
+        return response_schema
+
+
+class TicketCursorPagination(CursorPagination):
+    """
+    Keyset pagination on ``(-created_at, id)``.
+
+    The cursor stores the values of every ordering column, so each page is a
+    range scan starting right after the last row of the previous page instead
+    of an OFFSET. Orderings chosen through ``?ordering=`` are honoured and get
+    ``id`` appended as a tie-breaker to keep positions unique.
+    """
+
+    ordering = ("-created_at", "-id")
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering[-1].lstrip("-") in ("id", "pk"):
+            return ordering
+        tie_breaker = "-id" if ordering[0].startswith("-") else "id"
+        return (*ordering, tie_breaker)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.count = queryset.count() if include_count(request) else None
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor else None
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            try:
+                queryset = queryset.filter(
+                    self._get_keyset_filter(current_position, reverse=reverse),
+                )
+            except ValidationError as exc:
+                raise NotFound(self.invalid_cursor_message) from exc
+
+        # Positions are unique, so the cursor never needs an offset.
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1],
+                self.ordering,
+            )
+        else:
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_keyset_filter(self, position, *, reverse):
+        """Build ``(a, b, ...) > (x, y, ...)`` honouring each column direction."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        keyset = Q()
+        equal = Q()
+        for order, value in zip(self.ordering, values, strict=True):
+            field_name = order.lstrip("-")
+            lookup = "lt" if order.startswith("-") != reverse else "gt"
+            keyset |= equal & Q(**{f"{field_name}__{lookup}": value})
+            equal &= Q(**{field_name: value})
+
+        # Redundant bound on the leading column so the planner can start an
+        # index range scan at the cursor instead of filtering from the top.
+        leading = self.ordering[0]
+        lookup = "lte" if leading.startswith("-") != reverse else "gte"
+        return Q(**{f"{leading.lstrip('-')}__{lookup}": values[0]}) & keyset
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance[field_name]
+            else:
+                value = getattr(instance, field_name)
+            values.append(str(value))
+        return json.dumps(values, separators=(",", ":"))
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response = {"count": self.count, **response}
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"] = {
+            "count": {"type": "integer", "nullable": True, "example": 123},
+            **response_schema["properties"],
+        }
+        return response_schema
+
+
+def _reverse_ordering(ordering):
+    return tuple(
+        order[1:] if order.startswith("-") else f"-{order}" for order in ordering
+    )
+
+
+class TicketPagination(BasePagination):
+    """
+    Pagination for the ticket list, switchable per request.
+
+    ``?pagination=cursor`` selects keyset pagination and ``?pagination=page``
+    the classic page numbers; without the parameter the
+    ``TICKETS_PAGINATION_MODE`` setting decides.
+    """
+
+    page_class = TicketPageNumberPagination
+    cursor_class = TicketCursorPagination
+
+    def get_mode(self, request):
+        mode = request.query_params.get(PAGINATION_QUERY_PARAM, "").lower()
+        if mode in (PAGE_MODE, CURSOR_MODE):
+            return mode
+        return settings.TICKETS_PAGINATION_MODE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.get_mode(request) == CURSOR_MODE:
+            self.paginator = self.cursor_class()
+        else:
+            self.paginator = self.page_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        page_schema = self.page_class().get_paginated_response_schema(schema)
+        page_schema["description"] = "Page number pagination (?pagination=page)."
+        cursor_schema = self.cursor_class().get_paginated_response_schema(schema)
+        cursor_schema["description"] = "Cursor pagination (?pagination=cursor)."
+        # anyOf rather than oneOf: both styles share the same fields
+        return {"anyOf": [page_schema, cursor_schema]}
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_class().get_schema_operation_parameters(view),
+            *self.cursor_class().get_schema_operation_parameters(view),
+            {
+                "name": PAGINATION_QUERY_PARAM,
+                "required": False,
+                "in": "query",
+                "description": "Pagination style: 'page' (default) or 'cursor'.",
+                "schema": {"type": "string", "enum": [PAGE_MODE, CURSOR_MODE]},
+            },
+            {
+                "name": COUNT_QUERY_PARAM,
+                "required": False,
+                "in": "query",
+                "description": "Set to false to skip computing the total count.",
+                "schema": {"type": "boolean"},
+            },
+        ]
+
+    def get_results(self, data):
+        return data["results"]
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    @property
+    def display_page_controls(self):
+        paginator = getattr(self, "paginator", None)
+        return getattr(paginator, "display_page_controls", False)
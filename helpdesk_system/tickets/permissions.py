@@ -31,8 +31,15 @@ class TicketPermission(permissions.BasePermission):
         if request.user.is_agent:
             return True
 
-        # Customers can list, create, retrieve
-        return view.action in ["list", "create", "retrieve"]
+        # Customers can list, search, export, poll changes, create, retrieve
+        return view.action in [
+            "list",
+            "search",
+            "export",
+            "changes",
+            "create",
+            "retrieve",
+        ]
 
     def has_object_permission(self, request, view, obj):
         # Agents have full access
@@ -40,7 +47,7 @@ class TicketPermission(permissions.BasePermission):
             return True
 
         # Customers can only access their own tickets
-        return obj.created_by == request.user
+        return obj.created_by_id == request.user.id
 
 
 class CommentPermission(permissions.BasePermission):
@@ -1,4 +1,11 @@
+import functools
+
+from django.conf import settings
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import ISO_8601
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
 from helpdesk_system.users.models import User
 
@@ -35,13 +42,58 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at"]
 
 
-class TicketListSerializer(serializers.ModelSerializer):
-    """Serializer for ticket list with aggregated data."""
+FIELDS_QUERY_PARAM = "fields"
+OMIT_QUERY_PARAM = "omit"
+
+
+def get_sparse_fields(query_params, serializer_class):
+    """
+    Return the fields of serializer_class picked with ?fields= and ?omit=.
+
+    Both take comma separated top-level field names. Returns them in the
+    serializer's order, or None when neither parameter narrows the output.
+    """
+    available = serializer_class.Meta.fields
+    selected = {}
+    for param in (FIELDS_QUERY_PARAM, OMIT_QUERY_PARAM):
+        names = {
+            name.strip()
+            for value in query_params.getlist(param)
+            for name in value.split(",")
+        } - {""}
+        unknown = sorted(names - set(available))
+        if unknown:
+            raise serializers.ValidationError(
+                {param: [f"Unknown fields: {', '.join(unknown)}."]},
+            )
+        selected[param] = names
+
+    if not selected[FIELDS_QUERY_PARAM] and not selected[OMIT_QUERY_PARAM]:
+        return None
+    return tuple(
+        name
+        for name in available
+        if name in (selected[FIELDS_QUERY_PARAM] or available)
+        and name not in selected[OMIT_QUERY_PARAM]
+    )
+
+
+class SparseFieldsetMixin:
+    """Serializer keeping only the fields named in context["sparse_fields"]."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse_fields = self.context.get("sparse_fields")
+        if sparse_fields is None:
+            return fields
+        return {name: fields[name] for name in sparse_fields}
+
+
+class TicketListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for ticket list with denormalized comment data."""
 
     created_by = UserMinimalSerializer(read_only=True)
     assigned_to = UserMinimalSerializer(read_only=True)
-    comments_count = serializers.IntegerField(read_only=True)
-    last_comment_at = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Ticket
@@ -60,12 +112,137 @@ class TicketListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class TicketDetailSerializer(serializers.ModelSerializer):
-    """Serializer for ticket detail with nested comments."""
+# Fields whose to_representation() returns the database value unchanged
+VERBATIM_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.ChoiceField,
+)
+
+
+def iso_datetime(value, tz):
+    """DateTimeField.to_representation() for ISO 8601, with tz looked up once."""
+    value = value.astimezone(tz).isoformat()
+    if value.endswith("+00:00"):
+        value = value.removesuffix("+00:00") + "Z"
+    return value
+
+
+def _is_iso_datetime(field):
+    return (
+        isinstance(field, serializers.DateTimeField)
+        and not hasattr(field, "timezone")
+        and getattr(field, "format", api_settings.DATETIME_FORMAT) == ISO_8601
+        and settings.USE_TZ
+    )
+
+
+@functools.cache
+def compile_values_serializer(serializer_class, sparse_fields=None):
+    """
+    Compile a read-only ModelSerializer into a function of ``.values()`` rows.
+
+    Returns ``(columns, serialize_rows)``: the lookups to pass to ``values()``
+    and a function turning a list of its rows into the list of dicts the
+    serializer would have produced, key for key, nested serializers
+    included. Fields are resolved once here, so each row costs a single
+    dict literal instead of a walk through every field of every serializer,
+    and the current timezone is looked up once per call instead of once per
+    datetime. With sparse_fields, only those fields are selected, so nested
+    serializers left out cost no join.
+    """
+    columns = []
+    converters = {"iso_datetime": iso_datetime}
+
+    def compile_fields(serializer, prefix):
+        items = []
+        for name, field in serializer.fields.items():
+            if "." in field.source or field.source == "*":
+                msg = f"Cannot compile {field.source!r} of {serializer_class}"
+                raise ValueError(msg)
+            lookup = prefix + field.source
+            if isinstance(field, serializers.ModelSerializer):
+                nested = compile_fields(field, f"{lookup}__")
+                pk = f"{lookup}__{field.Meta.model._meta.pk.name}"  # noqa: SLF001
+                if pk not in columns:
+                    columns.append(pk)
+                value = f"None if row[{pk!r}] is None else {nested}"
+            else:
+                columns.append(lookup)
+                value = f"row[{lookup!r}]"
+                if _is_iso_datetime(field):
+                    value = f"None if {value} is None else iso_datetime({value}, tz)"
+                elif not isinstance(field, VERBATIM_FIELDS):
+                    converter = f"convert_{len(converters)}"
+                    converters[converter] = field.to_representation
+                    value = f"None if {value} is None else {converter}({value})"
+            items.append(f"{name!r}: {value}")
+        return "{" + ", ".join(items) + "}"
+
+    serializer = serializer_class(context={"sparse_fields": sparse_fields})
+    body = compile_fields(serializer, "")
+    namespace = {**converters, "get_current_timezone": timezone.get_current_timezone}
+    # Generated once per serializer class from its own field names
+    source = (
+        "def serialize_rows(rows):\n"
+        "    tz = get_current_timezone()\n"
+        f"    return [{body} for row in rows]\n"
+    )
+    exec(source, namespace)  # noqa: S102
+    return tuple(columns), namespace["serialize_rows"]
+
+
+class TicketSearchResultSerializer(TicketListSerializer):
+    """Ticket list entry with its search rank and a highlighted snippet."""
+
+    search_rank = serializers.FloatField(read_only=True)
+    matched_comment = serializers.IntegerField(
+        source="snippet_comment_id",
+        read_only=True,
+        allow_null=True,
+        help_text="Comment the snippet was taken from, null for the ticket.",
+    )
+    snippet = serializers.CharField(
+        source="search_snippet",
+        read_only=True,
+        help_text="HTML-escaped excerpt with matches wrapped in <mark>.",
+    )
+
+    class Meta(TicketListSerializer.Meta):
+        fields = [
+            *TicketListSerializer.Meta.fields,
+            "search_rank",
+            "matched_comment",
+            "snippet",
+        ]
+        read_only_fields = fields
+
+
+class TicketChangesSerializer(serializers.Serializer):
+    """Tickets saved and deleted since a watermark."""
+
+    tickets = TicketListSerializer(many=True, read_only=True)
+    deleted = serializers.ListField(
+        child=serializers.IntegerField(),
+        read_only=True,
+        help_text="IDs of the deleted tickets.",
+    )
+    watermark = serializers.CharField(
+        read_only=True,
+        help_text="Value of ?since= for the next poll.",
+    )
+    has_more = serializers.BooleanField(
+        read_only=True,
+        help_text="Whether more changes are waiting, poll again right away.",
+    )
+
+
+class TicketDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for ticket detail with its most recent comments."""
 
     created_by = UserMinimalSerializer(read_only=True)
     assigned_to = UserMinimalSerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
 
     class Meta:
         model = Ticket
@@ -78,11 +255,30 @@ class TicketDetailSerializer(serializers.ModelSerializer):
             "created_by",
             "assigned_to",
             "comments",
+            "comments_count",
             "created_at",
             "updated_at",
         ]
         read_only_fields = ["id", "created_by", "created_at", "updated_at"]
 
+    @extend_schema_field(CommentSerializer(many=True))
+    def get_comments(self, ticket):
+        recent_comments = getattr(ticket, "recent_comments", None)
+        if recent_comments is None:
+            limit = settings.TICKETS_DETAIL_COMMENTS_LIMIT
+            recent_comments = (
+                Ticket.objects.filter(pk=ticket.pk)
+                .with_recent_comments(limit)
+                .get()
+                .recent_comments
+            )
+        # Fetched newest first to cap the list, rendered oldest first
+        return CommentSerializer(
+            reversed(recent_comments),
+            many=True,
+            context=self.context,
+        ).data
+
 
 class TicketCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating tickets."""
@@ -114,3 +310,54 @@ class TicketUpdateSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "updated_at"]
+
+
+class TicketBulkUpdateSerializer(serializers.Serializer):
+    """Changes applied to many tickets at once (agents only)."""
+
+    FIELDS = ("status", "priority", "assigned_to")
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        help_text="IDs of the tickets to update.",
+    )
+    changes = serializers.DictField(
+        help_text="Values to set on every ticket: status, priority, assigned_to.",
+    )
+
+    def validate_ids(self, value):
+        limit = settings.TICKETS_BULK_UPDATE_MAX_TICKETS
+        ids = sorted(set(value))
+        if len(ids) > limit:
+            msg = f"Ensure this field has no more than {limit} elements."
+            raise serializers.ValidationError(msg)
+        return ids
+
+    def validate_changes(self, value):
+        if not value:
+            msg = "At least one change is required."
+            raise serializers.ValidationError(msg)
+        unknown = sorted(set(value) - set(self.FIELDS))
+        if unknown:
+            msg = f"Cannot be changed in bulk: {', '.join(unknown)}."
+            raise serializers.ValidationError(msg)
+
+        # Validated exactly as a PATCH of a single ticket would be
+        serializer = TicketUpdateSerializer(
+            data=value,
+            partial=True,
+            context=self.context,
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+
+class TicketBulkUpdateResultSerializer(serializers.Serializer):
+    """Outcome of a bulk update."""
+
+    updated = serializers.ListField(
+        child=serializers.IntegerField(),
+        read_only=True,
+        help_text="IDs of the tickets changed, those already matching are left out.",
+    )
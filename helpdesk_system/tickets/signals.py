@@ -1,11 +1,16 @@
+from django.db.models import F
+from django.db.models import QuerySet
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from helpdesk_system.emails.tasks import send_comment_added_email
-from helpdesk_system.emails.tasks import send_status_changed_email
-from helpdesk_system.emails.tasks import send_ticket_created_email
-from helpdesk_system.notifications.services import NotificationService
-
+from .cache import invalidate_ticket_cache
+from .events import COMMENT_ADDED
+from .events import STATUS_CHANGED
+from .events import TICKET_CREATED
+from .events import queue_event
 from .models import Comment
 from .models import Ticket
 
@@ -13,19 +18,39 @@ from .models import Ticket
 @receiver(post_save, sender=Ticket)
 def ticket_post_save(sender, instance, created, **kwargs):
     """Handle ticket post-save signals."""
+    # Wherever the save comes from, so no view or script leaves stale caches
+    previous_assignee_id = None if created else instance.tracker.previous("assigned_to")
+    invalidate_ticket_cache(instance, previous_assignee_id=previous_assignee_id)
+    # Emails and notifications go out once the transaction commits
     if created:
         # New ticket created - notify agents
-        send_ticket_created_email.delay(instance.id)
-        NotificationService.notify_ticket_created(instance)
+        queue_event(TICKET_CREATED, ticket_id=instance.id)
     elif instance.tracker.has_changed("status"):
         old_status = instance.tracker.previous("status")
-        send_status_changed_email.delay(instance.id, old_status)
-        NotificationService.notify_status_changed(instance, old_status)
+        queue_event(STATUS_CHANGED, ticket_id=instance.id, old_status=old_status)
 
 
 @receiver(post_save, sender=Comment)
 def comment_post_save(sender, instance, created, **kwargs):
     """Handle comment post-save signals."""
     if created:
-        send_comment_added_email.delay(instance.id)
-        NotificationService.notify_comment_added(instance)
+        Ticket.objects.filter(pk=instance.ticket_id).update(
+            comments_count=F("comments_count") + 1,
+            last_comment_at=Greatest("last_comment_at", instance.created_at),
+            updated_at=timezone.now(),
+        )
+        invalidate_ticket_cache(instance.ticket)
+        queue_event(COMMENT_ADDED, comment_id=instance.id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_post_delete(sender, instance, origin=None, **kwargs):
+    """Keep the ticket comment counters and caches in sync on deletion."""
+    # Comments cascading from their own ticket's deletion need no bookkeeping
+    if isinstance(origin, Ticket) and origin.pk == instance.ticket_id:
+        return
+    if isinstance(origin, QuerySet) and origin.model is Ticket:
+        return
+
+    Ticket.objects.filter(pk=instance.ticket_id).refresh_comment_stats()
+    invalidate_ticket_cache(instance.ticket)
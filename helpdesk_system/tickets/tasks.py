@@ -0,0 +1,85 @@
+import datetime
+import logging
+
+from celery import group
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from helpdesk_system.emails.tasks import send_comment_added_email
+from helpdesk_system.emails.tasks import send_status_changed_email
+from helpdesk_system.emails.tasks import send_ticket_created_email
+from helpdesk_system.notifications.services import NotificationService
+
+from .events import COMMENT_ADDED
+from .events import STATUS_CHANGED
+from .events import TICKET_CREATED
+from .models import Comment
+from .models import Ticket
+from .models import TicketTombstone
+
+logger = logging.getLogger(__name__)
+
+
+def _ticket_created(event):
+    ticket = Ticket.objects.select_related("created_by").get(id=event["ticket_id"])
+    NotificationService.notify_ticket_created(ticket)
+
+
+def _status_changed(event):
+    ticket = Ticket.objects.select_related("created_by").get(id=event["ticket_id"])
+    NotificationService.notify_status_changed(ticket, event["old_status"])
+
+
+def _comment_added(event):
+    comment = Comment.objects.select_related(
+        "author",
+        "ticket__created_by",
+        "ticket__assigned_to",
+    ).get(id=event["comment_id"])
+    NotificationService.notify_comment_added(comment)
+
+
+EVENT_HANDLERS = {
+    TICKET_CREATED: _ticket_created,
+    STATUS_CHANGED: _status_changed,
+    COMMENT_ADDED: _comment_added,
+}
+
+# Email task and payload fields of each event type
+EVENT_EMAILS = {
+    TICKET_CREATED: (send_ticket_created_email, ("ticket_id",)),
+    STATUS_CHANGED: (send_status_changed_email, ("ticket_id", "old_status")),
+    COMMENT_ADDED: (send_comment_added_email, ("comment_id",)),
+}
+
+
+def _email(event):
+    task, fields = EVENT_EMAILS[event["type"]]
+    return task.si(*(event[field] for field in fields))
+
+
+@shared_task
+def dispatch_ticket_events(events: list[dict]):
+    """Send the emails and notifications of a committed batch of ticket events."""
+    # Emails are tasks of their own, so they fail and retry on their own
+    # instead of with the best-effort notifications below
+    group(_email(event) for event in events).delay()
+    for event in events:
+        try:
+            EVENT_HANDLERS[event["type"]](event)
+        except (Ticket.DoesNotExist, Comment.DoesNotExist):
+            pass  # Deleted before the batch was dispatched
+        except Exception:
+            # One failing event must not drop the rest of the batch
+            logger.exception("Failed to dispatch ticket event %s", event)
+
+
+@shared_task
+def prune_ticket_tombstones():
+    """Delete tombstones older than TICKETS_TOMBSTONE_RETENTION, scheduled daily."""
+    retention = datetime.timedelta(seconds=settings.TICKETS_TOMBSTONE_RETENTION)
+    deleted, _ = TicketTombstone.objects.filter(
+        deleted_at__lt=timezone.now() - retention,
+    ).delete()
+    return deleted
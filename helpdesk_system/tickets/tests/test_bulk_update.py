@@ -0,0 +1,197 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from helpdesk_system.tickets import tasks
+from helpdesk_system.tickets.events import STATUS_CHANGED
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.users.models import User
+from helpdesk_system.users.tests.factories import TicketFactory
+from helpdesk_system.users.tests.factories import UserFactory
+
+BULK_UPDATE_URL = reverse("api:ticket-bulk-update")
+
+
+@pytest.fixture
+def publish():
+    with mock.patch.object(tasks.dispatch_ticket_events, "delay") as delay:
+        yield delay
+
+
+@pytest.mark.django_db
+class TestTicketBulkUpdate:
+    # Committed for real, as the events of the tickets created are otherwise
+    # still pending and the update ones would join their batch
+    @pytest.mark.django_db(transaction=True)
+    def test_updates_tickets_with_one_statement(self, agent_api_client, agent, publish):
+        first, second = TicketFactory.create_batch(2)
+        done = TicketFactory(status=Ticket.Status.RESOLVED, assigned_to=agent)
+        publish.reset_mock()
+
+        with CaptureQueriesContext(connection) as context:
+            response = agent_api_client.post(
+                BULK_UPDATE_URL,
+                {
+                    "ids": [second.id, done.id, first.id],
+                    "changes": {"status": "resolved", "assigned_to": agent.id},
+                },
+                format="json",
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {"updated": [first.id, second.id]}
+        updates = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('UPDATE "tickets_ticket"')
+        ]
+        assert len(updates) == 1
+        for ticket in (first, second):
+            ticket.refresh_from_db()
+            assert ticket.status == Ticket.Status.RESOLVED
+            assert ticket.assigned_to == agent
+        assert Ticket.objects.get(id=done.id).updated_at == done.updated_at
+        publish.assert_called_once_with(
+            [
+                {
+                    "type": STATUS_CHANGED,
+                    "ticket_id": ticket.id,
+                    "old_status": Ticket.Status.OPEN,
+                }
+                for ticket in (first, second)
+            ],
+        )
+
+    @pytest.mark.parametrize(
+        "changes",
+        [{"priority": "urgent"}, {"status": "closed"}, {"assigned_to": None}],
+    )
+    def test_query_count_does_not_grow(self, agent_api_client, changes):
+        def count_queries(tickets):
+            with CaptureQueriesContext(connection) as context:
+                response = agent_api_client.post(
+                    BULK_UPDATE_URL,
+                    {"ids": [ticket.id for ticket in tickets], "changes": changes},
+                    format="json",
+                )
+            assert len(response.data["updated"]) == len(tickets)
+            return len(context.captured_queries)
+
+        agent = UserFactory(role=User.Role.AGENT)
+        few = TicketFactory.create_batch(2, assigned_to=agent)
+        many = TicketFactory.create_batch(30, assigned_to=agent)
+
+        assert count_queries(many) == count_queries(few)
+
+    def test_assignment_only_queues_no_event(
+        self,
+        agent_api_client,
+        publish,
+        django_capture_on_commit_callbacks,
+    ):
+        ticket = TicketFactory()
+        publish.reset_mock()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = agent_api_client.post(
+                BULK_UPDATE_URL,
+                {"ids": [ticket.id], "changes": {"assigned_to": UserFactory().id}},
+                format="json",
+            )
+
+        assert response.data == {"updated": [ticket.id]}
+        assert not publish.called
+
+    def test_invalidates_cached_lists_and_details(self, agent_api_client, agent):
+        ticket = TicketFactory()
+        detail_url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        list_response = agent_api_client.get(reverse("api:ticket-list"))
+        queue = agent_api_client.get(
+            reverse("api:ticket-list"),
+            {"assigned_to": agent.id},
+        )
+        assert queue.data["count"] == 0
+        agent_api_client.get(detail_url)
+
+        agent_api_client.post(
+            BULK_UPDATE_URL,
+            {
+                "ids": [ticket.id],
+                "changes": {"status": "closed", "assigned_to": agent.id},
+            },
+            format="json",
+        )
+
+        response = agent_api_client.get(reverse("api:ticket-list"))
+        assert response.data["results"][0]["status"] == "closed"
+        assert response["ETag"] != list_response["ETag"]
+        queue = agent_api_client.get(
+            reverse("api:ticket-list"),
+            {"assigned_to": agent.id},
+        )
+        assert queue.data["count"] == 1
+        assert agent_api_client.get(detail_url).data["status"] == "closed"
+
+    @pytest.mark.parametrize(
+        ("changes", "error"),
+        [
+            ({"status": "done"}, "status"),
+            ({"assigned_to": 0}, "assigned_to"),
+            ({"title": "Same title everywhere"}, "title"),
+            ({}, "required"),
+        ],
+    )
+    def test_changes_are_validated(self, agent_api_client, changes, error):
+        ticket = TicketFactory()
+
+        response = agent_api_client.post(
+            BULK_UPDATE_URL,
+            {"ids": [ticket.id], "changes": changes},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert error in str(response.data["changes"])
+
+    def test_missing_ticket_changes_nothing(self, agent_api_client):
+        ticket = TicketFactory()
+
+        response = agent_api_client.post(
+            BULK_UPDATE_URL,
+            {"ids": [ticket.id, ticket.id + 1], "changes": {"status": "closed"}},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert str(ticket.id + 1) in str(response.data["ids"])
+        ticket.refresh_from_db()
+        assert ticket.status == Ticket.Status.OPEN
+
+    def test_too_many_tickets(self, agent_api_client, settings):
+        settings.TICKETS_BULK_UPDATE_MAX_TICKETS = 2
+
+        response = agent_api_client.post(
+            BULK_UPDATE_URL,
+            {"ids": [1, 2, 3], "changes": {"status": "closed"}},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "ids" in response.data
+
+    def test_customer_cannot_bulk_update(self, customer_api_client, customer):
+        ticket = TicketFactory(created_by=customer)
+
+        response = customer_api_client.post(
+            BULK_UPDATE_URL,
+            {"ids": [ticket.id], "changes": {"status": "closed"}},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        ticket.refresh_from_db()
+        assert ticket.status == Ticket.Status.OPEN
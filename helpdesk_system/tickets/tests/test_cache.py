@@ -0,0 +1,482 @@
+import time
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+
+from helpdesk_system.tickets import views
+from helpdesk_system.tickets.cache import CACHE_TTL
+from helpdesk_system.tickets.cache import canonicalize_query_params
+from helpdesk_system.tickets.cache import get_generations
+from helpdesk_system.tickets.cache import get_ticket_detail_cache_key
+from helpdesk_system.tickets.cache import get_ticket_list_cache_key
+from helpdesk_system.tickets.cache import invalidate_all_ticket_list_cache
+from helpdesk_system.tickets.cache import invalidate_ticket_cache
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.users.models import User
+from helpdesk_system.users.tests.factories import CommentFactory
+from helpdesk_system.users.tests.factories import TicketFactory
+from helpdesk_system.users.tests.factories import UserFactory
+
+ALLOWED = ["status", "priority", "search", "page"]
+ALLOWED_QUEUE = ["status", "assigned_to"]
+
+
+class TestCanonicalizeQueryParams:
+    def test_order_and_noise_insensitive(self):
+        first = QueryDict("priority=high&status=open&_=123&search=login%20%20page")
+        second = QueryDict("status=open&search=login+page&priority=high&utm=x")
+
+        first_query = canonicalize_query_params(first, ALLOWED)
+        assert first_query == canonicalize_query_params(second, ALLOWED)
+
+    def test_empty_values_ignored(self):
+        query = canonicalize_query_params(QueryDict("status=&page=2"), ALLOWED)
+        assert query == "page=2"
+
+    def test_repeated_params_keep_their_last_value(self):
+        open_last = canonicalize_query_params(
+            QueryDict("status=closed&status=open"),
+            ALLOWED,
+        )
+        closed_last = canonicalize_query_params(
+            QueryDict("status=open&status=closed"),
+            ALLOWED,
+        )
+
+        assert open_last == canonicalize_query_params(QueryDict("status=open"), ALLOWED)
+        assert closed_last != open_last
+        assert canonicalize_query_params(QueryDict("page=2&page="), ALLOWED) == ""
+
+    def test_multi_valued_params_keep_every_value(self):
+        def canonical(query):
+            return canonicalize_query_params(
+                QueryDict(query),
+                ["fields"],
+                multi_valued_params=["fields"],
+            )
+
+        assert canonical("fields=title&fields=id") == canonical(
+            "fields=id&fields=title",
+        )
+        assert canonical("fields=title&fields=id") != canonical("fields=id")
+
+    def test_different_filters_differ(self):
+        open_query = canonicalize_query_params(QueryDict("status=open"), ALLOWED)
+        assert open_query != canonicalize_query_params(
+            QueryDict("status=closed"),
+            ALLOWED,
+        )
+
+
+@pytest.mark.django_db
+class TestTicketListCache:
+    def test_filtered_list_is_cached(self, agent_api_client, customer):
+        TicketFactory(created_by=customer, status=Ticket.Status.OPEN)
+        url = reverse("api:ticket-list")
+
+        response = agent_api_client.get(url, {"status": "open", "page": 1})
+        assert response.data["count"] == 1
+
+        # Created without signals, so the cache is not invalidated
+        Ticket.objects.bulk_create(
+            [TicketFactory.build(created_by=customer, status=Ticket.Status.OPEN)],
+        )
+
+        response = agent_api_client.get(url, {"page": 1, "status": "open", "x": 1})
+        assert response.data["count"] == 1
+
+    def test_repeated_filter_is_not_shared(self, agent_api_client):
+        TicketFactory(status=Ticket.Status.OPEN)
+        url = reverse("api:ticket-list")
+
+        open_last = agent_api_client.get(f"{url}?status=closed&status=open")
+        closed_last = agent_api_client.get(f"{url}?status=open&status=closed")
+
+        assert open_last.data["count"] == 1
+        assert closed_last.data["count"] == 0
+        assert open_last["ETag"] != closed_last["ETag"]
+
+    def test_update_invalidates_every_variant(self, agent_api_client, customer):
+        ticket = TicketFactory(created_by=customer, status=Ticket.Status.OPEN)
+        url = reverse("api:ticket-list")
+        agent_api_client.get(url, {"status": "open"})
+        agent_api_client.get(url, {"search": ticket.title})
+
+        response = agent_api_client.patch(
+            reverse("api:ticket-detail", kwargs={"pk": ticket.pk}),
+            {"status": "resolved"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = agent_api_client.get(url, {"status": "open"})
+        assert response.data["count"] == 0
+        response = agent_api_client.get(url, {"search": ticket.title})
+        assert response.data["results"][0]["status"] == "resolved"
+
+    def test_scopes_are_isolated(self, customer_api_client, customer, agent):
+        TicketFactory(created_by=customer)
+        TicketFactory()
+
+        assert get_ticket_list_cache_key(customer) != get_ticket_list_cache_key(agent)
+
+        response = customer_api_client.get(reverse("api:ticket-list"))
+        assert response.data["count"] == 1
+
+    def test_invalidate_bumps_creator_and_agent_scopes(self, customer, agent):
+        ticket = TicketFactory(created_by=customer)
+        other = TicketFactory()
+        customer_key = get_ticket_list_cache_key(customer)
+        agent_key = get_ticket_list_cache_key(agent)
+        other_scope = f"customer:{other.created_by_id}"
+        other_generation = get_generations(other_scope)
+
+        invalidate_ticket_cache(ticket)
+
+        assert get_ticket_list_cache_key(customer) != customer_key
+        assert get_ticket_list_cache_key(agent) != agent_key
+        assert get_generations(other_scope) == other_generation
+
+    def test_agent_queue_survives_unrelated_changes(self, agent):
+        queue = QueryDict(f"assigned_to={agent.id}")
+        other_agent = UserFactory(role=User.Role.AGENT)
+        own = TicketFactory(assigned_to=agent)
+        unrelated = TicketFactory(assigned_to=other_agent)
+        queue_key = get_ticket_list_cache_key(agent, queue, ALLOWED_QUEUE)
+        all_key = get_ticket_list_cache_key(agent)
+
+        invalidate_ticket_cache(unrelated)
+
+        assert get_ticket_list_cache_key(agent, queue, ALLOWED_QUEUE) == queue_key
+        assert get_ticket_list_cache_key(agent) != all_key
+
+        invalidate_ticket_cache(own)
+
+        assert get_ticket_list_cache_key(agent, queue, ALLOWED_QUEUE) != queue_key
+
+    def test_reassignment_invalidates_previous_queue(self, agent_api_client, agent):
+        ticket = TicketFactory(assigned_to=agent)
+        other_agent = UserFactory(role=User.Role.AGENT)
+        url = reverse("api:ticket-list")
+        response = agent_api_client.get(url, {"assigned_to": agent.id})
+        assert response.data["count"] == 1
+
+        agent_api_client.patch(
+            reverse("api:ticket-detail", kwargs={"pk": ticket.pk}),
+            {"assigned_to": other_agent.id},
+        )
+
+        response = agent_api_client.get(url, {"assigned_to": agent.id})
+        assert response.data["count"] == 0
+
+    def test_zero_padded_queue_is_invalidated(self, agent_api_client, agent):
+        ticket = TicketFactory(assigned_to=agent)
+        url = reverse("api:ticket-list")
+        padded = {"assigned_to": f"0{agent.id}"}
+        response = agent_api_client.get(url, padded)
+        assert response.data["count"] == 1
+
+        agent_api_client.patch(
+            reverse("api:ticket-detail", kwargs={"pk": ticket.pk}),
+            {"assigned_to": UserFactory(role=User.Role.AGENT).id},
+        )
+
+        response = agent_api_client.get(url, padded)
+        assert response.data["count"] == 0
+
+    def test_generation_keys_expire(self, agent_api_client):
+        ticket = TicketFactory()
+        with (
+            mock.patch.object(cache, "add", wraps=cache.add) as add,
+            mock.patch.object(cache, "set", wraps=cache.set) as set_,
+            mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many,
+        ):
+            agent_api_client.get(reverse("api:ticket-list"))
+            agent_api_client.get(reverse("api:ticket-detail", kwargs={"pk": ticket.pk}))
+            invalidate_ticket_cache(ticket)
+            calls = add.call_args_list + set_.call_args_list + set_many.call_args_list
+
+        assert calls
+        for call in calls:
+            assert call.args[-1] is not None, call
+
+    def test_missing_ticket_creates_no_keys(self, agent_api_client):
+        with mock.patch.object(cache, "add", wraps=cache.add) as add:
+            response = agent_api_client.get(
+                reverse("api:ticket-detail", kwargs={"pk": 999999}),
+            )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not [call for call in add.call_args_list if "999999" in call.args[0]]
+
+    def test_zero_padded_detail_is_invalidated(self, agent_api_client):
+        ticket = TicketFactory()
+        url = reverse("api:ticket-detail", kwargs={"pk": f"0{ticket.pk}"})
+        assert agent_api_client.get(url).data["status"] == "open"
+
+        agent_api_client.patch(
+            reverse("api:ticket-detail", kwargs={"pk": ticket.pk}),
+            {"status": "closed"},
+        )
+
+        assert agent_api_client.get(url).data["status"] == "closed"
+
+    def test_invalidate_all_bumps_global_generation(self, customer, agent):
+        ticket = TicketFactory(created_by=customer)
+        keys = [
+            get_ticket_list_cache_key(customer),
+            get_ticket_list_cache_key(agent),
+            get_ticket_detail_cache_key(ticket.id),
+        ]
+
+        invalidate_all_ticket_list_cache()
+
+        assert get_ticket_list_cache_key(customer) != keys[0]
+        assert get_ticket_list_cache_key(agent) != keys[1]
+        assert get_ticket_detail_cache_key(ticket.id) != keys[2]
+
+
+def _ticket_queries(queries):
+    return [q["sql"] for q in queries if 'FROM "tickets_ticket"' in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestTicketDetailCache:
+    def test_retrieve_served_from_cache(self, customer_api_client, customer):
+        ticket = TicketFactory(created_by=customer)
+        url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        first = customer_api_client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = customer_api_client.get(url)
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data == first.data
+        assert _ticket_queries(queries) == []
+
+    def test_cached_ticket_hidden_from_other_customers(
+        self,
+        customer_api_client,
+        agent_api_client,
+    ):
+        ticket = TicketFactory()
+        url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        # Warm the cache as an agent
+        assert agent_api_client.get(url).status_code == status.HTTP_200_OK
+
+        customer_api_client.force_authenticate(user=UserFactory())
+        response = customer_api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_comment_invalidates_detail(self, customer_api_client, customer):
+        ticket = TicketFactory(created_by=customer)
+        url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        assert customer_api_client.get(url).data["comments"] == []
+
+        customer_api_client.post(
+            reverse("api:comment-list"),
+            {"ticket": ticket.id, "content": "Any news?"},
+        )
+        response = customer_api_client.get(url)
+        assert [c["content"] for c in response.data["comments"]] == ["Any news?"]
+
+        comment = ticket.comments.get()
+        comment.delete()
+        assert customer_api_client.get(url).data["comments"] == []
+
+    def test_update_invalidates_detail(self, agent_api_client):
+        ticket = TicketFactory()
+        url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        agent_api_client.get(url)
+
+        agent_api_client.patch(url, {"status": "in_progress"})
+
+        assert agent_api_client.get(url).data["status"] == "in_progress"
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    def test_unchanged_list_is_not_modified(self, customer_api_client, customer):
+        TicketFactory(created_by=customer)
+        url = reverse("api:ticket-list")
+        first = customer_api_client.get(url, {"status": "open"})
+        assert first["Cache-Control"] == "private, no-cache"
+
+        with CaptureQueriesContext(connection) as queries:
+            second = customer_api_client.get(
+                url,
+                {"status": "open"},
+                HTTP_IF_NONE_MATCH=first["ETag"],
+            )
+
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert second.content == b""
+        assert second["ETag"] == first["ETag"]
+        assert _ticket_queries(queries) == []
+
+    def test_changed_list_is_sent_again(self, agent_api_client):
+        ticket = TicketFactory()
+        url = reverse("api:ticket-list")
+        first = agent_api_client.get(url)
+
+        agent_api_client.patch(
+            reverse("api:ticket-detail", kwargs={"pk": ticket.pk}),
+            {"title": "Changed"},
+        )
+        response = agent_api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["title"] == "Changed"
+        assert response["ETag"] != first["ETag"]
+
+    def test_list_validators_differ_per_query(self, agent_api_client):
+        url = reverse("api:ticket-list")
+        first = agent_api_client.get(url)
+
+        response = agent_api_client.get(
+            url,
+            {"status": "closed"},
+            HTTP_IF_NONE_MATCH=first["ETag"],
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_list_if_modified_since(self, agent_api_client):
+        TicketFactory()
+        url = reverse("api:ticket-list")
+        with mock.patch.object(views, "time") as clock:
+            clock.time.return_value = time.time() + 1
+            first = agent_api_client.get(url)
+
+        response = agent_api_client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_last_modified_waits_for_its_second_to_end(self, agent_api_client):
+        TicketFactory()
+        with mock.patch.object(views, "time") as clock:
+            clock.time.return_value = 0
+            response = agent_api_client.get(reverse("api:ticket-list"))
+
+        assert "Last-Modified" not in response
+        assert response["ETag"]
+
+    def test_change_within_the_second_is_modified(self, agent_api_client):
+        ticket = TicketFactory()
+        url = reverse("api:ticket-list")
+        agent_api_client.get(url)
+        fetched = time.time()
+
+        agent_api_client.patch(
+            reverse("api:ticket-detail", kwargs={"pk": ticket.pk}),
+            {"title": "Changed"},
+        )
+        # What a client fetching earlier in the same second could hold
+        response = agent_api_client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=http_date(int(fetched)),
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["title"] == "Changed"
+
+    def test_cache_unavailable(self, agent_api_client, settings):
+        ticket = TicketFactory(status=Ticket.Status.OPEN)
+        list_url = reverse("api:ticket-list")
+        detail_url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        # As the cache of production ignores its errors when it is down
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        }
+
+        for url, params in [
+            (list_url, {"status": "open"}),
+            (list_url, {"status": "closed"}),
+            (detail_url, {}),
+        ]:
+            first = agent_api_client.get(url, params)
+            response = agent_api_client.get(
+                url,
+                params,
+                HTTP_IF_NONE_MATCH="*",
+                HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 3600),
+            )
+
+            assert first.status_code == status.HTTP_200_OK
+            assert response.status_code == status.HTTP_200_OK
+            assert response.data == first.data
+            assert "ETag" not in response
+            assert "Last-Modified" not in response
+            assert response["Cache-Control"] == "private, no-cache"
+
+    def test_saved_outside_the_api_is_modified(self, agent_api_client):
+        ticket = TicketFactory()
+        urls = [
+            reverse("api:ticket-list"),
+            reverse("api:ticket-detail", kwargs={"pk": ticket.pk}),
+        ]
+        etags = [agent_api_client.get(url)["ETag"] for url in urls]
+
+        ticket.title = "Changed"
+        ticket.save()
+
+        for url, etag in zip(urls, etags, strict=True):
+            response = agent_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_200_OK
+
+    def test_staleness_is_bounded_by_the_cache_ttl(self, agent_api_client):
+        ticket = TicketFactory()
+        url = reverse("api:ticket-list")
+        first = agent_api_client.get(url)
+
+        # Not covered by any generation, e.g. the creator renamed
+        Ticket.objects.filter(id=ticket.id).update(title="Changed")
+        response = agent_api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        with mock.patch("helpdesk_system.tickets.cache.time") as clock:
+            clock.time.return_value = time.time() + CACHE_TTL
+            response = agent_api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["title"] == "Changed"
+
+    def test_unchanged_detail_is_not_modified(self, customer_api_client, customer):
+        ticket = TicketFactory(created_by=customer)
+        url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        first = customer_api_client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = customer_api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert _ticket_queries(queries) == []
+
+        CommentFactory(ticket=ticket)
+        response = customer_api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["comments"]) == 1
+
+    def test_detail_etag_does_not_bypass_scoping(
+        self,
+        customer_api_client,
+        agent_api_client,
+    ):
+        ticket = TicketFactory()
+        url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        etag = agent_api_client.get(url)["ETag"]
+
+        customer_api_client.force_authenticate(user=UserFactory())
+        response = customer_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
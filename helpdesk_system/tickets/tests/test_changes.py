@@ -0,0 +1,219 @@
+import datetime
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django_celery_beat.models import PeriodicTask
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from helpdesk_system.tickets.changes import format_watermark
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.tickets.models import TicketTombstone
+from helpdesk_system.tickets.tasks import prune_ticket_tombstones
+from helpdesk_system.tickets.tests.test_indexes import _explain
+from helpdesk_system.users.tests.factories import CommentFactory
+from helpdesk_system.users.tests.factories import TicketFactory
+
+CHANGES_URL = reverse("api:ticket-changes")
+
+
+@pytest.fixture(autouse=True)
+def _no_settle_time(settings):
+    settings.TICKETS_CHANGES_SETTLE_TIME = 0
+
+
+def poll(client, since=None):
+    response = client.get(CHANGES_URL, {"since": since} if since else {})
+    assert response.status_code == status.HTTP_200_OK
+    return response.data
+
+
+def ids(data):
+    return [ticket["id"] for ticket in data["tickets"]]
+
+
+def touch(ticket, **fields):
+    ticket.title = f"{ticket.title}!"
+    for name, value in fields.items():
+        setattr(ticket, name, value)
+    ticket.save()
+
+
+@pytest.mark.django_db
+class TestTicketChanges:
+    def test_without_since_returns_every_ticket(self, agent_api_client):
+        tickets = TicketFactory.create_batch(3)
+
+        data = poll(agent_api_client)
+
+        assert ids(data) == [ticket.id for ticket in tickets]
+        assert data["deleted"] == []
+        assert not data["has_more"]
+
+    def test_returns_only_changes_since_watermark(self, agent_api_client):
+        _, second, third = TicketFactory.create_batch(3)
+        watermark = poll(agent_api_client)["watermark"]
+
+        touch(second)
+        response = agent_api_client.delete(
+            reverse("api:ticket-detail", kwargs={"pk": third.pk}),
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        data = poll(agent_api_client, watermark)
+
+        assert ids(data) == [second.id]
+        assert data["tickets"][0]["title"] == second.title
+        assert data["deleted"] == [third.id]
+        assert poll(agent_api_client, data["watermark"])["tickets"] == []
+
+    def test_pages_through_changes(self, agent_api_client, settings):
+        settings.TICKETS_CHANGES_PAGE_SIZE = 2
+        tickets = TicketFactory.create_batch(5)
+        # Same timestamp for every ticket, the ID breaks the tie
+        Ticket.objects.update(updated_at=timezone.now())
+
+        seen = []
+        data = {"has_more": True, "watermark": None}
+        while data["has_more"]:
+            data = poll(agent_api_client, data["watermark"])
+            seen.extend(ids(data))
+
+        assert seen == [ticket.id for ticket in tickets]
+
+    def test_comment_activity_is_a_change(self, agent_api_client):
+        ticket = TicketFactory()
+        watermark = poll(agent_api_client)["watermark"]
+
+        comment = CommentFactory(ticket=ticket)
+        data = poll(agent_api_client, watermark)
+        assert ids(data) == [ticket.id]
+        assert data["tickets"][0]["comments_count"] == 1
+
+        comment.delete()
+        data = poll(agent_api_client, data["watermark"])
+        assert ids(data) == [ticket.id]
+        assert data["tickets"][0]["comments_count"] == 0
+
+    def test_customer_only_sees_own_changes(self, customer_api_client, customer, agent):
+        watermark = poll(customer_api_client)["watermark"]
+        own, other = TicketFactory(created_by=customer), TicketFactory()
+        agent_client = APIClient()
+        agent_client.force_authenticate(user=agent)
+        for ticket in (own, other):
+            agent_client.delete(reverse("api:ticket-detail", kwargs={"pk": ticket.pk}))
+        mine = TicketFactory(created_by=customer)
+        TicketFactory()
+
+        data = poll(customer_api_client, watermark)
+
+        assert ids(data) == [mine.id]
+        assert data["deleted"] == [own.id]
+
+    def test_recent_changes_wait_for_settle_time(self, agent_api_client, settings):
+        settings.TICKETS_CHANGES_SETTLE_TIME = 60
+        watermark = poll(agent_api_client)["watermark"]
+        ticket = TicketFactory()
+
+        data = poll(agent_api_client, watermark)
+
+        assert data["tickets"] == []
+        # Still ahead of the watermark once settled
+        settings.TICKETS_CHANGES_SETTLE_TIME = 0
+        assert ids(poll(agent_api_client, data["watermark"])) == [ticket.id]
+
+    def test_expired_watermark_is_gone(self, agent_api_client, settings):
+        since = timezone.now() - datetime.timedelta(
+            seconds=settings.TICKETS_TOMBSTONE_RETENTION + 60,
+        )
+
+        response = agent_api_client.get(
+            CHANGES_URL,
+            {"since": format_watermark((since, 0))},
+        )
+
+        assert response.status_code == status.HTTP_410_GONE
+
+    def test_invalid_watermark(self, agent_api_client):
+        response = agent_api_client.get(CHANGES_URL, {"since": "yesterday"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_prune_ticket_tombstones(self, settings, customer):
+        old = TicketTombstone.objects.create(ticket_id=1, created_by=customer)
+        TicketTombstone.objects.filter(pk=old.pk).update(
+            deleted_at=timezone.now()
+            - datetime.timedelta(seconds=settings.TICKETS_TOMBSTONE_RETENTION + 1),
+        )
+        recent = TicketTombstone.objects.create(ticket_id=2, created_by=customer)
+
+        assert prune_ticket_tombstones() == 1
+        assert list(TicketTombstone.objects.all()) == [recent]
+
+    def test_prune_is_scheduled_daily(self):
+        migration = import_module(
+            "helpdesk_system.tickets.migrations.0008_schedule_prune_ticket_tombstones",
+        )
+        # Run again, as tests with transaction=True flush the migrated rows
+        migration.schedule_prune(apps, None)
+        migration.schedule_prune(apps, None)
+
+        (task,) = PeriodicTask.objects.filter(task=migration.TASK)
+        assert task.enabled
+        assert (task.crontab.hour, task.crontab.day_of_week) == ("3", "*")
+        assert task.task == prune_ticket_tombstones.name
+
+
+@pytest.mark.django_db
+class TestTicketChangesIndexes:
+    """Polls are range scans on the change indexes, never a full scan."""
+
+    def assert_uses_index(self, client, table, index):
+        watermark = poll(client)["watermark"]
+        # Other customers' tickets change within the poll window too, so the
+        # index on the window alone is not as cheap as the creator's one
+        for ticket in TicketFactory.create_batch(20):
+            TicketTombstone.objects.create(
+                ticket_id=ticket.id,
+                created_by=ticket.created_by,
+            )
+        with CaptureQueriesContext(connection) as context:
+            poll(client, watermark)
+        queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if f'FROM "{table}"' in query["sql"]
+        ]
+        assert queries
+        for sql in queries:
+            plan = _explain(sql)
+            assert index in plan, plan
+            assert "Sort Key" not in plan, plan
+
+    def test_agent_changes(self, agent_api_client):
+        self.assert_uses_index(
+            agent_api_client,
+            "tickets_ticket",
+            "tickets_changes_idx",
+        )
+        self.assert_uses_index(
+            agent_api_client,
+            "tickets_tickettombstone",
+            "tickets_tombstone_idx",
+        )
+
+    def test_customer_changes(self, customer_api_client):
+        self.assert_uses_index(
+            customer_api_client,
+            "tickets_ticket",
+            "tickets_creator_changes_idx",
+        )
+        self.assert_uses_index(
+            customer_api_client,
+            "tickets_tickettombstone",
+            "tickets_tombstone_creator_idx",
+        )
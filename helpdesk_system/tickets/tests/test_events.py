@@ -0,0 +1,225 @@
+from unittest import mock
+
+import pytest
+from django.db import transaction
+
+from helpdesk_system.emails.models import EmailLog
+from helpdesk_system.emails.tasks import send_comment_added_email
+from helpdesk_system.emails.tasks import send_status_changed_email
+from helpdesk_system.emails.tasks import send_ticket_created_email
+from helpdesk_system.tickets import tasks
+from helpdesk_system.tickets.events import COMMENT_ADDED
+from helpdesk_system.tickets.events import STATUS_CHANGED
+from helpdesk_system.tickets.events import TICKET_CREATED
+from helpdesk_system.tickets.events import queue_event
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.users.tests.factories import CommentFactory
+from helpdesk_system.users.tests.factories import TicketFactory
+
+
+@pytest.fixture
+def publish():
+    with mock.patch.object(tasks.dispatch_ticket_events, "delay") as delay:
+        yield delay
+
+
+@pytest.mark.django_db
+class TestQueueEvent:
+    def test_events_are_published_once_on_commit(
+        self,
+        publish,
+        customer,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            ticket = TicketFactory(created_by=customer)
+            ticket.status = Ticket.Status.IN_PROGRESS
+            ticket.save()
+            comment = CommentFactory(ticket=ticket)
+            assert not publish.called
+
+        publish.assert_called_once_with(
+            [
+                {"type": TICKET_CREATED, "ticket_id": ticket.id},
+                {
+                    "type": STATUS_CHANGED,
+                    "ticket_id": ticket.id,
+                    "old_status": Ticket.Status.OPEN,
+                },
+                {"type": COMMENT_ADDED, "comment_id": comment.id},
+            ],
+        )
+
+    def test_rolled_back_savepoint_drops_its_events(
+        self,
+        publish,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            queue_event(TICKET_CREATED, ticket_id=1)
+            try:
+                with transaction.atomic():
+                    queue_event(TICKET_CREATED, ticket_id=2)
+                    raise RuntimeError  # noqa: TRY301
+            except RuntimeError:
+                pass
+            with transaction.atomic():
+                queue_event(TICKET_CREATED, ticket_id=3)
+
+        # The first hook cannot know whether the savepoint after it survives
+        assert publish.call_args_list == [
+            mock.call([{"type": TICKET_CREATED, "ticket_id": 1}]),
+            mock.call([{"type": TICKET_CREATED, "ticket_id": 3}]),
+        ]
+
+    def test_savepoint_events_join_the_events_after_it(
+        self,
+        publish,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                queue_event(TICKET_CREATED, ticket_id=1)
+                with transaction.atomic():
+                    queue_event(TICKET_CREATED, ticket_id=2)
+            queue_event(TICKET_CREATED, ticket_id=3)
+
+        publish.assert_called_once_with(
+            [
+                {"type": TICKET_CREATED, "ticket_id": 1},
+                {"type": TICKET_CREATED, "ticket_id": 2},
+                {"type": TICKET_CREATED, "ticket_id": 3},
+            ],
+        )
+
+    def test_rolled_back_outer_savepoint_drops_nested_events(
+        self,
+        publish,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    with transaction.atomic():
+                        queue_event(TICKET_CREATED, ticket_id=1)
+                    raise RuntimeError  # noqa: TRY301
+            except RuntimeError:
+                pass
+            queue_event(TICKET_CREATED, ticket_id=2)
+
+        publish.assert_called_once_with([{"type": TICKET_CREATED, "ticket_id": 2}])
+
+    def test_rolled_back_first_savepoint(
+        self,
+        publish,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    queue_event(TICKET_CREATED, ticket_id=1)
+                    raise RuntimeError  # noqa: TRY301
+            except RuntimeError:
+                pass
+            queue_event(TICKET_CREATED, ticket_id=2)
+
+        publish.assert_called_once_with([{"type": TICKET_CREATED, "ticket_id": 2}])
+
+    def test_nothing_published_without_events(
+        self,
+        publish,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            transaction.on_commit(lambda: None)
+
+        assert not publish.called
+
+    @pytest.mark.django_db(transaction=True)
+    def test_published_immediately_outside_transaction(self, publish):
+        queue_event(TICKET_CREATED, ticket_id=1)
+
+        publish.assert_called_once_with([{"type": TICKET_CREATED, "ticket_id": 1}])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_each_transaction_publishes_its_own_batch(self, publish):
+        with transaction.atomic():
+            queue_event(TICKET_CREATED, ticket_id=1)
+        with transaction.atomic():
+            queue_event(TICKET_CREATED, ticket_id=2)
+
+        assert publish.call_args_list == [
+            mock.call([{"type": TICKET_CREATED, "ticket_id": 1}]),
+            mock.call([{"type": TICKET_CREATED, "ticket_id": 2}]),
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rolled_back_transaction_is_forgotten(self, publish):
+        try:
+            with transaction.atomic():
+                queue_event(TICKET_CREATED, ticket_id=1)
+                raise RuntimeError  # noqa: TRY301
+        except RuntimeError:
+            pass
+        with transaction.atomic():
+            queue_event(TICKET_CREATED, ticket_id=2)
+
+        publish.assert_called_once_with([{"type": TICKET_CREATED, "ticket_id": 2}])
+
+
+@pytest.mark.django_db
+class TestDispatchTicketEvents:
+    def test_sends_emails_and_notifications(self, customer, agent):
+        ticket = TicketFactory(created_by=customer, assigned_to=agent)
+        comment = CommentFactory(ticket=ticket, author=agent)
+
+        with (
+            mock.patch.object(tasks, "group") as group,
+            mock.patch.object(tasks, "NotificationService") as service,
+        ):
+            tasks.dispatch_ticket_events(
+                [
+                    {"type": TICKET_CREATED, "ticket_id": ticket.id},
+                    {"type": COMMENT_ADDED, "comment_id": comment.id},
+                ],
+            )
+
+        group.return_value.delay.assert_called_once_with()
+        emails = list(group.call_args.args[0])
+        assert emails == [
+            send_ticket_created_email.si(ticket.id),
+            send_comment_added_email.si(comment.id),
+        ]
+        with mock.patch("helpdesk_system.emails.tasks.dispatch_email_batches"):
+            for email in emails:
+                email.apply()
+        assert EmailLog.objects.filter(ticket=ticket).exists()
+        service.notify_ticket_created.assert_called_once_with(ticket)
+        service.notify_comment_added.assert_called_once_with(comment)
+
+    def test_failing_event_does_not_drop_the_batch(self, customer):
+        ticket = TicketFactory(created_by=customer)
+
+        with (
+            mock.patch.object(tasks, "group") as group,
+            mock.patch.object(tasks, "NotificationService") as service,
+        ):
+            tasks.dispatch_ticket_events(
+                [
+                    {"type": COMMENT_ADDED, "comment_id": 0},
+                    {
+                        "type": STATUS_CHANGED,
+                        "ticket_id": ticket.id,
+                        "old_status": Ticket.Status.OPEN,
+                    },
+                ],
+            )
+
+        service.notify_status_changed.assert_called_once_with(
+            ticket,
+            Ticket.Status.OPEN,
+        )
+        assert list(group.call_args.args[0]) == [
+            send_comment_added_email.si(0),
+            send_status_changed_email.si(ticket.id, Ticket.Status.OPEN),
+        ]
@@ -0,0 +1,225 @@
+import pytest
+from django.contrib.postgres.search import SearchRank
+from django.db import connection
+from django.db.models import F
+from django.urls import reverse
+from rest_framework import status
+
+from helpdesk_system.tickets.filters import get_search_query
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.users.tests.factories import CommentFactory
+from helpdesk_system.users.tests.factories import TicketFactory
+
+
+def _search(client, **params):
+    response = client.get(reverse("api:ticket-list"), params)
+    return [ticket["id"] for ticket in response.data["results"]]
+
+
+@pytest.mark.django_db
+class TestTicketSearchFilter:
+    def test_title_match_ranks_above_description(self, agent_api_client):
+        in_description = TicketFactory(
+            title="Cannot open page",
+            description="The invoice export is broken",
+        )
+        in_title = TicketFactory(title="Invoice export broken", description="Help")
+        TicketFactory(title="Unrelated", description="Nothing to see")
+
+        assert _search(agent_api_client, search="invoice") == [
+            in_title.id,
+            in_description.id,
+        ]
+
+    def test_matches_word_variants(self, agent_api_client):
+        ticket = TicketFactory(title="Payments are failing", description="Details")
+
+        assert _search(agent_api_client, search="payment failed") == [ticket.id]
+
+    def test_websearch_syntax(self, agent_api_client):
+        login = TicketFactory(title="Login error", description="Details")
+        TicketFactory(title="Login error on mobile", description="Details")
+
+        assert _search(agent_api_client, search="login -mobile") == [login.id]
+
+    def test_search_vector_follows_title_updates(self, agent_api_client):
+        ticket = TicketFactory(title="Printer jam", description="Details")
+        Ticket.objects.filter(pk=ticket.pk).update(title="Scanner jam")
+
+        assert _search(agent_api_client, search="scanner") == [ticket.id]
+        assert _search(agent_api_client, search="printer") == []
+
+    def test_cursor_pages_by_rank(self, agent_api_client):
+        # Ranks that differ in the last digits of their float4 value
+        for i in range(33):
+            TicketFactory(
+                title=f"Printer jam {i}",
+                description=" ".join(["printer"] * (i % 7) + ["paper"] * i),
+            )
+        url = reverse("api:ticket-list")
+
+        ids = []
+        response = agent_api_client.get(
+            url,
+            {"pagination": "cursor", "search": "printer jam"},
+        )
+        while True:
+            ids.extend(ticket["id"] for ticket in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = agent_api_client.get(response.data["next"])
+
+        query = get_search_query("printer jam")
+        expected = list(
+            Ticket.objects.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created_at", "-id")
+            .values_list("id", flat=True),
+        )
+        assert len(ids) == 33  # noqa: PLR2004
+        assert ids == expected
+
+    def test_explicit_ordering_overrides_rank(self, agent_api_client):
+        older = TicketFactory(title="Invoice invoice invoice", description="x")
+        newer = TicketFactory(title="Other", description="invoice")
+
+        assert _search(agent_api_client, search="invoice", ordering="-created_at") == [
+            newer.id,
+            older.id,
+        ]
+
+    def test_icontains_backend(self, agent_api_client, settings):
+        settings.TICKETS_SEARCH_BACKEND = "icontains"
+        ticket = TicketFactory(title="Logins are slow", description="Details")
+
+        # Substring match, which full-text search would not find
+        assert _search(agent_api_client, search="ogin") == [ticket.id]
+
+    def test_trigram_fallback_tolerates_typos(self, agent_api_client, settings):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                pytest.skip("pg_trgm extension is not installed")
+        settings.TICKETS_SEARCH_TRIGRAM_FALLBACK = True
+        ticket = TicketFactory(title="Password reset", description="Details")
+
+        assert _search(agent_api_client, search="pasword") == [ticket.id]
+
+
+@pytest.mark.django_db
+class TestTicketOrderingFilter:
+    def test_priority_orders_by_severity(self, agent_api_client):
+        tickets = {
+            priority: TicketFactory(priority=priority)
+            for priority in ["high", "low", "urgent", "medium"]
+        }
+
+        assert _search(agent_api_client, ordering="-priority") == [
+            tickets["urgent"].id,
+            tickets["high"].id,
+            tickets["medium"].id,
+            tickets["low"].id,
+        ]
+        assert _search(agent_api_client, ordering="priority") == [
+            tickets["low"].id,
+            tickets["medium"].id,
+            tickets["high"].id,
+            tickets["urgent"].id,
+        ]
+
+    def test_priority_ties_newest_first(self, agent_api_client):
+        older = TicketFactory(priority="urgent")
+        newer = TicketFactory(priority="urgent")
+        low = TicketFactory(priority="low")
+
+        assert _search(agent_api_client, ordering="-priority") == [
+            newer.id,
+            older.id,
+            low.id,
+        ]
+
+    def test_priority_rank_follows_updates(self, agent_api_client):
+        ticket = TicketFactory(priority="low")
+        TicketFactory(priority="high")
+        Ticket.objects.filter(pk=ticket.pk).update(priority="urgent")
+
+        assert _search(agent_api_client, ordering="-priority")[0] == ticket.id
+
+
+def _search_all(client, **params):
+    response = client.get(reverse("api:ticket-search"), params)
+    assert response.status_code == status.HTTP_200_OK, response.data
+    return response.data["results"]
+
+
+@pytest.mark.django_db
+class TestTicketCommentSearch:
+    def test_finds_tickets_by_comment(self, agent_api_client):
+        ticket = TicketFactory(title="Cannot log in", description="Details")
+        comment = CommentFactory(
+            ticket=ticket,
+            content="The refund was issued to the wrong card",
+        )
+        TicketFactory(title="Unrelated", description="Nothing to see")
+
+        [result] = _search_all(agent_api_client, search="refunds")
+
+        assert result["id"] == ticket.id
+        assert result["matched_comment"] == comment.id
+        assert "<mark>refund</mark>" in result["snippet"]
+
+    def test_ticket_match_ranks_above_comment_match(self, agent_api_client):
+        in_comment = TicketFactory(title="Cannot log in", description="Details")
+        CommentFactory(ticket=in_comment, content="Still waiting for the invoice")
+        in_title = TicketFactory(title="Invoice missing", description="Details")
+
+        results = _search_all(agent_api_client, search="invoice")
+
+        assert [result["id"] for result in results] == [in_title.id, in_comment.id]
+        assert results[0]["matched_comment"] is None
+        assert "<mark>Invoice</mark>" in results[0]["snippet"]
+        assert results[0]["search_rank"] > results[1]["search_rank"]
+
+    def test_ticket_matched_by_several_comments_is_listed_once(
+        self,
+        agent_api_client,
+    ):
+        ticket = TicketFactory(title="Cannot log in", description="Details")
+        CommentFactory.create_batch(3, ticket=ticket, content="Printer offline")
+
+        results = _search_all(agent_api_client, search="printer")
+
+        assert [result["id"] for result in results] == [ticket.id]
+
+    def test_snippet_is_html_escaped(self, agent_api_client):
+        ticket = TicketFactory(title="Cannot log in", description="Details")
+        CommentFactory(ticket=ticket, content="Refund if 2 < 3 & <b>credit</b>")
+
+        [result] = _search_all(agent_api_client, search="refund")
+
+        assert result["snippet"].startswith("<mark>Refund</mark> if 2 &lt; 3 &amp;")
+        assert "<b>" not in result["snippet"]
+
+    def test_applies_list_filters(self, agent_api_client):
+        open_ticket = TicketFactory(title="Printer jam", status=Ticket.Status.OPEN)
+        TicketFactory(title="Printer jam", status=Ticket.Status.CLOSED)
+
+        results = _search_all(agent_api_client, search="printer", status="open")
+
+        assert [result["id"] for result in results] == [open_ticket.id]
+
+    def test_customer_only_finds_own_tickets(self, customer_api_client, customer):
+        own = TicketFactory(created_by=customer, title="Cannot log in")
+        CommentFactory(ticket=own, content="Password reset email never came")
+        other = TicketFactory(title="Cannot log in")
+        CommentFactory(ticket=other, content="Password reset email never came")
+
+        results = _search_all(customer_api_client, search="password")
+
+        assert [result["id"] for result in results] == [own.id]
+
+    def test_requires_search_term(self, agent_api_client):
+        response = agent_api_client.get(reverse("api:ticket-search"), {"search": " "})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "search" in response.data
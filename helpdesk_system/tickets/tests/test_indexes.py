@@ -0,0 +1,150 @@
+from itertools import product
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.users.models import User
+from helpdesk_system.users.tests.factories import TicketFactory
+from helpdesk_system.users.tests.factories import UserFactory
+
+
+def _list_queries(client, params):
+    """Run a ticket list request and return the SQL of its ticket queries."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(reverse("api:ticket-list"), params)
+    assert response.status_code == status.HTTP_200_OK
+    return [
+        query["sql"]
+        for query in context.captured_queries
+        if 'FROM "tickets_ticket"' in query["sql"]
+    ]
+
+
+def _explain(sql):
+    # With sequential scans and explicit sorts priced out, the planner only
+    # falls back to them when no index can serve the query. Which index it
+    # picks does depend on the statistics, and ANALYZE keeps the row counts
+    # of earlier tests past their rollback, so they are refreshed first.
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE tickets_ticket, tickets_tickettombstone, users_user")
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("SET LOCAL enable_sort = off")
+        cursor.execute(f"EXPLAIN {sql}")
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        cursor.execute("RESET enable_seqscan")
+        cursor.execute("RESET enable_sort")
+    return plan
+
+
+@pytest.mark.django_db
+class TestTicketListIndexes:
+    """
+    EXPLAIN the canonical TicketViewSet list queries.
+
+    Each combination of filterset_fields and ordering that the UI issues must
+    be served by an index, so dropping or reshaping one fails here instead
+    of turning into a sequential scan in production.
+    """
+
+    @pytest.fixture(autouse=True)
+    def _tickets(self, customer, agent):
+        for ticket_status in Ticket.Status.values:
+            TicketFactory(
+                created_by=customer,
+                assigned_to=agent,
+                status=ticket_status,
+                priority=Ticket.Priority.URGENT,
+            )
+        # Many more tickets of other users, mostly closed as in production,
+        # so each filter is selective and its index the cheapest to the page
+        other_customer = UserFactory(role=User.Role.CUSTOMER)
+        for priority, other_agent in product(
+            Ticket.Priority.values,
+            UserFactory.create_batch(3, role=User.Role.AGENT),
+        ):
+            others = {
+                "created_by": other_customer,
+                "assigned_to": other_agent,
+                "priority": priority,
+            }
+            TicketFactory.create_batch(10, status=Ticket.Status.CLOSED, **others)
+            TicketFactory(status=Ticket.Status.OPEN, **others)
+            TicketFactory(status=Ticket.Status.IN_PROGRESS, **others)
+        # And an agent queue that is mostly closed, where only the status in
+        # the index finds the few tickets still in progress without a filter
+        TicketFactory.create_batch(
+            30,
+            created_by=other_customer,
+            assigned_to=agent,
+            status=Ticket.Status.CLOSED,
+        )
+
+    def assert_uses_index(self, client, params, index):
+        queries = _list_queries(client, params)
+        assert any("ORDER BY" in sql for sql in queries)
+        for sql in queries:
+            plan = _explain(sql)
+            assert "Seq Scan on tickets_ticket" not in plan, plan
+            # Any index can count rows, the page must be read in index order
+            if "ORDER BY" in sql:
+                assert index in plan, plan
+                assert "Sort Key" not in plan, plan
+
+    def test_agent_list(self, agent_api_client):
+        self.assert_uses_index(agent_api_client, {}, "tickets_recent_idx")
+
+    def test_customer_list(self, customer_api_client):
+        self.assert_uses_index(customer_api_client, {}, "tickets_creator_recent_idx")
+
+    def test_customer_list_cursor(self, customer_api_client):
+        self.assert_uses_index(
+            customer_api_client,
+            {"pagination": "cursor"},
+            "tickets_creator_recent_idx",
+        )
+
+    def test_status_filter(self, agent_api_client):
+        self.assert_uses_index(
+            agent_api_client,
+            {"status": "open"},
+            "tickets_status_recent_idx",
+        )
+
+    def test_agent_queue(self, agent_api_client, agent):
+        self.assert_uses_index(
+            agent_api_client,
+            {"assigned_to": agent.id},
+            "tickets_assignee_queue_idx",
+        )
+
+    def test_agent_queue_by_status(self, agent_api_client, agent):
+        self.assert_uses_index(
+            agent_api_client,
+            {"assigned_to": agent.id, "status": "in_progress"},
+            "tickets_assignee_recent_idx",
+        )
+
+    def test_active_priority_triage(self, agent_api_client):
+        self.assert_uses_index(
+            agent_api_client,
+            {"priority": "urgent", "status": "open"},
+            "tickets_active_priority_idx",
+        )
+
+    def test_priority_ordering(self, agent_api_client):
+        self.assert_uses_index(
+            agent_api_client,
+            {"ordering": "-priority"},
+            "tickets_priority_rank_idx",
+        )
+
+    def test_priority_ordering_cursor(self, agent_api_client):
+        self.assert_uses_index(
+            agent_api_client,
+            {"ordering": "-priority", "pagination": "cursor"},
+            "tickets_priority_rank_idx",
+        )
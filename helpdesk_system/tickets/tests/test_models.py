@@ -1,9 +1,14 @@
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
 
+from helpdesk_system.tickets.cache import get_ticket_list_cache_key
 from helpdesk_system.tickets.models import Comment
 from helpdesk_system.tickets.models import Ticket
 from helpdesk_system.users.tests.factories import CommentFactory
 from helpdesk_system.users.tests.factories import TicketFactory
+from helpdesk_system.users.tests.factories import UserFactory
 
 
 @pytest.mark.django_db
@@ -55,3 +60,80 @@ class TestCommentModel:
         assert comment.id is not None
         assert comment.ticket is not None
         assert comment.author is not None
+
+
+@pytest.mark.django_db
+class TestTicketCommentStats:
+    def test_comment_created_updates_counters(self):
+        ticket = TicketFactory()
+        first = CommentFactory(ticket=ticket)
+        second = CommentFactory(ticket=ticket)
+
+        ticket.refresh_from_db()
+        assert ticket.comments_count == 2  # noqa: PLR2004
+        assert ticket.last_comment_at == max(first.created_at, second.created_at)
+
+    def test_comment_deleted_updates_counters(self):
+        ticket = TicketFactory()
+        first = CommentFactory(ticket=ticket)
+        second = CommentFactory(ticket=ticket)
+
+        second.delete()
+        ticket.refresh_from_db()
+        assert ticket.comments_count == 1
+        assert ticket.last_comment_at == first.created_at
+
+        first.delete()
+        ticket.refresh_from_db()
+        assert ticket.comments_count == 0
+        assert ticket.last_comment_at is None
+
+    def test_cascade_delete_from_author_updates_counters(self, customer):
+        ticket = TicketFactory(created_by=customer)
+        CommentFactory(ticket=ticket)
+        other_author_comment = CommentFactory(ticket=ticket, author=UserFactory())
+
+        other_author_comment.author.delete()
+
+        ticket.refresh_from_db()
+        assert ticket.comments_count == 1
+
+    def test_ticket_delete_with_comments(self):
+        ticket = TicketFactory()
+        CommentFactory.create_batch(3, ticket=ticket)
+
+        ticket.delete()
+
+        assert not Comment.objects.exists()
+
+    def test_refresh_comment_stats_after_bulk_create(self):
+        ticket = TicketFactory()
+        Comment.objects.bulk_create(
+            Comment(ticket=ticket, author=ticket.created_by, content="Bulk")
+            for _ in range(3)
+        )
+        assert Ticket.objects.with_comment_stats_drift().get() == ticket
+
+        Ticket.objects.refresh_comment_stats()
+
+        ticket.refresh_from_db()
+        assert ticket.comments_count == 3  # noqa: PLR2004
+        assert ticket.last_comment_at is not None
+        assert not Ticket.objects.with_comment_stats_drift().exists()
+
+    def test_sync_comment_stats_command(self):
+        drifted = TicketFactory()
+        in_sync = TicketFactory()
+        CommentFactory(ticket=drifted)
+        CommentFactory(ticket=in_sync)
+        Ticket.objects.filter(pk=drifted.pk).update(comments_count=7)
+
+        call_command("sync_comment_stats", "--dry-run", stdout=StringIO())
+        drifted.refresh_from_db()
+        assert drifted.comments_count == 7  # noqa: PLR2004
+
+        key = get_ticket_list_cache_key(drifted.created_by)
+        call_command("sync_comment_stats", batch_size=1, stdout=StringIO())
+        drifted.refresh_from_db()
+        assert drifted.comments_count == 1
+        assert get_ticket_list_cache_key(drifted.created_by) != key
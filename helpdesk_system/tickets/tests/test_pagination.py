@@ -0,0 +1,217 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from helpdesk_system.tickets.models import PRIORITY_RANK
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.users.tests.factories import TicketFactory
+
+
+def _walk_cursor_pages(client, params):
+    url = reverse("api:ticket-list")
+    ids = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        ids.extend(ticket["id"] for ticket in response.data["results"])
+        if not response.data["next"]:
+            return ids
+        response = client.get(response.data["next"])
+
+
+@pytest.mark.django_db
+class TestTicketCursorPagination:
+    def test_cursor_pages_cover_all_tickets_once(self, agent_api_client, customer):
+        tickets = TicketFactory.create_batch(45, created_by=customer)
+        # Identical timestamps force the id tie-breaker to be used
+        Ticket.objects.filter(id__in=[t.id for t in tickets[:30]]).update(
+            created_at=timezone.now(),
+        )
+
+        ids = _walk_cursor_pages(agent_api_client, {"pagination": "cursor"})
+
+        expected = list(
+            Ticket.objects.order_by("-created_at", "-id").values_list("id", flat=True),
+        )
+        assert ids == expected
+
+    def test_cursor_respects_ordering_param(self, agent_api_client, customer):
+        TicketFactory.create_batch(25, created_by=customer)
+
+        ids = _walk_cursor_pages(
+            agent_api_client,
+            {"pagination": "cursor", "ordering": "updated_at"},
+        )
+
+        expected = list(
+            Ticket.objects.order_by("updated_at", "id").values_list("id", flat=True),
+        )
+        assert ids == expected
+
+    def test_cursor_priority_ordering(self, agent_api_client, customer):
+        for priority in Ticket.Priority.values:
+            TicketFactory.create_batch(6, created_by=customer, priority=priority)
+
+        ids = _walk_cursor_pages(
+            agent_api_client,
+            {"pagination": "cursor", "ordering": "-priority"},
+        )
+
+        expected = list(
+            Ticket.objects.annotate(priority_rank=PRIORITY_RANK)
+            .order_by(
+                "-priority_rank",
+                "-created_at",
+                "-id",
+            )
+            .values_list("id", flat=True),
+        )
+        assert ids == expected
+
+    @pytest.mark.parametrize(
+        ("ordering", "order_by"),
+        [
+            (None, ("-created_at", "-id")),
+            ("updated_at", ("updated_at", "id")),
+            ("-priority", ("-priority_rank", "-created_at", "-id")),
+        ],
+    )
+    def test_cursor_with_sparse_fields(
+        self,
+        agent_api_client,
+        customer,
+        ordering,
+        order_by,
+    ):
+        for priority in Ticket.Priority.values:
+            TicketFactory.create_batch(6, created_by=customer, priority=priority)
+        params = {"pagination": "cursor", "fields": "id,title"}
+        if ordering:
+            params["ordering"] = ordering
+
+        ids = _walk_cursor_pages(agent_api_client, params)
+
+        expected = list(
+            Ticket.objects.annotate(priority_rank=PRIORITY_RANK)
+            .order_by(*order_by)
+            .values_list("id", flat=True),
+        )
+        assert ids == expected
+
+    def test_cursor_without_ordering_fields(self, agent_api_client, customer):
+        TicketFactory.create_batch(25, created_by=customer)
+
+        response = agent_api_client.get(
+            reverse("api:ticket-list"),
+            {"pagination": "cursor", "fields": "title"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [list(ticket) for ticket in response.data["results"]] == [
+            ["title"],
+        ] * 20
+        assert response.data["next"]
+
+    def test_previous_link_returns_previous_page(self, agent_api_client, customer):
+        TicketFactory.create_batch(25, created_by=customer)
+        url = reverse("api:ticket-list")
+
+        first = agent_api_client.get(url, {"pagination": "cursor"})
+        second = agent_api_client.get(first.data["next"])
+        back = agent_api_client.get(second.data["previous"])
+
+        assert [t["id"] for t in back.data["results"]] == [
+            t["id"] for t in first.data["results"]
+        ]
+
+    def test_cursor_count_opt_out(self, agent_api_client, customer):
+        TicketFactory.create_batch(3, created_by=customer)
+        url = reverse("api:ticket-list")
+
+        response = agent_api_client.get(url, {"pagination": "cursor"})
+        assert response.data["count"] == 3  # noqa: PLR2004
+
+        response = agent_api_client.get(url, {"pagination": "cursor", "count": "false"})
+        assert "count" not in response.data
+        assert len(response.data["results"]) == 3  # noqa: PLR2004
+
+    def test_cursor_mode_from_settings(self, agent_api_client, customer, settings):
+        settings.TICKETS_PAGINATION_MODE = "cursor"
+        TicketFactory.create_batch(3, created_by=customer)
+
+        response = agent_api_client.get(reverse("api:ticket-list"), {"count": "0"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "count" not in response.data
+        assert "next" in response.data
+
+    def test_cursor_scoped_to_customer(self, customer_api_client, customer):
+        own = TicketFactory.create_batch(3, created_by=customer)
+        TicketFactory.create_batch(2)
+
+        ids = _walk_cursor_pages(customer_api_client, {"pagination": "cursor"})
+
+        assert sorted(ids) == sorted(t.id for t in own)
+
+    def test_invalid_cursor(self, agent_api_client):
+        response = agent_api_client.get(
+            reverse("api:ticket-list"),
+            {"pagination": "cursor", "cursor": "cD1ub3QtYS1wb3NpdGlvbg=="},
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestTicketPageNumberPagination:
+    def test_page_count_opt_out(self, agent_api_client, customer):
+        TicketFactory.create_batch(25, created_by=customer)
+        url = reverse("api:ticket-list")
+
+        response = agent_api_client.get(url, {"count": "false"})
+
+        assert response.data["count"] is None
+        assert len(response.data["results"]) == 20  # noqa: PLR2004
+        assert response.data["previous"] is None
+
+        response = agent_api_client.get(response.data["next"])
+
+        assert len(response.data["results"]) == 5  # noqa: PLR2004
+        assert response.data["next"] is None
+        assert response.data["previous"] is not None
+
+    @pytest.mark.parametrize("page", ["abc", "0", "-1", "last"])
+    def test_count_opt_out_invalid_page(self, agent_api_client, customer, page):
+        TicketFactory.create_batch(3, created_by=customer)
+
+        response = agent_api_client.get(
+            reverse("api:ticket-list"),
+            {"count": "false", "page": page},
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_count_opt_out_page_past_the_end(self, agent_api_client, customer):
+        TicketFactory.create_batch(3, created_by=customer)
+        url = reverse("api:ticket-list")
+
+        response = agent_api_client.get(url, {"count": "false", "page": 2})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        counted = agent_api_client.get(url, {"count": "true", "page": 2})
+        assert counted.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_count_opt_out_empty_first_page(self, agent_api_client):
+        response = agent_api_client.get(reverse("api:ticket-list"), {"count": "false"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == []
+
+
+def test_paginated_schema_documents_both_styles(admin_client):
+    response = admin_client.get(reverse("api-schema"), {"format": "json"})
+
+    schemas = response.json()["components"]["schemas"]
+    page_schema, cursor_schema = schemas["PaginatedTicketListList"]["anyOf"]
+    assert "page=4" in page_schema["properties"]["next"]["example"]
+    assert "cursor=" in cursor_schema["properties"]["next"]["example"]
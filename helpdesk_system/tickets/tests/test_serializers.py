@@ -0,0 +1,71 @@
+import zoneinfo
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from helpdesk_system.tickets.models import Ticket
+from helpdesk_system.tickets.renderers import ORJSONRenderer
+from helpdesk_system.tickets.serializers import TicketListSerializer
+from helpdesk_system.tickets.serializers import compile_values_serializer
+from helpdesk_system.users.tests.factories import CommentFactory
+from helpdesk_system.users.tests.factories import TicketFactory
+
+
+def serialize_both():
+    queryset = Ticket.objects.order_by("id")
+    columns, serialize_rows = compile_values_serializer(TicketListSerializer)
+    compiled = serialize_rows(list(queryset.values(*columns)))
+    expected = TicketListSerializer(queryset, many=True).data
+    return compiled, expected
+
+
+@pytest.mark.django_db
+class TestCompileValuesSerializer:
+    def test_matches_serializer(self, agent):
+        TicketFactory(assigned_to=agent, title="Ünïcode \u2028 title")
+        CommentFactory(ticket=TicketFactory())
+
+        compiled, expected = serialize_both()
+
+        assert compiled == expected
+        assert JSONRenderer().render(expected) == ORJSONRenderer().render(compiled)
+
+    def test_honours_current_timezone(self):
+        TicketFactory()
+
+        with timezone.override(zoneinfo.ZoneInfo("Europe/Paris")):
+            compiled, expected = serialize_both()
+
+        assert compiled == expected
+        assert not compiled[0]["created_at"].endswith("Z")
+
+
+@pytest.mark.django_db
+class TestListFastPath:
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {},
+            {"ordering": "priority", "pagination": "cursor"},
+            {"search": "printer", "pagination": "cursor"},
+            {"status": "open", "count": "false"},
+        ],
+    )
+    def test_same_response_as_serializer(self, agent_api_client, settings, params):
+        for priority in Ticket.Priority.values:
+            TicketFactory(priority=priority, title=f"{priority} printer is broken")
+        url = reverse("api:ticket-list")
+
+        settings.TICKETS_LIST_FAST_PATH = True
+        fast = agent_api_client.get(url, params)
+        cache.clear()
+        settings.TICKETS_LIST_FAST_PATH = False
+        expected = agent_api_client.get(url, params)
+
+        assert fast.status_code == status.HTTP_200_OK
+        assert fast.data["results"]
+        assert fast.content == expected.content
@@ -1,10 +1,20 @@
+import csv
+import io
+import json
+
 import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
+from helpdesk_system.tickets.models import Comment
 from helpdesk_system.tickets.models import Ticket
 from helpdesk_system.users.tests.factories import CommentFactory
 from helpdesk_system.users.tests.factories import TicketFactory
+from helpdesk_system.users.tests.factories import UserFactory
 
 
 @pytest.mark.django_db
@@ -59,6 +69,37 @@ class TestTicketViewSet:
         assert response.status_code == status.HTTP_200_OK
         assert response.data["id"] == ticket.id
 
+    def test_retrieve_query_count_independent_of_comments(
+        self,
+        agent_api_client,
+        django_assert_num_queries,
+    ):
+        few = TicketFactory()
+        many = TicketFactory()
+        CommentFactory.create_batch(2, ticket=few)
+        Comment.objects.bulk_create(
+            Comment(ticket=many, author=UserFactory(), content=f"Comment {i}")
+            for i in range(300)
+        )
+
+        with CaptureQueriesContext(connection) as few_queries:
+            agent_api_client.get(reverse("api:ticket-detail", kwargs={"pk": few.pk}))
+        with django_assert_num_queries(len(few_queries)):
+            agent_api_client.get(reverse("api:ticket-detail", kwargs={"pk": many.pk}))
+
+    def test_retrieve_caps_embedded_comments(self, agent_api_client, settings):
+        settings.TICKETS_DETAIL_COMMENTS_LIMIT = 3
+        ticket = TicketFactory()
+        comments = CommentFactory.create_batch(5, ticket=ticket)
+
+        url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        response = agent_api_client.get(url)
+
+        assert response.data["comments_count"] == 5  # noqa: PLR2004
+        assert [c["id"] for c in response.data["comments"]] == [
+            c.id for c in comments[-3:]
+        ]
+
     def test_customer_cannot_update_status(self, customer_api_client, customer):
         ticket = TicketFactory(created_by=customer)
         url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
@@ -147,3 +188,191 @@ class TestCommentViewSet:
         response = agent_api_client.post(url, data)
 
         assert response.status_code == status.HTTP_201_CREATED
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    def _ticket_sql(self, client, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        sql = [q["sql"] for q in context.captured_queries if "tickets_" in q["sql"]]
+        return response, sql
+
+    @pytest.mark.parametrize("fast_path", [True, False])
+    def test_list_fields(self, agent_api_client, settings, fast_path):
+        settings.TICKETS_LIST_FAST_PATH = fast_path
+        TicketFactory.create_batch(2, assigned_to=UserFactory())
+
+        response, sql = self._ticket_sql(
+            agent_api_client,
+            reverse("api:ticket-list"),
+            {"fields": "id,title,status,updated_at", "pagination": "cursor"},
+        )
+
+        assert [list(ticket) for ticket in response.data["results"]] == [
+            ["id", "title", "status", "updated_at"],
+        ] * 2
+        assert not any("users_user" in query for query in sql)
+
+    def test_list_omit(self, agent_api_client):
+        TicketFactory(assigned_to=UserFactory())
+
+        response, sql = self._ticket_sql(
+            agent_api_client,
+            reverse("api:ticket-list"),
+            {"omit": "assigned_to"},
+        )
+
+        ticket = response.data["results"][0]
+        assert "assigned_to" not in ticket
+        assert ticket["created_by"]["id"]
+        assert any("JOIN" in query for query in sql)
+        assert not any('"assigned_to_id" = ' in query for query in sql)
+
+    def test_unknown_field(self, agent_api_client):
+        response = agent_api_client.get(
+            reverse("api:ticket-list"),
+            {"fields": "id,secret"},
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "secret" in str(response.data["fields"])
+
+    def test_detail_fields(self, agent_api_client):
+        ticket = TicketFactory()
+        CommentFactory(ticket=ticket)
+        url = reverse("api:ticket-detail", kwargs={"pk": ticket.pk})
+        params = {"fields": "id,title"}
+
+        response, sql = self._ticket_sql(agent_api_client, url, params)
+        assert response.data == {"id": ticket.id, "title": ticket.title}
+        assert not any("tickets_comment" in query for query in sql)
+
+        # Cut from the full payload once it is cached
+        full = agent_api_client.get(url)
+        response, sql = self._ticket_sql(agent_api_client, url, params)
+        assert response.data == {"id": ticket.id, "title": ticket.title}
+        assert sql == []
+        assert response["ETag"] != full["ETag"]
+
+
+@pytest.mark.django_db
+class TestTicketExport:
+    url = reverse("api:ticket-export")
+
+    def export(self, client, params=None, **extra):
+        response = client.get(self.url, params or {}, **extra)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self, agent_api_client, settings):
+        settings.TICKETS_EXPORT_CHUNK_SIZE = 2
+        tickets = TicketFactory.create_batch(3, assigned_to=UserFactory())
+
+        response, body = self.export(agent_api_client)
+
+        assert response["Content-Type"].startswith("application/x-ndjson")
+        assert 'filename="tickets.ndjson"' in response["Content-Disposition"]
+        lines = [json.loads(line) for line in body.splitlines()]
+        assert [line["id"] for line in lines] == [t.id for t in reversed(tickets)]
+        list_response = agent_api_client.get(reverse("api:ticket-list"))
+        assert lines == json.loads(list_response.content)["results"]
+
+    def test_csv(self, agent_api_client):
+        ticket = TicketFactory(title="Printer, again", assigned_to=None)
+
+        response, body = self.export(agent_api_client, {"format": "csv"})
+
+        assert response["Content-Type"].startswith("text/csv")
+        reader = csv.DictReader(io.StringIO(body))
+        (row,) = list(reader)
+        assert "created_by.username" in reader.fieldnames
+        assert "assigned_to.username" in reader.fieldnames
+        assert row["id"] == str(ticket.id)
+        assert row["title"] == "Printer, again"
+        assert row["created_by.username"] == ticket.created_by.username
+        assert row["assigned_to.username"] == ""
+
+    def test_csv_escapes_formulas(self, agent_api_client):
+        titles = ['=HYPERLINK("http://x")', "+1", "-1+2", "@SUM(A1)", "Fine"]
+        for title in titles:
+            TicketFactory(title=title)
+
+        _, body = self.export(agent_api_client, {"format": "csv", "fields": "title"})
+
+        # Newest first
+        assert [row["title"] for row in csv.DictReader(io.StringIO(body))] == [
+            "Fine",
+            "'@SUM(A1)",
+            "'-1+2",
+            "'+1",
+            '\'=HYPERLINK("http://x")',
+        ]
+
+    def test_empty_csv_by_accept_header(self, agent_api_client):
+        response, body = self.export(agent_api_client, HTTP_ACCEPT="text/csv")
+
+        assert response["Content-Type"].startswith("text/csv")
+        (header,) = body.splitlines()
+        assert header.startswith("id,title,status,")
+
+    def test_filters_search_and_fields(self, agent_api_client):
+        match = TicketFactory(title="VPN down", status=Ticket.Status.OPEN)
+        TicketFactory(title="VPN down", status=Ticket.Status.CLOSED)
+        TicketFactory(title="Printer", status=Ticket.Status.OPEN)
+
+        _, body = self.export(
+            agent_api_client,
+            {"status": "open", "search": "vpn", "fields": "id,title"},
+        )
+
+        assert [json.loads(line) for line in body.splitlines()] == [
+            {"id": match.id, "title": "VPN down"},
+        ]
+
+    def test_customer_exports_own_tickets(self, customer_api_client, customer):
+        own = TicketFactory(created_by=customer)
+        TicketFactory()
+
+        _, body = self.export(customer_api_client)
+
+        assert [json.loads(line)["id"] for line in body.splitlines()] == [own.id]
+
+    @pytest.mark.parametrize(
+        ("params", "field"),
+        [
+            ({"status": "bogus"}, "status"),
+            ({"fields": "nope"}, "fields"),
+            ({"format": "csv", "assigned_to": "x"}, "assigned_to"),
+        ],
+    )
+    def test_errors_are_json(self, agent_api_client, params, field):
+        response = agent_api_client.get(self.url, params)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response["Content-Type"] == "application/json"
+        assert field in response.json()
+
+    def test_not_acceptable_is_json(self, agent_api_client):
+        response = agent_api_client.get(self.url, HTTP_ACCEPT="text/html")
+
+        assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
+        assert response["Content-Type"] == "application/json"
+
+    def test_asgi_streams_asynchronously(self, agent, settings):
+        settings.TICKETS_EXPORT_CHUNK_SIZE = 2
+        tickets = TicketFactory.create_batch(3)
+        client = AsyncClient()
+
+        async def scenario():
+            await client.aforce_login(agent)
+            response = await client.get(self.url)
+            assert response.is_async
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        body = async_to_sync(scenario)()
+
+        lines = [json.loads(line) for line in body.splitlines()]
+        assert [line["id"] for line in lines] == [t.id for t in reversed(tickets)]
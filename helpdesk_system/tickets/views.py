@@ -1,26 +1,91 @@
+import itertools
+import math
+import time
+
+from django.conf import settings
 from django.core.cache import cache
-from django.db.models import Count
-from django.db.models import Max
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.functional import cached_property
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import OpenApiParameter
 from drf_spectacular.utils import extend_schema
 from drf_spectacular.utils import extend_schema_view
 from rest_framework import filters
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
 from .cache import CACHE_TTL
+from .cache import GLOBAL_SCOPE
+from .cache import TICKET_SCOPE
+from .cache import get_etag
+from .cache import get_last_modified
+from .cache import get_ticket_detail_cache_key
 from .cache import get_ticket_list_cache_key
+from .cache import get_ticket_list_scope
 from .cache import invalidate_ticket_cache
+from .cache import invalidate_tickets_cache
+from .cache import start_ticket_generation
+from .changes import get_changes
+from .changes import parse_watermark
+from .events import STATUS_CHANGED
+from .events import queue_event
+from .filters import TicketCommentSearchFilter
+from .filters import TicketOrderingFilter
+from .filters import TicketSearchFilter
+from .filters import add_search_snippets
 from .models import Comment
 from .models import Ticket
+from .models import TicketTombstone
+from .pagination import COUNT_QUERY_PARAM
+from .pagination import PAGINATION_QUERY_PARAM
+from .pagination import TicketPageNumberPagination
+from .pagination import TicketPagination
 from .permissions import CommentPermission
 from .permissions import TicketPermission
+from .renderers import CSVRenderer
+from .renderers import NDJSONRenderer
+from .renderers import ORJSONRenderer
+from .renderers import iterate_in_thread
+from .serializers import FIELDS_QUERY_PARAM
+from .serializers import OMIT_QUERY_PARAM
 from .serializers import CommentCreateSerializer
 from .serializers import CommentSerializer
+from .serializers import TicketBulkUpdateResultSerializer
+from .serializers import TicketBulkUpdateSerializer
+from .serializers import TicketChangesSerializer
 from .serializers import TicketCreateSerializer
 from .serializers import TicketDetailSerializer
 from .serializers import TicketListSerializer
+from .serializers import TicketSearchResultSerializer
 from .serializers import TicketUpdateSerializer
+from .serializers import compile_values_serializer
+from .serializers import get_sparse_fields
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        FIELDS_QUERY_PARAM,
+        str,
+        description=(
+            "Comma separated fields to return, e.g. id,title,status. Leaving "
+            "out the users or comments also skips loading them."
+        ),
+    ),
+    OpenApiParameter(
+        OMIT_QUERY_PARAM,
+        str,
+        description="Comma separated fields to leave out.",
+    ),
+]
 
 
 @extend_schema_view(
@@ -28,8 +93,12 @@ from .serializers import TicketUpdateSerializer
         summary="List tickets",
         description=(
             "Returns paginated list of tickets. "
-            "Customers see only their own tickets, agents see all."
+            "Customers see only their own tickets, agents see all. "
+            "Use ?pagination=cursor for keyset pagination on deep pages and "
+            "?count=false to skip the total count. Send the ETag back in "
+            "If-None-Match to get a 304 when nothing changed."
         ),
+        parameters=SPARSE_FIELDS_PARAMETERS,
     ),
     create=extend_schema(
         summary="Create ticket",
@@ -40,7 +109,13 @@ from .serializers import TicketUpdateSerializer
     ),
     retrieve=extend_schema(
         summary="Get ticket details",
-        description="Returns ticket details including all comments.",
+        description=(
+            "Returns ticket details including the most recent comments. "
+            "Use comments_count and the comments endpoint to page through "
+            "older ones. Send the ETag back in If-None-Match to get a 304 "
+            "when nothing changed."
+        ),
+        parameters=SPARSE_FIELDS_PARAMETERS,
     ),
     update=extend_schema(
         summary="Update ticket",
@@ -67,15 +142,23 @@ class TicketViewSet(viewsets.ModelViewSet):
 
     Supports filtering, search, and ordering:
     - Filter by: status, priority, assigned_to
-    - Search in: title, description
+    - Search in: title, description (full-text, ranked by relevance), and
+      comments too on the search endpoint
     - Order by: created_at, updated_at, priority
+    - Paginate by: page number (default) or cursor (?pagination=cursor)
+    - Poll for changes since a watermark on the changes endpoint
+    - Narrow responses and queries with ?fields= or ?omit=
+    - Export everything matching as NDJSON or CSV, streamed
+    - Change the status, priority or assignee of many tickets in one request
     """
 
     permission_classes = [TicketPermission]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    pagination_class = TicketPagination
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        TicketSearchFilter,
+        TicketOrderingFilter,
     ]
     filterset_fields = ["status", "priority", "assigned_to"]
     search_fields = ["title", "description"]
@@ -83,13 +166,21 @@ class TicketViewSet(viewsets.ModelViewSet):
     ordering = ["-created_at"]
 
     def get_queryset(self):
-        queryset = Ticket.objects.select_related(
-            "created_by",
-            "assigned_to",
-        ).annotate(
-            comments_count=Count("comments"),
-            last_comment_at=Max("comments__created_at"),
-        )
+        queryset = Ticket.objects.all()
+
+        # Users and comments are only joined or prefetched when rendered
+        relations = [
+            name
+            for name in ("created_by", "assigned_to")
+            if self.is_field_requested(name)
+        ]
+        if relations:
+            queryset = queryset.select_related(*relations)
+
+        if self.action == "retrieve" and self.is_field_requested("comments"):
+            queryset = queryset.with_recent_comments(
+                settings.TICKETS_DETAIL_COMMENTS_LIMIT,
+            )
 
         # Customers only see their own tickets
         if self.request.user.is_customer:
@@ -98,40 +189,429 @@ class TicketViewSet(viewsets.ModelViewSet):
         return queryset
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "export"):
             return TicketListSerializer
+        if self.action == "search":
+            return TicketSearchResultSerializer
         if self.action == "create":
             return TicketCreateSerializer
         if self.action in ["update", "partial_update"]:
             return TicketUpdateSerializer
+        if self.action == "bulk_update":
+            return TicketBulkUpdateSerializer
         return TicketDetailSerializer
 
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "sparse_fields": self.sparse_fields}
+
+    def handle_exception(self, exc):
+        # Export errors (filters, ?fields=, Accept) are raised before streaming
+        # starts and are answered as JSON rather than as NDJSON or CSV lines
+        if self.action == "export":
+            renderer = ORJSONRenderer()
+            self.request.accepted_renderer = renderer
+            self.request.accepted_media_type = renderer.media_type
+        return super().handle_exception(exc)
+
+    @cached_property
+    def sparse_fields(self):
+        """Fields picked with ?fields= and ?omit=, None for all of them."""
+        if self.action not in ("list", "retrieve", "search", "export"):
+            return None
+        return get_sparse_fields(
+            self.request.query_params,
+            self.get_serializer_class(),
+        )
+
+    def is_field_requested(self, name):
+        return self.sparse_fields is None or name in self.sparse_fields
+
+    def get_cache_query_params(self):
+        """Query parameters that change the list response, used for cache keys."""
+        paginator = self.paginator
+        return [
+            *self.filterset_fields,
+            TicketSearchFilter.search_param,
+            TicketOrderingFilter.ordering_param,
+            PAGINATION_QUERY_PARAM,
+            COUNT_QUERY_PARAM,
+            paginator.page_class.page_query_param,
+            paginator.cursor_class.cursor_query_param,
+            FIELDS_QUERY_PARAM,
+            OMIT_QUERY_PARAM,
+        ]
+
     def list(self, request, *args, **kwargs):
-        """List tickets with caching."""
-        # Only cache if no query params (filters, search, etc.)
-        if not request.query_params:
-            cache_key = get_ticket_list_cache_key(request.user)
-            cached_data = cache.get(cache_key)
+        """List tickets, cached per scope and canonical query."""
+        cache_key = get_ticket_list_cache_key(
+            request.user,
+            request.query_params,
+            self.get_cache_query_params(),
+            # Their values add up, every other parameter keeps its last one
+            multi_valued_params=(FIELDS_QUERY_PARAM, OMIT_QUERY_PARAM),
+        )
+        last_modified = get_last_modified(
+            GLOBAL_SCOPE,
+            get_ticket_list_scope(request.user, request.query_params),
+        )
+        if cache_key is None or last_modified is None:
+            # The cache is unavailable: without generations every list would
+            # share one key and ETag, so answer in full and without them
+            response = self.get_list_response(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
 
-            if cached_data is not None:
-                return Response(cached_data)
+        etag = get_etag(cache_key)
+        not_modified = self.get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
 
-            response = super().list(request, *args, **kwargs)
+        cached_data = cache.get(cache_key)
+        if cached_data is not None:
+            response = Response(cached_data)
+        else:
+            response = self.get_list_response(request, *args, **kwargs)
             cache.set(cache_key, response.data, CACHE_TTL)
-            return response
+        self.set_validators(response, etag, last_modified)
+        return response
 
+    def get_list_response(self, request, *args, **kwargs):
+        """Build the list response from the database."""
+        if settings.TICKETS_LIST_FAST_PATH:
+            return self.list_values(request)
         return super().list(request, *args, **kwargs)
 
-    def perform_create(self, serializer):
-        ticket = serializer.save(created_by=self.request.user)
-        invalidate_ticket_cache(ticket)
+    def list_values(self, request):
+        """
+        List tickets from ``.values()`` rows instead of model instances.
+
+        Renders the same output as TicketListSerializer through its compiled
+        row function, skipping model instantiation and the per-field
+        serializer machinery. The columns behind the orderings and search
+        rank are fetched too, for the cursor positions.
+        """
+        columns, serialize_rows = compile_values_serializer(
+            TicketListSerializer,
+            self.sparse_fields,
+        )
+        queryset = self.filter_queryset(self.get_queryset())
+        # Fetched even when ?fields= leaves them out, the cursor needs them
+        ordering_columns = [
+            TicketOrderingFilter().resolve_alias(field)
+            for field in (*self.ordering_fields, *TicketOrderingFilter.tie_breakers)
+        ]
+        queryset = queryset.values(
+            *dict.fromkeys(
+                [*columns, *ordering_columns, *queryset.query.annotations],
+            ),
+        )
+
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        data = serialize_rows(rows)
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a ticket, serving the serialized payload from cache."""
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        sparse_fields = self.sparse_fields
+        # Read before the ticket, and never created for tickets that do not
+        # exist: those keys are only started once the ticket has been read
+        ticket_id = int(lookup) if lookup.isdigit() else None
+        cache_key = last_modified = cached = None
+        if ticket_id is not None:
+            cache_key = get_ticket_detail_cache_key(ticket_id, create=False)
+            last_modified = get_last_modified(
+                GLOBAL_SCOPE,
+                TICKET_SCOPE.format(ticket_id=ticket_id),
+                create=False,
+            )
+        if cache_key is not None:
+            cached = cache.get(cache_key)
+
+        if cached is not None:
+            self.check_cached_object_permissions(request, ticket_id, cached)
+            data = cached["data"]
+            if sparse_fields is not None:
+                data = {name: data[name] for name in sparse_fields}
+        else:
+            instance = self.get_object()
+            data = self.get_serializer(instance).data
+            if cache_key is None:
+                cache_key = start_ticket_generation(instance.id)
+                last_modified = None
+            # Only complete payloads are cached, sparse ones are cut from them
+            if cache_key is not None and sparse_fields is None:
+                cached = {"created_by": instance.created_by_id, "data": data}
+                cache.set(cache_key, cached, CACHE_TTL)
+
+        response = Response(data)
+        if cache_key is None:
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        if last_modified is None:
+            # Started after the read, so only dated from the next response
+            get_last_modified(GLOBAL_SCOPE, TICKET_SCOPE.format(ticket_id=ticket_id))
+        # Only answered once the ticket is known to be visible to the user
+        etag = get_etag(f"{cache_key}:{','.join(sparse_fields or ())}")
+        not_modified = self.get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        self.set_validators(response, etag, last_modified)
+        return response
+
+    def get_not_modified_response(self, request, etag, last_modified):
+        """Return a 304 if the client's copy still matches the validators."""
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=None if last_modified is None else math.ceil(last_modified),
+        )
+        if response is not None:
+            self.set_validators(response, etag, last_modified)
+        return response
+
+    def set_validators(self, response, etag, last_modified):
+        """
+        Set the ETag and Last-Modified of a list or detail response.
+
+        They come from the cache generations, which move whenever a ticket in
+        the response changes. Clients have to revalidate before every reuse.
+        Last-Modified has one second precision, so it is rounded up and only
+        sent once that second is over: another change within the same second
+        would otherwise carry the same date and answer If-Modified-Since with
+        a stale 304. The ETag covers the responses in between.
+        """
+        response.headers["ETag"] = etag
+        if last_modified is not None and math.ceil(last_modified) <= time.time():
+            response.headers["Last-Modified"] = http_date(math.ceil(last_modified))
+        patch_cache_control(response, private=True, no_cache=True)
+
+    @extend_schema(
+        summary="Search tickets and comments",
+        description=(
+            "Full-text search over ticket titles, descriptions and comments. "
+            "Tickets are ranked by their best match and carry a highlighted "
+            "snippet from the ticket or the matching comment. Accepts the "
+            "same filters as the list."
+        ),
+        parameters=SPARSE_FIELDS_PARAMETERS,
+    )
+    @action(
+        detail=False,
+        filter_backends=[DjangoFilterBackend, TicketCommentSearchFilter],
+        pagination_class=TicketPageNumberPagination,
+    )
+    def search(self, request, *args, **kwargs):
+        """Rank tickets by their best matching ticket text or comment."""
+        text = TicketCommentSearchFilter().get_search_text(request)
+        if not text:
+            param = TicketCommentSearchFilter.search_param
+            raise ValidationError({param: ["This query parameter is required."]})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        tickets = list(queryset) if page is None else page
+        add_search_snippets(tickets, text)
+
+        serializer = self.get_serializer(tickets, many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        summary="Export tickets",
+        description=(
+            "Streams every ticket visible to the user as NDJSON (default) or "
+            "CSV, picked with ?format=ndjson|csv or the Accept header. Accepts "
+            "the same filters, search, ordering and ?fields= as the list."
+        ),
+        parameters=SPARSE_FIELDS_PARAMETERS,
+        responses={(200, "application/x-ndjson"): TicketListSerializer(many=True)},
+    )
+    @action(
+        detail=False,
+        pagination_class=None,
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request, *args, **kwargs):
+        """
+        Stream the filtered tickets through a server-side cursor.
+
+        Under ASGI the batches are read through an async iterator, a plain
+        generator would be read whole into memory by Django before sending.
+        """
+        columns, serialize_rows = compile_values_serializer(
+            TicketListSerializer,
+            self.sparse_fields,
+        )
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns)
+        chunk_size = settings.TICKETS_EXPORT_CHUNK_SIZE
 
-    def perform_update(self, serializer):
-        ticket = serializer.save()
-        invalidate_ticket_cache(ticket)
+        def batches():
+            # Inside a transaction the cursor streams rows as they are read,
+            # in autocommit it would be materialized WITH HOLD first
+            with transaction.atomic():
+                rows = queryset.iterator(chunk_size=chunk_size)
+                for batch in itertools.batched(rows, chunk_size, strict=False):
+                    yield serialize_rows(batch)
+
+        renderer = request.accepted_renderer
+        content = renderer.stream(batches(), self.get_serializer())
+        if isinstance(request._request, ASGIRequest):  # noqa: SLF001
+            content = iterate_in_thread(content)
+        response = StreamingHttpResponse(
+            content,
+            content_type=f"{renderer.media_type}; charset=utf-8",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="tickets.{renderer.format}"'
+        )
+        return response
+
+    @extend_schema(
+        summary="Poll ticket changes",
+        description=(
+            "Returns the tickets created or updated and the IDs of the tickets "
+            "deleted since the ?since= watermark of the previous poll, with the "
+            "watermark to poll from next. Without ?since= every ticket is "
+            "returned. Answers 410 when the watermark is older than the "
+            "deletions kept, the client then has to start over without it."
+        ),
+        parameters=[
+            OpenApiParameter(
+                "since",
+                str,
+                description="Watermark returned by the previous poll.",
+            ),
+        ],
+        responses=TicketChangesSerializer,
+    )
+    @action(detail=False, filter_backends=[], pagination_class=None)
+    def changes(self, request, *args, **kwargs):
+        """Return what changed since a watermark, read off the updated_at index."""
+        since = request.query_params.get("since")
+        tickets, deleted, watermark, has_more = get_changes(
+            self.get_queryset(),
+            self.get_tombstone_queryset(),
+            parse_watermark(since) if since else None,
+            settings.TICKETS_CHANGES_PAGE_SIZE,
+        )
+        serializer = TicketChangesSerializer(
+            {
+                "tickets": tickets,
+                "deleted": deleted,
+                "watermark": watermark,
+                "has_more": has_more,
+            },
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Update tickets in bulk",
+        description=(
+            "Sets the same status, priority and/or assigned_to on every listed "
+            "ticket, validated as a PATCH of a single ticket would be. Tickets "
+            "already matching are left untouched. Nothing is changed if any "
+            "ticket does not exist. Only agents can update tickets."
+        ),
+        request=TicketBulkUpdateSerializer,
+        responses=TicketBulkUpdateResultSerializer,
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-update",
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def bulk_update(self, request, *args, **kwargs):
+        """Apply the changes to every ticket with a single UPDATE."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = self.perform_bulk_update(serializer)
+        return Response(TicketBulkUpdateResultSerializer({"updated": updated}).data)
+
+    def perform_bulk_update(self, serializer):
+        """
+        Update the tickets in one statement and return the IDs changed.
+
+        Instead of a save() per ticket, and the post_save signal, cache
+        invalidation and event publish that go with it, the caches of all the
+        tickets are invalidated at once and their status changes queued as one
+        batch of events.
+        """
+        ids = serializer.validated_data["ids"]
+        values = {
+            Ticket._meta.get_field(name).attname: getattr(value, "pk", value)  # noqa: SLF001
+            for name, value in serializer.validated_data["changes"].items()
+        }
+        # Locked in ID order so concurrent bulk updates cannot deadlock
+        tickets = list(
+            self.get_queryset()
+            .select_related(None)
+            .filter(id__in=ids)
+            .only("id", "created_by", *TicketBulkUpdateSerializer.FIELDS)
+            .order_by("id")
+            .select_for_update(),
+        )
+        missing = set(ids) - {ticket.id for ticket in tickets}
+        if missing:
+            msg = f"Tickets not found: {', '.join(map(str, sorted(missing)))}."
+            raise ValidationError({"ids": [msg]})
+
+        changed = [
+            ticket
+            for ticket in tickets
+            if any(getattr(ticket, name) != value for name, value in values.items())
+        ]
+        if not changed:
+            return []
+        Ticket.objects.filter(id__in=[ticket.id for ticket in changed]).update(
+            **values,
+            updated_at=timezone.now(),
+        )
+
+        previous_assignee_ids = {}
+        for ticket in changed:
+            previous_assignee_ids[ticket.id] = ticket.assigned_to_id
+            old_status = ticket.status
+            for name, value in values.items():
+                setattr(ticket, name, value)
+            if ticket.status != old_status:
+                queue_event(STATUS_CHANGED, ticket_id=ticket.id, old_status=old_status)
+        invalidate_tickets_cache(changed, previous_assignee_ids)
+        return [ticket.id for ticket in changed]
+
+    def get_tombstone_queryset(self):
+        queryset = TicketTombstone.objects.all()
+        if self.request.user.is_customer:
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+    def check_cached_object_permissions(self, request, ticket_id, cached):
+        """Apply get_queryset scoping and object permissions to a cache hit."""
+        # Customers get a 404 for tickets outside their queryset, as on a miss
+        if request.user.is_customer and cached["created_by"] != request.user.id:
+            raise Http404
+        self.check_object_permissions(
+            request,
+            Ticket(id=ticket_id, created_by_id=cached["created_by"]),
+        )
+
+    def perform_create(self, serializer):
+        # Ticket caches are invalidated by the post_save signal
+        serializer.save(created_by=self.request.user)
 
     def perform_destroy(self, instance):
         invalidate_ticket_cache(instance)
+        TicketTombstone.objects.create(
+            ticket_id=instance.id,
+            created_by_id=instance.created_by_id,
+        )
         instance.delete()
 
 
@@ -181,6 +661,5 @@ class CommentViewSet(viewsets.ModelViewSet):
         return CommentSerializer
 
     def perform_create(self, serializer):
-        comment = serializer.save(author=self.request.user)
-        # Invalidate ticket cache when comment is added
-        invalidate_ticket_cache(comment.ticket)
+        # Ticket caches are invalidated by the comment signals
+        serializer.save(author=self.request.user)
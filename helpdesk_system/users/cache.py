@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.db import transaction
+
+# Cache keys
+AUTH_USER_KEY = "users:auth:{user_id}"
+
+
+def get_auth_user_cache_key(user_id):
+    """Generate cache key for the user authenticated by a WebSocket token."""
+    return AUTH_USER_KEY.format(user_id=user_id)
+
+
+def invalidate_auth_user_cache(user_id):
+    """
+    Drop the cached user, e.g. after its role changed.
+
+    Like the ticket caches, it happens now and again on commit, so a lookup
+    racing the transaction cannot keep the old row cached.
+    """
+    key = get_auth_user_cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
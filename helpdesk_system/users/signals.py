@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_auth_user_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Invalidate the cached user when it is saved or deleted."""
+    invalidate_auth_user_cache(instance.id)